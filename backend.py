@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+from decimal import Decimal, getcontext
+from fractions import Fraction
+
+
+DECIMAL = 'decimal'
+FLOAT64 = 'float64'
+FRACTION = 'fraction'
+BACKENDS = (DECIMAL, FLOAT64, FRACTION)
+
+UNKNOWN_BACKEND_MSG = 'Unknown backend, expected one of: decimal, float64, fraction'
+NUMPY_REQUIRED_MSG = 'The float64 backend requires numpy'
+INVALID_PRECISION_MSG = 'Decimal precision must be a positive number of digits'
+
+# nothing changes the decimal context at import time, this is the precision
+# the command line and benchmarks ask for
+DEFAULT_PRECISION = 30
+
+_current_backend = DECIMAL
+_numpy = None
+
+
+def get_backend():
+    return _current_backend
+
+
+def set_backend(name):
+    global _current_backend
+    if name not in BACKENDS:
+        raise Exception(UNKNOWN_BACKEND_MSG)
+    if name == FLOAT64:
+        require_numpy()
+    _current_backend = name
+
+
+@contextmanager
+def use_backend(name):
+    previous = get_backend()
+    set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
+
+
+def get_precision():
+    return getcontext().prec
+
+
+def set_precision(digits):
+    if int(digits) < 1:
+        raise Exception(INVALID_PRECISION_MSG)
+    getcontext().prec = int(digits)
+
+
+@contextmanager
+def use_precision(digits):
+    previous = get_precision()
+    set_precision(digits)
+    try:
+        yield
+    finally:
+        set_precision(previous)
+
+
+def require_numpy():
+    # numpy is only imported the first time an array backed object is built
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            raise Exception(NUMPY_REQUIRED_MSG)
+        _numpy = numpy
+    return _numpy
+
+
+def scalar(x, backend):
+    if backend == FLOAT64:
+        return float(x)
+    if backend == FRACTION:
+        return Fraction(x)
+    if isinstance(x, Fraction):
+        # Decimal() does not take a Fraction, divide in the current precision
+        return Decimal(x.numerator) / Decimal(x.denominator)
+    return Decimal(x)
@@ -0,0 +1,291 @@
+from math import pi
+
+from vector import Vector
+from backend import FLOAT64, require_numpy
+
+
+class VectorBatch(object):
+
+    CANNOT_NORMALIZE_ZERO_VECTOR_MSG = 'Cannot normalize the zero vector'
+    CANNOT_COMPUTE_ANGLE_WITH_ZERO_VECTOR_MSG = 'Cannot compute an angle with the zero vector'
+    BATCH_MUST_BE_TWO_DIMENSIONAL_MSG = 'The coordinates must be a nonempty N x d array'
+    BATCH_SIZES_MUST_MATCH_MSG = 'Pairwise operations need batches of the same size and dimension'
+
+    def __init__(self, coordinates):
+        np = require_numpy()
+        coordinates = np.ascontiguousarray(coordinates, dtype=np.float64)
+        if coordinates.ndim != 2 or coordinates.size == 0:
+            raise ValueError(self.BATCH_MUST_BE_TWO_DIMENSIONAL_MSG)
+        self.coordinates = coordinates
+        self.dimension = coordinates.shape[1]
+
+
+    @staticmethod
+    def from_vectors(vectors):
+        return VectorBatch([v.coordinates for v in vectors])
+
+
+    def to_vectors(self):
+        return [Vector(row, FLOAT64) for row in self.coordinates]
+
+
+    def __len__(self):
+        return len(self.coordinates)
+
+
+    def __getitem__(self, i):
+        return Vector(self.coordinates[i], FLOAT64)
+
+
+    def __str__(self):
+        return 'VectorBatch: {} vectors of dimension {}'.format(len(self), self.dimension)
+
+
+    def _operand(self, v):
+        # a single Vector broadcasts against every row, a batch pairs row by row
+        np = require_numpy()
+        if isinstance(v, VectorBatch):
+            other = v.coordinates
+        elif isinstance(v, Vector):
+            other = np.asarray(v.coordinates, dtype=np.float64)[np.newaxis, :]
+        else:
+            other = np.atleast_2d(np.asarray(v, dtype=np.float64))
+
+        if other.shape[1] != self.dimension or len(other) not in (1, len(self)):
+            raise Exception(self.BATCH_SIZES_MUST_MATCH_MSG)
+        return other
+
+
+    def dot_product(self, v):
+        np = require_numpy()
+        other = self._operand(v)
+        if len(other) == 1:
+            return self.coordinates.dot(other[0])
+        return np.einsum('ij,ij->i', self.coordinates, other)
+
+
+    def magnitude(self):
+        np = require_numpy()
+        return np.sqrt(np.einsum('ij,ij->i', self.coordinates, self.coordinates))
+
+
+    def normalized(self):
+        magnitudes = self.magnitude()
+        if not magnitudes.all():
+            raise Exception(self.CANNOT_NORMALIZE_ZERO_VECTOR_MSG)
+        return VectorBatch(self.coordinates / magnitudes[:, None])
+
+
+    def angle_with(self, v, in_degree=False):
+        np = require_numpy()
+        other = self._operand(v)
+        magnitudes = self.magnitude() * np.sqrt(np.einsum('ij,ij->i', other, other))
+        if not magnitudes.all():
+            raise Exception(self.CANNOT_COMPUTE_ANGLE_WITH_ZERO_VECTOR_MSG)
+
+        # rounding can push the cosine just outside [-1, 1]
+        cosines = np.clip(self.dot_product(other) / magnitudes, -1.0, 1.0)
+        angles = np.arccos(cosines)
+        if in_degree:
+            return angles * (180. / pi)
+        return angles
+
+
+    def check_parallel(self, v, tolerance=1e-5):
+        np = require_numpy()
+        other = self._operand(v)
+        other_magnitudes = np.sqrt(np.einsum('ij,ij->i', other, other))
+        return np.abs(np.abs(self.dot_product(other)) - self.magnitude() * other_magnitudes) < tolerance
+
+
+    def check_orthogonal(self, v, tolerance=1e-10):
+        np = require_numpy()
+        return np.abs(self.dot_product(v)) < tolerance
+
+
+UNIQUE = 0
+PARALLEL = 1
+COINCIDENT = 2
+
+
+def lines_to_array(lines):
+    np = require_numpy()
+    return np.array([[float(x) for x in ell.normal_vector.coordinates] + [float(ell.constant_term)]
+                     for ell in lines], dtype=np.float64)
+
+
+def intersect_lines(lines1, lines2, parallel_tolerance=1e-5, orthogonal_tolerance=1e-10):
+    """Intersect 2D lines row by row, each row being the (A, B, k) of Ax + By = k.
+
+    Returns an N x 2 array of points (nan where there is no single point) and
+    an array of UNIQUE, PARALLEL or COINCIDENT status codes. Parallelism uses
+    the test of Vector.check_parallel; parallel lines are coincident when
+    their basepoint difference is orthogonal to the normal, as in
+    Plane.is_same_plane. A line with a zero normal, 0 = k, has no
+    basepoint: two of them coincide only when their constants agree, and
+    one never coincides with a line that has a normal.
+    """
+    np = require_numpy()
+    lines1 = np.atleast_2d(np.asarray(lines1, dtype=np.float64))
+    lines2 = np.atleast_2d(np.asarray(lines2, dtype=np.float64))
+    a1, b1, k1 = lines1[:, 0], lines1[:, 1], lines1[:, 2]
+    a2, b2, k2 = lines2[:, 0], lines2[:, 1], lines2[:, 2]
+
+    dot = a1*a2 + b1*b2
+    magnitudes = np.sqrt(a1*a1 + b1*b1) * np.sqrt(a2*a2 + b2*b2)
+    det = a1*b2 - b1*a2
+    parallel = (np.abs(np.abs(dot) - magnitudes) < parallel_tolerance) | (det == 0)
+
+    difference = _basepoints(a1, b1, k1) - _basepoints(a2, b2, k2)
+    offset = a1*difference[:, 0] + b1*difference[:, 1]
+    zero1, zero2 = _zero_normals(a1, b1), _zero_normals(a2, b2)
+    same_constant = zero1 & zero2 & (np.abs(k1 - k2) < orthogonal_tolerance)
+    coincident = parallel & np.where(zero1 | zero2, same_constant,
+                                     np.abs(offset) < orthogonal_tolerance)
+
+    status = np.where(coincident, COINCIDENT, np.where(parallel, PARALLEL, UNIQUE))
+    points = np.full((len(status), 2), np.nan)
+    unique = ~parallel
+    points[unique, 0] = (b2*k1 - b1*k2)[unique] / det[unique]
+    points[unique, 1] = (a1*k2 - a2*k1)[unique] / det[unique]
+    return points, status
+
+
+def intersect_all_pairs(lines, chunk_size=1024, **tolerances):
+    """Yield (i, j, points, status) for every pair i < j, chunk_size x chunk_size pairs at a time."""
+    np = require_numpy()
+    lines = np.atleast_2d(np.asarray(lines, dtype=np.float64))
+    n = len(lines)
+    for start1 in range(0, n, chunk_size):
+        for start2 in range(start1, n, chunk_size):
+            i, j = np.meshgrid(np.arange(start1, min(start1 + chunk_size, n)),
+                               np.arange(start2, min(start2 + chunk_size, n)), indexing='ij')
+            keep = i < j
+            i, j = i[keep], j[keep]
+            if len(i):
+                points, status = intersect_lines(lines[i], lines[j], **tolerances)
+                yield i, j, points, status
+
+
+def _zero_normals(a, b):
+    # lines _basepoints finds no basepoint for
+    np = require_numpy()
+    return (np.abs(a) < 1e-10) & (np.abs(b) < 1e-10)
+
+
+def _basepoints(a, b, k):
+    # like Line.set_basepoint: k over the first coefficient that is not near zero
+    np = require_numpy()
+    basepoints = np.zeros((len(a), 2))
+    use_a = np.abs(a) >= 1e-10
+    use_b = ~use_a & (np.abs(b) >= 1e-10)
+    basepoints[use_a, 0] = k[use_a] / a[use_a]
+    basepoints[use_b, 1] = k[use_b] / b[use_b]
+    return basepoints
+
+
+ABOVE = 1
+ON = 0
+BELOW = -1
+
+POINT_CHUNK_SIZE = 65536
+
+
+def planes_to_array(planes):
+    # (a_1, ..., a_d, k) per plane, as lines_to_array
+    np = require_numpy()
+    return np.array([[float(x) for x in p.normal_vector.coordinates] + [float(p.constant_term)]
+                     for p in planes], dtype=np.float64)
+
+
+class PlaneBatch(object):
+    """Point queries against many planes a.x = k at once, d dimensional.
+
+    Normals are scaled to unit length up front, so the signed distance of a
+    point x is x.n - k/|a|: positive on the side the normal points to. Point
+    arrays are processed POINT_CHUNK_SIZE rows at a time, which bounds the
+    temporary memory to chunk size x number of planes floats.
+    """
+
+    CANNOT_MEASURE_FROM_ZERO_NORMAL_MSG = 'Cannot measure distances to a plane with a zero normal vector'
+    POINTS_MUST_MATCH_DIMENSION_MSG = 'The points must be an N x d array in the dimension of the planes'
+
+    def __init__(self, rows):
+        np = require_numpy()
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        magnitudes = np.sqrt(np.einsum('ij,ij->i', rows[:, :-1], rows[:, :-1]))
+        if np.any(magnitudes == 0):
+            raise Exception(self.CANNOT_MEASURE_FROM_ZERO_NORMAL_MSG)
+        self.normals = np.ascontiguousarray(rows[:, :-1] / magnitudes[:, None])
+        self.offsets = rows[:, -1] / magnitudes
+        self.dimension = self.normals.shape[1]
+
+
+    @staticmethod
+    def from_planes(planes):
+        return PlaneBatch(planes_to_array(planes))
+
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+    def _points(self, points):
+        np = require_numpy()
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        if points.ndim != 2 or points.shape[1] != self.dimension:
+            raise ValueError(self.POINTS_MUST_MATCH_DIMENSION_MSG)
+        return points
+
+
+    def iter_signed_distances(self, points, chunk_size=POINT_CHUNK_SIZE):
+        """Yield (start, distances) with distances[i, j] for point start + i and plane j."""
+        points = self._points(points)
+        for start in range(0, len(points), chunk_size):
+            yield start, points[start:start + chunk_size].dot(self.normals.T) - self.offsets
+
+
+    def signed_distances(self, points, chunk_size=POINT_CHUNK_SIZE):
+        # the full N x planes array, see iter_signed_distances for large N
+        np = require_numpy()
+        points = self._points(points)
+        distances = np.empty((len(points), len(self)))
+        for start, chunk in self.iter_signed_distances(points, chunk_size):
+            distances[start:start + len(chunk)] = chunk
+        return distances
+
+
+    def sides(self, points, tolerance=1e-10, chunk_size=POINT_CHUNK_SIZE):
+        """ABOVE, ON or BELOW for every point and plane, as an N x planes int8 array."""
+        np = require_numpy()
+        points = self._points(points)
+        sides = np.empty((len(points), len(self)), dtype=np.int8)
+        for start, chunk in self.iter_signed_distances(points, chunk_size):
+            # ABOVE - BELOW is 1, 0 or -1
+            side = sides[start:start + len(chunk)]
+            side[:] = chunk > tolerance
+            side -= chunk < -tolerance
+        return sides
+
+
+    def inside(self, points, tolerance=1e-10, chunk_size=POINT_CHUNK_SIZE):
+        """True for points with a.x <= k for every plane, within tolerance: the intersection of the half-spaces."""
+        np = require_numpy()
+        points = self._points(points)
+        mask = np.empty(len(points), dtype=bool)
+        for start, chunk in self.iter_signed_distances(points, chunk_size):
+            mask[start:start + len(chunk)] = (chunk <= tolerance).all(axis=1)
+        return mask
+
+
+    def nearest(self, points, chunk_size=POINT_CHUNK_SIZE):
+        """Index of the closest plane for each point, and the signed distance to it."""
+        np = require_numpy()
+        points = self._points(points)
+        indices = np.empty(len(points), dtype=np.intp)
+        distances = np.empty(len(points))
+        for start, chunk in self.iter_signed_distances(points, chunk_size):
+            closest = np.abs(chunk).argmin(axis=1)
+            indices[start:start + len(chunk)] = closest
+            distances[start:start + len(chunk)] = chunk[np.arange(len(chunk)), closest]
+        return indices, distances
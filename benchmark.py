@@ -0,0 +1,566 @@
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+from decimal import Decimal
+from statistics import median
+
+from vector import Vector
+from line import Line
+from plane import Plane
+from linsys import LinearSystem
+from backend import DECIMAL, DEFAULT_PRECISION, FLOAT64, set_precision, use_backend
+from generate import UNIQUE, NO_SOLUTIONS, INFINITE, generate_system, check_solution
+
+
+def random_system(n, seed=0):
+    rng = random.Random(seed)
+    planes = []
+    for i in range(n):
+        coordinates = ['{:.3f}'.format(rng.uniform(-10, 10)) for j in range(n)]
+        constant_term = '{:.3f}'.format(rng.uniform(-10, 10))
+        planes.append(Plane(normal_vector=Vector(coordinates), constant_term=constant_term))
+    return LinearSystem(planes)
+
+
+def random_integer_system(n, seed=0):
+    rng = random.Random(seed)
+    planes = [Plane(normal_vector=Vector([rng.randint(-9, 9) for j in range(n)]),
+                    constant_term=rng.randint(-9, 9)) for i in range(n)]
+    return LinearSystem(planes)
+
+
+def time_call(f, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_backends(sizes):
+    print('compute_solution, best of 3 (seconds)')
+    print('{:>6} {:>12} {:>12} {:>10}'.format('n', DECIMAL, FLOAT64, 'speedup'))
+    for n in sizes:
+        timings = []
+        for backend in (DECIMAL, FLOAT64):
+            with use_backend(backend):
+                s = random_system(n)
+            timings.append(time_call(s.compute_solution, repeat=1 if backend == DECIMAL else 3))
+        print('{:>6} {:>12.4f} {:>12.4f} {:>9.1f}x'.format(n, timings[0], timings[1],
+                                                        timings[0] / timings[1]))
+
+
+def bench_factorization(sizes, num_rhs=1000):
+    print('{} right-hand sides, float64 (seconds)'.format(num_rhs))
+    print('{:>6} {:>16} {:>16}'.format('n', 'compute_solution', 'factorize+solve'))
+    rng = random.Random(1)
+    for n in sizes:
+        with use_backend(FLOAT64):
+            s = random_system(n)
+        rhs = [[rng.uniform(-10, 10) for j in range(n)] for i in range(num_rhs)]
+
+        def resolve_each():
+            for b in rhs[:10]:
+                for i,p in enumerate(s):
+                    s[i] = Plane(normal_vector=p.normal_vector, constant_term=b[i])
+                s.compute_solution()
+
+        def solve_many():
+            s._factorization = None
+            s.factorize().solve_many(rhs)
+
+        per_solve = time_call(resolve_each, repeat=1) / 10
+        print('{:>6} {:>16.4f} {:>16.4f}'.format(n, per_solve * num_rhs, time_call(solve_many)))
+
+
+def eliminate_with_row_operations(s, read_basepoints=False):
+    # the plane level row operations build a new Plane for every update
+    for i in range(len(s)):
+        pivot = s[i].normal_vector.coordinates[i]
+        for j in range(i+1, len(s)):
+            s.add_multiple_times_row_to_row(-s[j].normal_vector.coordinates[i]/pivot, i, j)
+            if read_basepoints:
+                s[j].basepoint
+
+
+def bench_basepoint(sizes):
+    print('plane level elimination, decimal (seconds)')
+    print('{:>6} {:>12} {:>12}'.format('n', 'lazy', 'eager'))
+    for n in sizes:
+        lazy = time_call(lambda: eliminate_with_row_operations(random_system(n)), repeat=1)
+        eager = time_call(lambda: eliminate_with_row_operations(random_system(n), True), repeat=1)
+        print('{:>6} {:>12.4f} {:>12.4f}'.format(n, lazy, eager))
+
+
+def bench_exact(sizes):
+    print('integer systems, compute_solution (seconds)')
+    print('{:>6} {:>12} {:>12}'.format('n', 'decimal', 'exact'))
+    for n in sizes:
+        s = random_integer_system(n)
+        print('{:>6} {:>12.4f} {:>12.4f}'.format(n, time_call(s.compute_solution, repeat=1),
+                                                 time_call(lambda: s.compute_solution('exact'), repeat=1)))
+
+
+def bench_parallel(num_systems=2000, n=10, max_workers=None):
+    from multiprocessing import cpu_count
+    from parallel import solve_many
+
+    systems = [random_system(n, seed=i) for i in range(num_systems)]
+    print('{} systems of {} unknowns, decimal, solve_many (seconds)'.format(num_systems, n))
+    print('{:>8} {:>12} {:>10}'.format('workers', 'time', 'speedup'))
+    serial = None
+    for workers in range(1, (max_workers or cpu_count()) + 1):
+        elapsed = time_call(lambda: solve_many(systems, workers=workers), repeat=1)
+        serial = serial or elapsed
+        print('{:>8} {:>12.4f} {:>9.1f}x'.format(workers, elapsed, serial / elapsed))
+
+
+def bench_vectors(num_vectors=100000, n=3):
+    rng = random.Random(2)
+    u, v = random_vector(n, rng), random_vector(n, rng)
+    print('{} decimal vectors of dimension {}'.format(num_vectors, n))
+    print('{:>24} {:>12.4f}'.format('plus (seconds)', time_call(
+        lambda: [u.plus(v) for i in range(num_vectors)])))
+    print('{:>24} {:>12.4f}'.format('times_scalar (seconds)', time_call(
+        lambda: [u.times_scalar(2) for i in range(num_vectors)])))
+    # the object itself, its coordinates tuple is shared by any layout
+    size = sys.getsizeof(u)
+    if hasattr(u, '__dict__'):
+        size += sys.getsizeof(u.__dict__)
+    print('{:>24} {:>12}'.format('bytes per Vector', size))
+
+
+def bench_memoization(num_vectors=2000, n=3):
+    from vector import memoization
+
+    rng = random.Random(3)
+    reference = random_vector(n, rng)
+    vectors = [random_vector(n, rng) for i in range(num_vectors)]
+    print('{} decimal vectors of dimension {} against one reference (seconds)'.format(num_vectors, n))
+    print('{:>20} {:>12} {:>12}'.format('', 'memoized', 'recomputed'))
+    for name, f in [('angle_with', lambda v: v.angle_with(reference)),
+                    ('parallel_component', lambda v: v.parallel_component(reference))]:
+        timings = []
+        for enabled in (True, False):
+            # fresh copies, so only the reference can have cached values
+            fresh = [Vector(v.coordinates) for v in vectors]
+            with memoization(enabled):
+                timings.append(time_call(lambda: [f(v) for v in fresh], repeat=1))
+        print('{:>20} {:>12.4f} {:>12.4f}'.format(name, timings[0], timings[1]))
+
+
+def bench_incremental(sizes, num_updates=20):
+    from incremental import IncrementalLinearSystem
+
+    print('{} equation replacements, decimal (seconds)'.format(num_updates))
+    print('{:>6} {:>16} {:>16}'.format('n', 'compute_solution', 'incremental'))
+    for n in sizes:
+        s = random_system(n)
+        replacements = list(random_system(n, seed=1))
+
+        def resolve_each():
+            for i in range(num_updates):
+                s[i % n] = replacements[i % n]
+                s.compute_solution()
+
+        incremental = IncrementalLinearSystem.from_system(s)
+
+        def update_each():
+            for i in range(num_updates):
+                incremental.replace(i % n, replacements[i % n])
+                incremental.compute_solution()
+
+        print('{:>6} {:>16.4f} {:>16.4f}'.format(n, time_call(resolve_each, repeat=1),
+                                                 time_call(update_each, repeat=1)))
+
+
+def bench_blocked(sizes=(1000, 2000, 5000), max_threads=None, max_unblocked=2000):
+    from multiprocessing import cpu_count
+    from lu import LUFactorization
+    from blocked import blocked_lu
+
+    print('float64 LU factorization (seconds), blocked by thread count')
+    threads = list(range(1, (max_threads or cpu_count()) + 1))
+    print('{:>6} {:>10}'.format('n', 'unblocked') + ''.join(['{:>10}'.format(t) for t in threads]))
+    for n in sizes:
+        np_random = random.Random(n)
+        a = [[np_random.uniform(-10, 10) for j in range(n)] for i in range(n)]
+        with use_backend(FLOAT64):
+            a = LinearSystem([Plane(normal_vector=Vector(row), constant_term=0) for row in a]).to_array()[:, :-1]
+        unblocked = '{:>10}'.format('-')
+        if n <= max_unblocked:
+            # the column at a time loop LUFactorization runs below BLOCKED_MIN_SIZE
+            import lu
+            lu.BLOCKED_MIN_SIZE, previous = n + 1, lu.BLOCKED_MIN_SIZE
+            try:
+                unblocked = '{:>10.3f}'.format(time_call(lambda: LUFactorization.factorize(a, FLOAT64), repeat=1))
+            finally:
+                lu.BLOCKED_MIN_SIZE = previous
+        timings = [time_call(lambda: blocked_lu(a.copy(), threads=t), repeat=1) for t in threads]
+        print('{:>6} '.format(n) + unblocked + ''.join(['{:>10.3f}'.format(t) for t in timings]))
+
+
+def bench_point_queries(num_points=10**6, num_planes=100):
+    import numpy as np
+    from batch import PlaneBatch
+
+    rng = np.random.RandomState(4)
+    planes = PlaneBatch(np.hstack([rng.randn(num_planes, 3), rng.randn(num_planes, 1)]))
+    points = rng.randn(num_points, 3)
+    print('{} points against {} planes, float64 (seconds)'.format(num_points, num_planes))
+    for name in ('inside', 'sides', 'nearest'):
+        print('{:>10} {:>12.4f}'.format(name, time_call(lambda: getattr(planes, name)(points), repeat=1)))
+
+
+# Benchmark suite: every case runs on generated systems whose outcome is
+# known, so each timing comes with a correctness check. Timings are saved
+# as JSON ratios to a calibration workload of the same backend and size,
+# the median over SUITE_REPEAT runs taken in turns with the case, so a
+# baseline recorded on one machine still means something on another.
+
+SUITE_SIZES = {
+    DECIMAL: [3, 10, 30, 100],
+    FLOAT64: [3, 10, 30, 100, 300, 1000],
+}
+SUITE_REPEAT = 9
+REGRESSION_THRESHOLD = 0.25
+RECHECKS = 2
+MIN_TIMING_SECONDS = 0.01
+
+
+def random_vector(n, rng):
+    return Vector([rng.uniform(-10, 10) for j in range(n)])
+
+
+def case_vector_primitives(n):
+    rng = random.Random(n)
+    u, v = random_vector(n, rng), random_vector(n, rng)
+
+    def run():
+        for i in range(100):
+            u.plus(v)
+            u.minus(v)
+            u.dot_product(v)
+            u.magnitude()
+    return run, None
+
+
+def case_line_intersection_with(n):
+    rng = random.Random(n)
+    pairs = [(Line(random_vector(2, rng), rng.uniform(-10, 10)),
+              Line(random_vector(2, rng), rng.uniform(-10, 10))) for i in range(n)]
+
+    def on_line(point, line):
+        terms = [float(n)*float(x) for n,x in zip(line.normal_vector.coordinates, point.coordinates)]
+        return abs(sum(terms) - float(line.constant_term)) <= 1e-6 * max([1.] + [abs(t) for t in terms])
+
+    # (nearly) parallel pairs have no single intersection point
+    def correct(a, b):
+        point = a.intersection_with(b)
+        if a.parallel_to(b):
+            return point is False
+        return point is not False and on_line(point, a) and on_line(point, b)
+    return (lambda: [a.intersection_with(b) for a,b in pairs]), all(correct(a, b) for a,b in pairs)
+
+
+def case_plane_is_same_plane(n):
+    rng = random.Random(n)
+    p = Plane(normal_vector=random_vector(n, rng), constant_term=rng.uniform(-10, 10))
+    q = Plane(normal_vector=p.normal_vector.times_scalar(3), constant_term=p.constant_term * 3)
+
+    def run():
+        for i in range(20):
+            Plane(normal_vector=p.normal_vector, constant_term=p.constant_term).is_same_plane(q)
+    return run, p.is_same_plane(q)
+
+
+def case_compute_triangular_form(n):
+    g = generate_system(n, UNIQUE, seed=n)
+    return g.system.compute_triangular_form, None
+
+
+def case_compute_rref(n):
+    g = generate_system(n, UNIQUE, seed=n)
+    return g.system.compute_rref, None
+
+
+def solution_case(outcome):
+    def case(n):
+        g = generate_system(n, outcome, nullity=max(1, n // 10), seed=n)
+        return g.system.compute_solution, check_solution(g, g.system.compute_solution())
+    return case
+
+
+def case_compute_parametriztion(n):
+    g = generate_system(n, INFINITE, nullity=max(1, n // 10), seed=n)
+    rref = g.system.compute_rref()
+    return rref.compute_parametriztion, check_solution(g, rref.compute_parametriztion())
+
+
+# Each case returns the call to time and whether its result is correct,
+# None when there is nothing to check.
+SUITE_CASES = [
+    ('vector_primitives', case_vector_primitives),
+    ('line_intersection_with', case_line_intersection_with),
+    ('plane_is_same_plane', case_plane_is_same_plane),
+    ('compute_triangular_form', case_compute_triangular_form),
+    ('compute_rref', case_compute_rref),
+    ('compute_solution_unique', solution_case(UNIQUE)),
+    ('compute_solution_none', solution_case(NO_SOLUTIONS)),
+    ('compute_solution_infinite', solution_case(INFINITE)),
+    ('compute_parametriztion', case_compute_parametriztion),
+]
+
+
+def calibrate_decimal(n):
+    # fixed Decimal arithmetic that none of the cases depend on; the decimal
+    # cases are interpreter bound at every size
+    def run():
+        total = Decimal(0)
+        for i in range(1, 20001):
+            total += Decimal(i) / Decimal(7)
+    return run
+
+
+def calibrate_float64(n):
+    # NumPy elimination of an n x (n+1) matrix, written out here so it does
+    # not change with the code under test. Like the float64 case of the same
+    # size it is bound by per call overhead when small and by BLAS and memory
+    # bandwidth when large; small sizes are repeated to take a few milliseconds.
+    import numpy as np
+
+    a = np.random.RandomState(n).uniform(-1, 1, (n, n + 1))
+
+    def run():
+        for i in range(max(1, 1000 // n)):
+            b = a.copy()
+            for c in range(n):
+                b[c+1:, c:] -= np.outer(b[c+1:, c] / b[c, c], b[c, c:])
+    return run
+
+
+CALIBRATIONS = {DECIMAL: calibrate_decimal, FLOAT64: calibrate_float64}
+# cases that make many small calls at every n rather than whole row
+# operations, measured against the calibration for small matrices
+SMALL_CALL_CASES = ('vector_primitives', 'line_intersection_with', 'plane_is_same_plane',
+                    'compute_parametriztion')
+SMALL_CALL_CALIBRATION_SIZE = 10
+
+
+def loops_for(f, seconds=MIN_TIMING_SECONDS):
+    # how often to call f so that one timing takes at least seconds, like
+    # timeit's autorange; shorter timings are mostly noise. Returns the
+    # number of calls and the time they took.
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(loops):
+            f()
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return loops, elapsed
+        loops *= 2
+
+
+def time_against(f, calibration, repeat=SUITE_REPEAT):
+    """Median seconds per call of f, and the median ratio of f to the calibration.
+
+    The two run in turns with the garbage collector off, as timeit does,
+    and each timing of f is divided by the calibration timing just before
+    it. Both timings take about as long, so a slow spell of the machine
+    slows both sides of a ratio. The median drops the timings that were
+    unusually fast or slow.
+    """
+    f_loops, elapsed = loops_for(f)
+    loops = [loops_for(calibration, elapsed)[0], f_loops]
+    seconds, ratios = [], []
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            timings = []
+            for g, count in zip((calibration, f), loops):
+                start = time.perf_counter()
+                for j in range(count):
+                    g()
+                timings.append((time.perf_counter() - start) / count)
+            seconds.append(timings[1])
+            ratios.append(timings[1] / timings[0])
+    finally:
+        if enabled:
+            gc.enable()
+    return median(seconds), median(ratios)
+
+
+def run_case(name, backend, n):
+    with use_backend(backend):
+        run, correct = dict(SUITE_CASES)[name](n)
+        size = SMALL_CALL_CALIBRATION_SIZE if name in SMALL_CALL_CASES else n
+        seconds, ratio = time_against(run, CALIBRATIONS[backend](size))
+    return {'case': name, 'backend': backend, 'size': n, 'seconds': seconds,
+            'ratio': ratio, 'correct': correct}
+
+
+def run_suite(backends=(DECIMAL, FLOAT64), sizes=None, cases=None):
+    results = []
+    for backend in backends:
+        for name, case in SUITE_CASES:
+            if cases and name not in cases:
+                continue
+            for n in sizes or SUITE_SIZES[backend]:
+                r = run_case(name, backend, n)
+                results.append(r)
+                print('{:<28} {:<8} {:>6} {:>12.6f} {}'.format(
+                    name, backend, n, r['seconds'], '' if r['correct'] is None else
+                    ('ok' if r['correct'] else 'WRONG')))
+    return results
+
+
+# Regression checks: small cases with a known answer that earlier versions
+# got wrong. Run with --check; each check returns True when the answer is right.
+
+def float_system(a, k):
+    with use_backend(FLOAT64):
+        return LinearSystem([Plane(normal_vector=Vector(row), constant_term=b) for row, b in zip(a, k)])
+
+
+def check_large_singular_system(n=300, scale=1e6):
+    # large enough for the blocked LU, with one dependent row
+    import numpy as np
+    from linsys import Parametrization
+
+    rng = np.random.RandomState(5)
+    a = rng.uniform(-1, 1, (n, n)) * scale
+    k = rng.uniform(-1, 1, n) * scale
+    a[-1], k[-1] = a[0] + a[1], k[0] + k[1]
+    dependent = float_system(a, k).compute_solution()
+    k[-1] += 1
+    inconsistent = float_system(a, k).compute_solution()
+    return isinstance(dependent, Parametrization) and inconsistent == LinearSystem.NO_SOLUTIONS_MSG
+
+
+def check_auto_mode_tall_systems(n=20, m=60):
+    # auto mode must not pass off a least squares fit as a solution, and
+    # must not round a Decimal system to float64 to fit it
+    results = []
+    for backend in (FLOAT64, DECIMAL):
+        with use_backend(backend):
+            consistent = generate_system(n, UNIQUE, num_equations=m, seed=3)
+            inconsistent = generate_system(n, NO_SOLUTIONS, nullity=0, num_equations=m, seed=3)
+        solution = consistent.system.compute_solution('auto')
+        results += [check_solution(consistent, solution), solution.backend == backend,
+                    check_solution(inconsistent, inconsistent.system.compute_solution('auto'))]
+    return all(results)
+
+
+CHECKS = [
+    ('large_singular_system', check_large_singular_system),
+    ('auto_mode_tall_systems', check_auto_mode_tall_systems),
+]
+
+
+def run_checks(names=None):
+    failures = 0
+    for name, check in CHECKS:
+        if names and name not in names:
+            continue
+        ok = check()
+        failures += not ok
+        print('{:<36} {}'.format(name, 'ok' if ok else 'FAILED'))
+    return failures
+
+
+def save_results(path, results):
+    # ratios only, seconds depend on the machine, and no wrong results
+    saved = [dict((key, r[key]) for key in ('case', 'backend', 'size', 'ratio', 'correct'))
+             for r in results if r['correct'] is not False]
+    report = {'python': sys.version.split()[0], 'platform': platform.platform(),
+              'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': saved}
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=1, sort_keys=True, separators=(',', ': '))
+
+
+def compare_to_baseline(results, baseline_path, threshold=REGRESSION_THRESHOLD, rechecks=RECHECKS):
+    """Messages for every incorrect case, and every case whose ratio grew by more than threshold.
+
+    Correctness is checked against the known outcome, never against the
+    baseline, so a wrong result recorded in a baseline is not accepted. A
+    case that looks slower is run again up to rechecks times and only
+    reported when every run is slower, one noisy timing is not a regression.
+    """
+    with open(baseline_path) as f:
+        baseline = dict(((r['case'], r['backend'], r['size']), r)
+                        for r in json.load(f)['results'])
+
+    regressions = []
+    for r in results:
+        if r['correct'] is False:
+            regressions.append('{case} {backend} n={size}: wrong result'.format(**r))
+        old = baseline.get((r['case'], r['backend'], r['size']))
+        if old is None:
+            continue
+        limit = old['ratio'] * (1 + threshold)
+        for i in range(rechecks):
+            if r['ratio'] <= limit:
+                break
+            r = run_case(r['case'], r['backend'], r['size'])
+        if r['ratio'] > limit:
+            regressions.append('{} {} n={}: {:.3f} calibration units, baseline {:.3f}'.format(
+                r['case'], r['backend'], r['size'], r['ratio'], old['ratio']))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Linear algebra benchmarks')
+    parser.add_argument('--backend', nargs='+', choices=[DECIMAL, FLOAT64], default=[DECIMAL, FLOAT64])
+    parser.add_argument('--sizes', nargs='+', type=int)
+    parser.add_argument('--cases', nargs='+', choices=[name for name, case in SUITE_CASES])
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='flag regressions against this JSON file')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--compare', action='store_true',
+                        help='run the side by side comparisons instead of the suite')
+    parser.add_argument('--check', nargs='*', choices=[name for name, check in CHECKS],
+                        help='run the regression checks, all of them by default, instead of the suite')
+    args = parser.parse_args(argv)
+    set_precision(DEFAULT_PRECISION)
+
+    if args.check is not None:
+        return 1 if run_checks(args.check) else 0
+
+    if args.compare:
+        sizes = args.sizes or [50, 100, 200]
+        bench_backends(sizes)
+        bench_factorization(sizes)
+        bench_basepoint(sizes)
+        bench_exact(sizes)
+        bench_parallel()
+        bench_vectors()
+        bench_memoization()
+        bench_incremental(sizes)
+        bench_blocked()
+        bench_point_queries()
+        return 0
+
+    results = run_suite(args.backend, args.sizes, args.cases)
+    if args.output:
+        save_results(args.output, results)
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.threshold)
+        for message in regressions:
+            print('REGRESSION ' + message)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,166 @@
+import struct
+from decimal import Context, getcontext
+
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem, Parametrization
+from backend import BACKENDS, DECIMAL, FLOAT64, require_numpy, scalar
+
+
+# Layout, little endian:
+#   64 byte header: magic, version, kind, backend, dtype, rows, cols, decimal precision
+#   rows x cols float64 block, row-major
+#   rows float64 constant terms (systems only)
+#   rows - 1 float64 free variable indices, -1 when unknown (parametrizations,
+#   since version 2)
+#
+# A system stores its coefficient matrix and constant terms. A solution stores
+# one row, a parametrization the basepoint followed by the direction vectors
+# and the unknown each direction stands for, and "no solutions" has no rows
+# at all.
+#
+# Values are always stored as float64. Only float64 systems and solutions can
+# be written, Decimal or Fraction values would lose digits without saying so. Values
+# read back with the decimal backend are rounded to the precision recorded in
+# the header, the precision they were written at.
+
+MAGIC = b'LINSYS\x00\x00'
+VERSION = 2
+HEADER = struct.Struct('<8sHHHHQQI28x')
+DTYPES = ('<f8',)
+
+SYSTEM = 0
+SOLUTION = 1
+PARAMETRIZATION = 2
+NO_SOLUTIONS = 3
+
+NOT_A_LINSYS_FILE_MSG = 'Not a linear system file'
+WRONG_KIND_MSG = 'The file does not hold the requested kind of data'
+FLOAT64_ONLY_MSG = 'Only float64 solutions can be stored, convert the solution first'
+FLOAT64_SYSTEMS_ONLY_MSG = 'Only float64 systems can be stored, convert the system first'
+
+
+def write_header(f, kind, backend, rows, cols):
+    f.write(HEADER.pack(MAGIC, VERSION, kind, BACKENDS.index(backend), 0, rows, cols,
+                        getcontext().prec))
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        data = f.read(HEADER.size)
+    if len(data) != HEADER.size:
+        raise Exception(NOT_A_LINSYS_FILE_MSG)
+    magic, version, kind, backend, dtype, rows, cols, precision = HEADER.unpack(data)
+    if magic != MAGIC or not 1 <= version <= VERSION:
+        raise Exception(NOT_A_LINSYS_FILE_MSG)
+    return {'version': version, 'kind': kind, 'backend': BACKENDS[backend],
+            'dtype': DTYPES[dtype], 'rows': rows, 'cols': cols, 'precision': precision}
+
+
+def write_block(f, rows):
+    np = require_numpy()
+    np.ascontiguousarray(rows, dtype=DTYPES[0]).tofile(f)
+
+
+def write_system(path, system):
+    if system.backend != FLOAT64:
+        raise Exception(FLOAT64_SYSTEMS_ONLY_MSG)
+    np = require_numpy()
+    with open(path, 'wb') as f:
+        write_header(f, SYSTEM, system.backend, len(system), system.dimension)
+        write_block(f, [np.asarray(p.normal_vector.coordinates, dtype=np.float64) for p in system])
+        write_block(f, [p.constant_term for p in system])
+
+
+def to_scalar(x, backend, precision):
+    if backend == DECIMAL:
+        return Context(prec=precision).create_decimal_from_float(float(x))
+    return scalar(x, backend)
+
+
+def to_vector(row, backend, precision):
+    # float64 rows stay views into the mapping
+    if backend == FLOAT64:
+        return Vector(row, FLOAT64)
+    return Vector([to_scalar(x, backend, precision) for x in row], backend)
+
+
+def map_blocks(path):
+    # np.memmap maps the file read-only, nothing is read until it is touched
+    np = require_numpy()
+    header = read_header(path)
+    rows, cols = header['rows'], header['cols']
+    block = np.memmap(path, dtype=header['dtype'], mode='r', offset=HEADER.size,
+                      shape=(rows, cols)) if rows else np.empty((0, cols))
+    # constant terms of a system, free variables of a parametrization
+    trailing = None
+    if header['kind'] == SYSTEM:
+        trailing = rows
+    elif header['kind'] == PARAMETRIZATION and header['version'] >= 2 and rows > 1:
+        trailing = rows - 1
+    constants = None
+    if trailing is not None:
+        constants = np.memmap(path, dtype=header['dtype'], mode='r',
+                              offset=HEADER.size + rows * cols * 8, shape=(trailing,))
+    return header, block, constants
+
+
+def open_system(path, backend=None):
+    """LinearSystem backed by the mapped file.
+
+    With the float64 backend every normal vector is a view into the mapping,
+    so opening copies no coefficients.
+    """
+    header, block, constants = map_blocks(path)
+    if header['kind'] != SYSTEM:
+        raise Exception(WRONG_KIND_MSG)
+    if backend is None:
+        backend = header['backend']
+    precision = header['precision']
+    planes = [Plane(normal_vector=to_vector(block[i], backend, precision),
+                    constant_term=to_scalar(constants[i], backend, precision))
+              for i in range(header['rows'])]
+    return LinearSystem(planes)
+
+
+def write_solution(path, result):
+    free_variables = None
+    if isinstance(result, Vector):
+        kind, backend, rows = SOLUTION, result.backend, [result.coordinates]
+    elif isinstance(result, Parametrization):
+        kind, backend = PARAMETRIZATION, result.basepoint.backend
+        rows = [result.basepoint.coordinates] + [v.coordinates for v in result.direction_vectors]
+        free_variables = result.free_variables
+        if free_variables is None:
+            free_variables = [-1] * len(result.direction_vectors)
+    else:
+        kind, backend, rows = NO_SOLUTIONS, FLOAT64, []
+    if backend != FLOAT64:
+        raise Exception(FLOAT64_ONLY_MSG)
+
+    np = require_numpy()
+    with open(path, 'wb') as f:
+        cols = len(rows[0]) if rows else 0
+        write_header(f, kind, backend, len(rows), cols)
+        write_block(f, [np.asarray(r, dtype=np.float64) for r in rows])
+        if free_variables:
+            write_block(f, free_variables)
+
+
+def read_solution(path, backend=None):
+    header, block, constants = map_blocks(path)
+    if backend is None:
+        backend = header['backend']
+    precision = header['precision']
+    if header['kind'] == SOLUTION:
+        return to_vector(block[0], backend, precision)
+    if header['kind'] == PARAMETRIZATION:
+        free_variables = None
+        if constants is not None and (constants >= 0).all():
+            free_variables = [int(j) for j in constants]
+        return Parametrization(to_vector(block[0], backend, precision),
+                               [to_vector(r, backend, precision) for r in block[1:]],
+                               free_variables)
+    if header['kind'] == NO_SOLUTIONS:
+        return LinearSystem.NO_SOLUTIONS_MSG
+    raise Exception(WRONG_KIND_MSG)
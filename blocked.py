@@ -0,0 +1,93 @@
+import os
+
+from backend import require_numpy
+from elimination import EPSILON
+
+
+# Right-looking blocked LU for the float64 backend. Each step factors a
+# panel of BLOCK_SIZE columns one column at a time, then updates the rest of
+# the matrix with two matrix products. Those products run on a thread pool,
+# one tile of columns per task; numpy releases the GIL inside them, so the
+# tiles run on separate cores.
+
+BLOCK_SIZE = 128
+TILE_SIZE = 256
+BLOCKED_MIN_SIZE = 256
+
+SINGULAR_MATRIX_MSG = 'The coefficient matrix is singular'
+
+_pools = {}
+
+
+def default_threads():
+    return os.cpu_count() or 1
+
+
+def thread_pool(threads):
+    # kept for the life of the process, starting and joining a ThreadPool
+    # costs about 0.1s. Keyed by pid so forked workers build their own.
+    # multiprocessing is only imported here, every import of linsys goes
+    # through this module.
+    from multiprocessing.pool import ThreadPool
+
+    key = (os.getpid(), threads)
+    if key not in _pools:
+        _pools[key] = ThreadPool(threads)
+    return _pools[key]
+
+
+def column_tiles(start, stop, tile_size):
+    return [(j, min(j + tile_size, stop)) for j in range(start, stop, tile_size)]
+
+
+def factor_panel(a, permutation, k, end, epsilon):
+    # unblocked LU with partial pivoting on columns k:end, swapping whole rows
+    np = require_numpy()
+    for c in range(k, end):
+        p = c + int(np.argmax(np.abs(a[c:, c])))
+        if abs(a[p, c]) <= epsilon:
+            raise Exception(SINGULAR_MATRIX_MSG)
+        if p != c:
+            permutation[c], permutation[p] = permutation[p], permutation[c]
+            a[[c, p]] = a[[p, c]]
+        a[c+1:, c] /= a[c, c]
+        a[c+1:, c+1:end] -= np.outer(a[c+1:, c], a[c, c+1:end])
+
+
+def blocked_lu(a, block_size=BLOCK_SIZE, threads=None, pool=None, epsilon=None):
+    """PA = LU of a square float64 array, in place. Returns the permutation.
+
+    L (unit diagonal, below) and U (on and above the diagonal) share the
+    buffer, as in LUFactorization. threads defaults to the number of cores,
+    1 runs everything on the calling thread. A pivot at or below epsilon
+    means the matrix is singular, by default EPSILON times the largest entry
+    (or 1), the tolerance DenseElimination uses.
+    """
+    np = require_numpy()
+    n = len(a)
+    if epsilon is None:
+        epsilon = EPSILON * max(1., float(np.abs(a).max()) if a.size else 0.)
+    permutation = list(range(n))
+    if pool is None:
+        threads = threads or default_threads()
+        pool = thread_pool(threads) if threads > 1 else None
+    run = pool.map if pool is not None else map
+
+    for k in range(0, n, block_size):
+        end = min(k + block_size, n)
+        factor_panel(a, permutation, k, end, epsilon)
+        if end == n:
+            break
+
+        # U12 = L11^-1 A12, then A22 -= L21 U12, tile by tile
+        l11 = np.tril(a[k:end, k:end], -1) + np.eye(end - k)
+        l11_inverse = np.linalg.inv(l11)
+        l21 = a[end:, k:end]
+
+        def update(tile):
+            j0, j1 = tile
+            a[k:end, j0:j1] = l11_inverse.dot(a[k:end, j0:j1])
+            a[end:, j0:j1] -= l21.dot(a[k:end, j0:j1])
+
+        list(run(update, column_tiles(end, n, TILE_SIZE)))
+    return permutation
@@ -0,0 +1,184 @@
+from decimal import Decimal, getcontext
+
+from backend import FLOAT64, FRACTION, require_numpy
+from lu import LUFactorization
+
+
+# Paths compute_solution(mode='auto') can take
+FAST = 'fast'
+REFINE = 'refine'
+HIGH_PRECISION = 'high_precision'
+LEAST_SQUARES = 'lstsq'
+ELIMINATE = 'eliminate'
+EXACT = 'exact'
+
+# refinement with float64 factors converges while cond(A) * 2^-53 stays well below 1
+REFINE_CONDITION_LIMIT = 1e12
+# digits of the Decimal precision the high precision path keeps back as its zero tolerance
+GUARD_DIGITS = 5
+
+
+class SystemDiagnosis(object):
+
+    def __init__(self, num_equations, dimension, rank, tolerance, condition, path):
+        self.num_equations = num_equations
+        self.dimension = dimension
+        self.rank = rank
+        self.tolerance = tolerance
+        self.condition = condition
+        self.path = path
+
+
+    def __str__(self):
+        return 'Diagnosis: {} x {}, rank {}, condition ~{:.3g}, path {}'.format(
+            self.num_equations, self.dimension, self.rank, self.condition, self.path)
+
+
+def coefficient_matrix(system):
+    return system.to_array()[:, :-1]
+
+
+def one_norm(a):
+    np = require_numpy()
+    return float(np.abs(a).sum(axis=0).max()) if a.size else 0.
+
+
+def estimate_inverse_one_norm(lu, max_iterations=5):
+    """Hager's estimate of ||A^-1||_1 from float64 LU factors, with Higham's extra test vector.
+
+    Each iteration costs two triangular solve pairs, O(n^2), against the
+    O(n^3) of forming the inverse. The estimate is a lower bound and is
+    almost always within a factor of 3.
+    """
+    np = require_numpy()
+    n = lu.dimension
+    x = np.ones(n) / n
+    estimate = 0.
+    for iteration in range(max_iterations):
+        y = lu.solve_many([x])[0]
+        estimate = np.abs(y).sum()
+        z = lu.solve_transposed_many([np.where(y >= 0, 1., -1.)])[0]
+        j = int(np.argmax(np.abs(z)))
+        if iteration > 0 and abs(z[j]) <= z.dot(x):
+            break
+        x = np.zeros(n)
+        x[j] = 1.
+
+    # alternating vector, catches matrices that fool the iteration
+    signs = np.where(np.arange(n) % 2, -1., 1.)
+    x = signs * (1 + np.arange(n) / max(n - 1., 1.))
+    alternative = 2 * np.abs(lu.solve_many([x])[0]).sum() / (3. * n)
+    return float(max(estimate, alternative))
+
+
+def estimate_condition(system):
+    """Estimate of the 1-norm condition number, inf when a pivot vanishes or A is not square."""
+    return matrix_condition(coefficient_matrix(system))
+
+
+def matrix_condition(a):
+    if a.shape[0] != a.shape[1]:
+        return float('inf')
+    try:
+        # only an exactly zero pivot stops it, tiny ones are what is being measured
+        lu = LUFactorization.factorize(a, FLOAT64, epsilon=0)
+    except Exception as e:
+        if str(e) == LUFactorization.SINGULAR_MATRIX_MSG:
+            return float('inf')
+        raise e
+    return one_norm(a) * estimate_inverse_one_norm(lu)
+
+
+def rank_tolerance(a):
+    # max(m, n) * eps * the largest column norm
+    np = require_numpy()
+    largest = np.sqrt((a * a).sum(axis=0).max()) if a.size else 0.
+    return max(a.shape) * np.finfo(np.float64).eps * largest
+
+
+def numerical_rank(a, tolerance=None):
+    """Rank of a float64 matrix by Householder QR with column pivoting.
+
+    Stops at the first step whose remaining columns all have norm at most
+    tolerance (rank_tolerance by default), so rank deficiency costs only
+    the steps before it is found. Returns (rank, tolerance).
+    """
+    np = require_numpy()
+    a = np.array(a, dtype=np.float64)
+    m, n = a.shape
+    norms = (a * a).sum(axis=0)
+    if tolerance is None:
+        tolerance = rank_tolerance(a)
+
+    for j in range(min(m, n)):
+        p = j + int(np.argmax(norms[j:]))
+        if np.sqrt(norms[p]) <= tolerance:
+            return j, tolerance
+        if p != j:
+            a[:, [j, p]] = a[:, [p, j]]
+            norms[[j, p]] = norms[[p, j]]
+
+        # Householder reflection taking a[j:, j] onto the first axis
+        v = a[j:, j].copy()
+        v[0] += np.copysign(np.sqrt(v.dot(v)), v[0])
+        a[j:, j:] -= np.outer(v, (2 / v.dot(v)) * v.dot(a[j:, j:]))
+        # recomputed rather than downdated, downdating loses the small norms
+        norms[j+1:] = (a[j+1:, j+1:] ** 2).sum(axis=0)
+    return min(m, n), tolerance
+
+
+def is_consistent_fit(system, result):
+    """True when a least squares result solves the system up to rounding.
+
+    A tall system with full column rank either has its best fit as the one
+    solution or has no solutions, and only the residual tells them apart.
+    """
+    np = require_numpy()
+    augmented = system.to_array()
+    a, k = augmented[:, :-1], augmented[:, -1]
+    x = np.asarray(result.solution.coordinates, dtype=np.float64)
+    scale = np.linalg.norm(a) * np.linalg.norm(x) + np.linalg.norm(k)
+    return result.residual_norm <= max(a.shape) * np.finfo(np.float64).eps * scale
+
+
+def high_precision_tolerance(system):
+    # zero threshold for the Decimal elimination of an ill conditioned system,
+    # relative to its largest coefficient and set by the working precision
+    scale = max(1., float(require_numpy().abs(coefficient_matrix(system)).max()))
+    return Decimal(10) ** (GUARD_DIGITS - getcontext().prec) * Decimal(scale)
+
+
+def diagnose(system):
+    """Rank, condition estimate and the solution path compute_solution(mode='auto') would take.
+
+    Fraction systems are solved exactly, whatever their shape. Square full
+    rank systems: float64 ones take the fast path, Decimal ones are refined
+    from float64 factors while the condition estimate allows it and
+    eliminated in full Decimal precision when it does not. Tall full column
+    rank float64 systems are solved by least squares, see is_consistent_fit.
+    The rest, tall Decimal ones included, are eliminated in their own
+    backend, giving a parametrization or no solutions.
+    """
+    np = require_numpy()
+    a = coefficient_matrix(system)
+    m, n = a.shape
+    tolerance = rank_tolerance(a)
+
+    # a well conditioned square matrix has full rank, no QR needed
+    condition = matrix_condition(a) if m == n else float('inf')
+    if condition * max(m, n) * np.finfo(np.float64).eps < 1:
+        rank = n
+    else:
+        rank = numerical_rank(a, tolerance)[0]
+
+    if system.backend == FRACTION:
+        path = EXACT
+    elif m == n and condition < REFINE_CONDITION_LIMIT:
+        path = FAST if system.backend == FLOAT64 else REFINE
+    elif m == n == rank:
+        path = HIGH_PRECISION
+    elif m > n == rank and system.backend == FLOAT64:
+        path = LEAST_SQUARES
+    else:
+        path = ELIMINATE
+    return SystemDiagnosis(m, n, rank, tolerance, condition, path)
@@ -0,0 +1,211 @@
+from vector import Vector
+from plane import Plane
+from backend import FLOAT64, require_numpy, scalar
+import instrument
+
+
+EPSILON = 1e-10
+
+
+class DenseElimination(object):
+    """Gaussian elimination in place on one augmented row-major buffer [A | k].
+
+    Decimal systems keep a list of row lists, float64 systems a C-contiguous
+    array. Planes are only built again by to_planes().
+    """
+
+    def __init__(self, rows, num_variables, backend, epsilon=None):
+        self.rows = rows
+        self.num_variables = num_variables
+        self.backend = backend
+        self.pivot_columns = None
+        self.is_reduced = False
+
+        self.zero = scalar(0, backend)
+        self.one = scalar(1, backend)
+        if epsilon is None:
+            epsilon = EPSILON * max(1., self.coefficient_scale())
+        self.epsilon = scalar(epsilon, backend)
+
+
+    def coefficient_scale(self):
+        # largest coefficient; rounding residue grows with it, so the zero
+        # tolerance is EPSILON relative to this rather than absolute
+        n = self.num_variables
+        if self.backend == FLOAT64:
+            np = require_numpy()
+            return float(np.abs(self.rows[:, :n]).max()) if self.rows.size else 0.
+        return max([float(abs(x)) for row in self.rows for x in row[:n]] or [0.])
+
+
+    @staticmethod
+    def from_system(system, backend=None, epsilon=None):
+        if backend is None:
+            backend = system.backend
+        if backend == FLOAT64:
+            rows = system.to_array()
+        elif backend == system.backend:
+            rows = [list(p.normal_vector.coordinates) + [p.constant_term] for p in system]
+        else:
+            rows = [[scalar(x, backend) for x in p.normal_vector.coordinates] +
+                    [scalar(p.constant_term, backend)] for p in system]
+        return DenseElimination(rows, system.dimension, backend, epsilon)
+
+
+    def to_planes(self):
+        return [Plane(normal_vector=Vector(row[:-1], self.backend), constant_term=row[-1])
+                for row in self.rows]
+
+
+    def is_near_zero(self, x):
+        return abs(x) < self.epsilon
+
+
+    def swap_rows(self, row1, row2):
+        if row1 == row2:
+            return
+        if instrument.stats is not None:
+            instrument.stats.count('swap_rows')
+        if self.backend == FLOAT64:
+            self.rows[[row1, row2]] = self.rows[[row2, row1]]
+        else:
+            self.rows[row1], self.rows[row2] = self.rows[row2], self.rows[row1]
+
+
+    def multiply_coefficient_and_row(self, coefficient, row, first_column=0):
+        if instrument.stats is not None:
+            instrument.stats.count('multiply_coefficient_and_row')
+            if self.backend != FLOAT64:
+                instrument.stats.count('decimal_operations', len(self.rows[row]) - first_column)
+        if self.backend == FLOAT64:
+            self.rows[row, first_column:] *= coefficient
+        else:
+            r = self.rows[row]
+            r[first_column:] = [coefficient*x for x in r[first_column:]]
+
+
+    def add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to,
+                                      first_column=0):
+        if instrument.stats is not None:
+            instrument.stats.count('add_multiple_times_row_to_row')
+            if self.backend != FLOAT64:
+                instrument.stats.count('decimal_operations',
+                                       2 * (len(self.rows[row_to_add]) - first_column))
+        if self.backend == FLOAT64:
+            self.rows[row_to_be_added_to, first_column:] += \
+                coefficient * self.rows[row_to_add, first_column:]
+        else:
+            source = self.rows[row_to_add]
+            target = self.rows[row_to_be_added_to]
+            target[first_column:] = [y + coefficient*x for x,y in
+                                     zip(source[first_column:], target[first_column:])]
+
+
+    def _pivot_row(self, first_row, column):
+        # partial pivoting: the largest entry in the column at or below first_row
+        if instrument.stats is not None:
+            instrument.stats.count('pivots_searched', len(self.rows) - first_row)
+        if self.backend == FLOAT64:
+            np = require_numpy()
+            return first_row + int(np.argmax(np.abs(self.rows[first_row:, column])))
+        return max(range(first_row, len(self.rows)), key=lambda i: abs(self.rows[i][column]))
+
+
+    def _clear_column(self, column, first_row, last_row):
+        # exact arithmetic would leave zeros here, rounding may not
+        if self.backend == FLOAT64:
+            self.rows[first_row:last_row, column] = 0
+        else:
+            for i in range(first_row, last_row):
+                self.rows[i][column] = self.zero
+
+
+    def compute_triangular_form(self):
+        if self.pivot_columns is not None:
+            return self
+
+        rows = self.rows
+        num_equations = len(rows)
+        pivot_columns = []
+        r = 0
+        for c in range(self.num_variables):
+            if r == num_equations:
+                break
+
+            p = self._pivot_row(r, c)
+            if self.is_near_zero(rows[p][c]):
+                self._clear_column(c, r, num_equations)
+                continue
+            self.swap_rows(r, p)
+
+            # use row r to eliminate column c from every row below it
+            pivot = rows[r][c]
+            if self.backend == FLOAT64:
+                np = require_numpy()
+                rows[r+1:, c:] -= np.outer(rows[r+1:, c] / pivot, rows[r, c:])
+                if instrument.stats is not None:
+                    instrument.stats.count('add_multiple_times_row_to_row', num_equations - r - 1)
+            else:
+                for i in range(r+1, num_equations):
+                    if rows[i][c]:
+                        self.add_multiple_times_row_to_row(-rows[i][c]/pivot, r, i, c)
+            self._clear_column(c, r+1, num_equations)
+
+            pivot_columns.append(c)
+            r += 1
+
+        self.pivot_columns = pivot_columns
+        return self
+
+
+    def compute_rref(self):
+        if self.is_reduced:
+            return self
+        self.compute_triangular_form()
+
+        rows = self.rows
+        for r in range(len(self.pivot_columns))[::-1]:
+            c = self.pivot_columns[r]
+            self.multiply_coefficient_and_row(self.one/rows[r][c], r, c)
+            rows[r][c] = self.one
+
+            if self.backend == FLOAT64:
+                np = require_numpy()
+                rows[:r, c:] -= np.outer(rows[:r, c], rows[r, c:])
+                if instrument.stats is not None:
+                    instrument.stats.count('add_multiple_times_row_to_row', r)
+            else:
+                for i in range(r):
+                    if rows[i][c]:
+                        self.add_multiple_times_row_to_row(-rows[i][c], r, i, c)
+            self._clear_column(c, 0, r)
+
+        self.is_reduced = True
+        return self
+
+
+    @property
+    def rank(self):
+        return len(self.compute_triangular_form().pivot_columns)
+
+
+    def indices_of_first_nonzero_terms_in_each_row(self):
+        pivot_columns = self.compute_triangular_form().pivot_columns
+        return pivot_columns + [-1] * (len(self.rows) - len(pivot_columns))
+
+
+    def has_no_solution(self):
+        # every row past the pivots has an all zero coefficient part
+        n = self.num_variables
+        return any(not self.is_near_zero(self.rows[i][n])
+                   for i in range(self.rank, len(self.rows)))
+
+
+    def has_unique_solution(self):
+        return not self.has_no_solution() and self.rank == self.num_variables
+
+
+    def solution(self):
+        self.compute_rref()
+        n = self.num_variables
+        return Vector([self.rows[i][n] for i in range(n)], self.backend)
@@ -0,0 +1,96 @@
+from fractions import Fraction
+
+try:
+    from math import gcd
+except ImportError:
+    from fractions import gcd
+
+from vector import Vector
+from backend import FRACTION
+
+
+class BareissElimination(object):
+    """Exact elimination on integers with the fraction-free Bareiss update.
+
+    Every row of [A | k] is scaled to integers first. The update
+    a_ij = (p * a_ij - a_ic * a_rj) / p_prev always divides exactly, so
+    entries stay bounded by minors of the input and need no gcd per step.
+    """
+
+    def __init__(self, rows, num_variables):
+        self.rows = rows
+        self.num_variables = num_variables
+        self.pivot_columns = None
+
+
+    @staticmethod
+    def from_system(system):
+        rows = []
+        for p in system:
+            row = [Fraction(x) for x in p.normal_vector.coordinates] + [Fraction(p.constant_term)]
+            denominator = 1
+            for x in row:
+                denominator = denominator * x.denominator // gcd(denominator, x.denominator)
+            rows.append([x.numerator * (denominator // x.denominator) for x in row])
+        return BareissElimination(rows, system.dimension)
+
+
+    def compute_triangular_form(self):
+        if self.pivot_columns is not None:
+            return self
+
+        a = self.rows
+        num_equations = len(a)
+        pivot_columns = []
+        previous = 1
+        r = 0
+        for c in range(self.num_variables):
+            if r == num_equations:
+                break
+            p = next((i for i in range(r, num_equations) if a[i][c]), None)
+            if p is None:
+                continue
+            a[r], a[p] = a[p], a[r]
+
+            pivot_row = a[r]
+            pivot = pivot_row[c]
+            for i in range(r+1, num_equations):
+                row = a[i]
+                x = row[c]
+                row[c+1:] = [(pivot*y - x*z) // previous for y,z in zip(row[c+1:], pivot_row[c+1:])]
+                row[c] = 0
+            previous = pivot
+            pivot_columns.append(c)
+            r += 1
+
+        self.pivot_columns = pivot_columns
+        return self
+
+
+    @property
+    def rank(self):
+        return len(self.compute_triangular_form().pivot_columns)
+
+
+    def has_no_solution(self):
+        return any(self.rows[i][-1] for i in range(self.rank, len(self.rows)))
+
+
+    def back_substitute(self, free_values, homogeneous=False):
+        x = [Fraction(0)] * self.num_variables
+        for j,v in free_values.items():
+            x[j] = Fraction(v)
+        for r in range(self.rank)[::-1]:
+            c = self.pivot_columns[r]
+            row = self.rows[r]
+            total = 0 if homogeneous else row[-1]
+            for j in range(c+1, self.num_variables):
+                if row[j]:
+                    total -= row[j] * x[j]
+            x[c] = Fraction(total) / row[c]
+        return Vector(x, FRACTION)
+
+
+    def free_columns(self):
+        pivot_columns = set(self.compute_triangular_form().pivot_columns)
+        return [j for j in range(self.num_variables) if j not in pivot_columns]
@@ -0,0 +1,102 @@
+import random
+
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem, Parametrization
+from backend import get_backend
+
+
+UNIQUE = 'unique'
+NO_SOLUTIONS = 'none'
+INFINITE = 'infinite'
+
+UNKNOWN_OUTCOME_MSG = 'Unknown outcome, expected one of: unique, none, infinite'
+
+
+class GeneratedSystem(object):
+
+    def __init__(self, system, outcome, solution, rank):
+        self.system = system
+        self.outcome = outcome
+        self.solution = solution
+        self.rank = rank
+        self.nullity = system.dimension - rank
+
+
+def generate_system(n, outcome=UNIQUE, nullity=1, num_equations=None, seed=0, backend=None):
+    """Seeded system of n unknowns whose outcome is known in advance.
+
+    Coefficients are integers. The rank independent rows are strictly
+    diagonally dominant on their own pivot columns, so the rank is exact.
+    Dependent rows are integer combinations of them, and "none" shifts the
+    constant of one dependent row by 1. With nullity n there are no
+    independent rows and every row is 0 = 0. solution is an integer point
+    on the solution set.
+    """
+    if outcome not in (UNIQUE, NO_SOLUTIONS, INFINITE):
+        raise Exception(UNKNOWN_OUTCOME_MSG)
+    if backend is None:
+        backend = get_backend()
+    rng = random.Random(seed)
+
+    rank = n if outcome == UNIQUE else n - nullity
+    if num_equations is None:
+        num_equations = n if outcome == UNIQUE else n + 1
+    if outcome == NO_SOLUTIONS and num_equations <= rank:
+        num_equations = rank + 1
+
+    # independent rows: strictly diagonally dominant on the pivot columns,
+    # which keeps them independent and well conditioned at any size
+    columns = list(range(n))
+    rng.shuffle(columns)
+    rows = []
+    for c in columns[:rank]:
+        row = [rng.randint(-3, 3) for j in range(n)]
+        row[c] = rng.choice([-1, 1]) * (3*n + rng.randint(0, 3))
+        rows.append(row)
+
+    solution = [rng.randint(-5, 5) for j in range(n)]
+    constants = [sum([a*x for a,x in zip(row, solution)]) for row in rows]
+
+    while len(rows) < num_equations:
+        if rank == 0:
+            rows.append([0] * n)
+            constants.append(0)
+            continue
+        i, j = rng.randrange(rank), rng.randrange(rank)
+        a, b = rng.choice([-2, -1, 1, 2]), rng.choice([-1, 1])
+        rows.append([a*x + b*y for x,y in zip(rows[i], rows[j])])
+        constants.append(a*constants[i] + b*constants[j])
+    if outcome == NO_SOLUTIONS:
+        constants[-1] += 1
+
+    order = list(range(len(rows)))
+    rng.shuffle(order)
+    planes = [Plane(normal_vector=Vector(rows[i], backend), constant_term=constants[i])
+              for i in order]
+    return GeneratedSystem(LinearSystem(planes), outcome, Vector(solution, backend), rank)
+
+
+def check_solution(generated, result, tolerance=1e-6):
+    """True when result, as returned by compute_solution, has the generated outcome."""
+    system = generated.system
+
+    def satisfies(point, homogeneous=False):
+        for p in system:
+            value = sum([float(a)*float(x) for a,x in zip(p.normal_vector.coordinates, point.coordinates)])
+            target = 0. if homogeneous else float(p.constant_term)
+            if abs(value - target) > tolerance * max(1., abs(target)):
+                return False
+        return True
+
+    if generated.outcome == NO_SOLUTIONS:
+        return result == LinearSystem.NO_SOLUTIONS_MSG
+    if generated.outcome == UNIQUE:
+        return isinstance(result, Vector) and satisfies(result)
+
+    if not isinstance(result, Parametrization) or not satisfies(result.basepoint):
+        return False
+    directions = [v for v in result.direction_vectors
+                  if any(abs(float(x)) > tolerance for x in v.coordinates)]
+    return (len(directions) == generated.nullity and
+            all(satisfies(v, homogeneous=True) for v in directions))
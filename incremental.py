@@ -0,0 +1,218 @@
+from decimal import Decimal
+
+from vector import Vector
+from linsys import LinearSystem, Parametrization
+from elimination import EPSILON
+from backend import FLOAT64, FRACTION, get_backend, scalar
+import instrument
+
+
+class IncrementalLinearSystem(object):
+    """A linear system kept in reduced row echelon form while equations come and go.
+
+    Every reduced row remembers the combination of the current equations it
+    was built from, so rows[i] = sum_j combinations[i][j] * equations[j].
+    Pivot rows have a 1 in their pivot column and every other row has a 0
+    there. The remaining rows have no coefficients left, a nonzero constant
+    on one of them means there are no solutions.
+
+    With m equations in n unknowns, each append, remove or replace costs
+    O(m (m + n)) operations, where LinearSystem.compute_solution redoes a
+    full elimination.
+    """
+
+    INDEX_OUT_OF_RANGE_MSG = 'No equation at that index'
+    WRONG_DIMENSION_MSG = 'All planes in the system should live in the same dimension'
+
+    def __init__(self, dimension, backend=None):
+        if backend is None:
+            backend = get_backend()
+        self.dimension = dimension
+        self.backend = backend
+        self.equations = []
+        self.rows = []
+        self.combinations = []
+        self.pivots = []
+
+        if backend == FRACTION:
+            self.epsilon = 0
+        elif backend == FLOAT64:
+            self.epsilon = EPSILON
+        else:
+            self.epsilon = Decimal(EPSILON)
+
+
+    @staticmethod
+    def from_system(system):
+        incremental = IncrementalLinearSystem(system.dimension, system.backend)
+        for p in system:
+            incremental.append(p)
+        return incremental
+
+
+    def to_linear_system(self):
+        return LinearSystem(list(self.equations))
+
+
+    def __len__(self):
+        return len(self.equations)
+
+
+    def __getitem__(self, i):
+        return self.equations[i]
+
+
+    def is_near_zero(self, x):
+        return abs(x) <= self.epsilon
+
+
+    def append(self, plane):
+        self.insert(len(self.equations), plane)
+
+
+    def insert(self, index, plane):
+        if plane.dimension != self.dimension:
+            raise Exception(self.WRONG_DIMENSION_MSG)
+        zero = scalar(0, self.backend)
+        for combination in self.combinations:
+            combination.insert(index, zero)
+        self.equations.insert(index, plane)
+
+        row = ([scalar(x, self.backend) for x in plane.normal_vector.coordinates] +
+               [scalar(plane.constant_term, self.backend)])
+        combination = [zero] * len(self.equations)
+        combination[index] = scalar(1, self.backend)
+        self.rows.append(row)
+        self.combinations.append(combination)
+        self.pivots.append(None)
+
+        new = len(self.rows) - 1
+        for i, column in enumerate(self.pivots):
+            if column is not None and not self.is_near_zero(row[column]):
+                self._add_row(new, i, -row[column])
+        self._settle([new])
+
+
+    def remove(self, index):
+        """Retract equations[index] and return it."""
+        if not 0 <= index < len(self.equations):
+            raise Exception(self.INDEX_OUT_OF_RANGE_MSG)
+
+        # Drop the row that depends most on the equation, after eliminating the
+        # equation from every other row. A row with no coefficients is
+        # preferred, removing it leaves the pivot rows untouched.
+        def weight(i):
+            c = self.combinations[i][index]
+            return (self.pivots[i] is None and not self.is_near_zero(c), abs(c))
+        source = max(range(len(self.rows)), key=weight)
+        c = self.combinations[source][index]
+        touched = []
+        for i in range(len(self.rows)):
+            if i != source and not self.is_near_zero(self.combinations[i][index]):
+                self._add_row(i, source, -self.combinations[i][index] / c)
+                touched.append(i)
+
+        was_pivot = self.pivots[source] is not None
+        for rows in (self.rows, self.combinations, self.pivots):
+            del rows[source]
+        for combination in self.combinations:
+            del combination[index]
+        plane = self.equations.pop(index)
+
+        if was_pivot:
+            # rows that took a multiple of the dropped pivot row can only have
+            # picked up coefficients in columns that are now free
+            self._settle([i if i < source else i - 1 for i in touched])
+        return plane
+
+
+    def replace(self, index, plane):
+        """Swap equations[index] for plane and return the old equation."""
+        old = self.remove(index)
+        self.insert(index, plane)
+        return old
+
+
+    def _add_row(self, target, source, coefficient):
+        if instrument.stats is not None:
+            instrument.stats.count('add_multiple_times_row_to_row')
+        for rows in (self.rows, self.combinations):
+            t, s = rows[target], rows[source]
+            for j in range(len(t)):
+                if s[j]:
+                    t[j] += coefficient * s[j]
+
+
+    def _settle(self, candidates):
+        # turn candidate rows that still have coefficients into pivot rows,
+        # then clear rounding residue from the rows without a pivot
+        n = self.dimension
+        for i in candidates:
+            if self.pivots[i] is not None:
+                continue
+            row = self.rows[i]
+            column = max(range(n), key=lambda j: abs(row[j]))
+            if self.is_near_zero(row[column]):
+                continue
+            self._make_pivot(i, column)
+        zero = scalar(0, self.backend)
+        for i in candidates:
+            if self.pivots[i] is None:
+                row = self.rows[i]
+                for j in range(n):
+                    row[j] = zero
+
+
+    def _make_pivot(self, i, column):
+        if instrument.stats is not None:
+            instrument.stats.count('multiply_coefficient_and_row')
+        one = scalar(1, self.backend)
+        c = one / self.rows[i][column]
+        self.rows[i] = [x * c for x in self.rows[i]]
+        self.combinations[i] = [x * c for x in self.combinations[i]]
+        self.rows[i][column] = one
+        self.pivots[i] = column
+        for k in range(len(self.rows)):
+            if k != i and not self.is_near_zero(self.rows[k][column]):
+                self._add_row(k, i, -self.rows[k][column])
+                self.rows[k][column] = scalar(0, self.backend)
+
+
+    @property
+    def rank(self):
+        return len([c for c in self.pivots if c is not None])
+
+
+    def has_no_solution(self):
+        return any(c is None and not self.is_near_zero(row[-1])
+                   for c, row in zip(self.pivots, self.rows))
+
+
+    def free_columns(self):
+        pivot_columns = set(self.pivots)
+        return [j for j in range(self.dimension) if j not in pivot_columns]
+
+
+    def compute_solution(self):
+        """Current solution, in the same forms LinearSystem.compute_solution returns."""
+        if self.has_no_solution():
+            return LinearSystem.NO_SOLUTIONS_MSG
+
+        zero = scalar(0, self.backend)
+        basepoint = [zero] * self.dimension
+        for column, row in zip(self.pivots, self.rows):
+            if column is not None:
+                basepoint[column] = row[-1]
+        free_columns = self.free_columns()
+        if not free_columns:
+            return Vector(basepoint, self.backend)
+
+        direction_vectors = []
+        for f in free_columns:
+            direction = [zero] * self.dimension
+            direction[f] = scalar(1, self.backend)
+            for column, row in zip(self.pivots, self.rows):
+                if column is not None:
+                    direction[column] = -row[f]
+            direction_vectors.append(Vector(direction, self.backend))
+        return Parametrization(Vector(basepoint, self.backend), direction_vectors, free_columns)
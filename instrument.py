@@ -0,0 +1,80 @@
+import time
+from contextlib import contextmanager
+
+
+# The Stats being collected, None when instrumentation is off. Hot paths test
+# `instrument.stats is not None` inline, so the disabled mode costs one
+# attribute lookup per call.
+stats = None
+
+
+class Stats(object):
+
+    COUNTERS = ('swap_rows', 'multiply_coefficient_and_row', 'add_multiple_times_row_to_row',
+                'pivots_searched', 'vectors_allocated', 'planes_allocated', 'decimal_operations')
+    PHASES = ('triangular_form', 'back_substitution', 'classification', 'parametrization')
+
+    def __init__(self):
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.timings = dict.fromkeys(self.PHASES, 0.0)
+
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+
+    def report(self):
+        return {'counters': dict(self.counters), 'timings': dict(self.timings)}
+
+
+    def __str__(self):
+        lines = ['Stats:']
+        lines += ['  {:<32} {:>12}'.format(name, self.counters[name]) for name in self.COUNTERS]
+        lines += ['  {:<32} {:>12.6f}s'.format(name, self.timings[name]) for name in self.PHASES]
+        return '\n'.join(lines)
+
+
+@contextmanager
+def collect_stats():
+    """with collect_stats() as s: ... counts row operations, allocations and phase times."""
+    global stats
+    previous = stats
+    stats = Stats()
+    try:
+        yield stats
+    finally:
+        stats = previous
+
+
+class _Phase(object):
+
+    def __init__(self, name):
+        self.name = name
+
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+
+    def __exit__(self, *exc_info):
+        if stats is not None:
+            stats.timings[self.name] += time.perf_counter() - self.start
+
+
+class _NoPhase(object):
+
+    def __enter__(self):
+        pass
+
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name):
+    if stats is None:
+        return _NO_PHASE
+    return _Phase(name)
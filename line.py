@@ -1,27 +1,47 @@
-from decimal import Decimal, getcontext
+from __future__ import print_function
 
-from vector import Vector
+from decimal import Decimal
 
-getcontext().prec = 15
+from vector import Vector
+from backend import scalar
 
 
 class Line(object):
 
     NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
 
-    def __init__(self, normal_vector=None, constant_term=None):
+    def __init__(self, normal_vector=None, constant_term=None, backend=None):
         self.dimension = 2
 
-        if not normal_vector:
+        if normal_vector is None:
             all_zeros = ['0']*self.dimension
-            normal_vector = Vector(all_zeros)
-        self.normal_vector = normal_vector
+            normal_vector = Vector(all_zeros, backend)
+        self._normal_vector = normal_vector
+
+        if constant_term is None:
+            constant_term = '0'
+        self._constant_term = scalar(constant_term, normal_vector.backend)
+
+        # the basepoint is only computed when it is first read
+        self._basepoint = None
+        self._basepoint_is_set = False
+
 
-        if not constant_term:
-            constant_term = Decimal('0')
-        self.constant_term = Decimal(constant_term)
+    @property
+    def normal_vector(self):
+        return self._normal_vector
 
-        self.set_basepoint()
+
+    @property
+    def constant_term(self):
+        return self._constant_term
+
+
+    @property
+    def basepoint(self):
+        if not self._basepoint_is_set:
+            self.set_basepoint()
+        return self._basepoint
 
 
     def set_basepoint(self):
@@ -34,13 +54,14 @@ class Line(object):
             initial_coefficient = n[initial_index]
 
             basepoint_coords[initial_index] = c/initial_coefficient
-            self.basepoint = Vector(basepoint_coords)
+            self._basepoint = Vector(basepoint_coords, self.normal_vector.backend)
 
         except Exception as e:
             if str(e) == Line.NO_NONZERO_ELTS_FOUND_MSG:
-                self.basepoint = None
+                self._basepoint = None
             else:
                 raise e
+        self._basepoint_is_set = True
 
 
     def __str__(self):
@@ -92,7 +113,8 @@ class Line(object):
     @staticmethod
     def first_nonzero_index(iterable):
         for k, item in enumerate(iterable):
-            if not MyDecimal(item).is_near_zero():
+            # abs works for every backend, MyDecimal only takes Decimal and float
+            if abs(item) >= 1e-10:
                 return k
         raise Exception(Line.NO_NONZERO_ELTS_FOUND_MSG)
     def parallel_to (self,ell):
@@ -119,6 +141,10 @@ class Line(object):
         return Vector.check_parallel(self.normal_vector,basepoint_difference)
 
     def intersection_with(self,ell):
+        # without the parallel check a rounding residue in A*D-B*C would
+        # give a far away point instead of no intersection
+        if self.parallel_to(ell):
+            return False
         try:
             A,B = self.normal_vector.coordinates
             C,D = ell.normal_vector.coordinates
@@ -128,7 +154,7 @@ class Line(object):
             x = (D*K1-B*K2)/(A*D-B*C)
             y = (-C*K1+A*K2)/(A*D-B*C)
 
-            return Vector([x,y])
+            return Vector([x,y], self.normal_vector.backend)
         except:
             if self.is_same_line(ell):
                 return False
@@ -144,20 +170,21 @@ class MyDecimal(Decimal):
 
 
 
-equation1 = Line(Vector([4.046,2.836]), 1.21 )
-equation2 = Line(Vector([10.115,7.09]), 3.025)
-print 'is parallel_to:', equation1.parallel_to(equation2)
-print 'is same line:',equation1.is_same_line(equation2)
-print 'intersection_with', equation1.intersection_with(equation2)
+if __name__ == '__main__':
+    equation1 = Line(Vector([4.046,2.836]), 1.21 )
+    equation2 = Line(Vector([10.115,7.09]), 3.025)
+    print('is parallel_to:', equation1.parallel_to(equation2))
+    print('is same line:',equation1.is_same_line(equation2))
+    print('intersection_with', equation1.intersection_with(equation2))
 
-equation1 = Line(Vector(['7.204','3.182']), '8.68' )
-equation2 = Line(Vector(['8.172','4.114']), '9.883')
-print 'is parallel_to:', equation1.parallel_to(equation2)
-print 'is same line:',equation1.is_same_line(equation2)
-print 'intersection_with', equation1.intersection_with(equation2)
+    equation1 = Line(Vector(['7.204','3.182']), '8.68' )
+    equation2 = Line(Vector(['8.172','4.114']), '9.883')
+    print('is parallel_to:', equation1.parallel_to(equation2))
+    print('is same line:',equation1.is_same_line(equation2))
+    print('intersection_with', equation1.intersection_with(equation2))
 
-equation1 = Line(Vector([1.182,5.562]), 6.744 )
-equation2 = Line(Vector([1.773,8.343]), 9.525)
-print 'is parallel_to:', equation1.parallel_to(equation2)
-print 'is same line:',equation1.is_same_line(equation2)
-print 'intersection_with', equation1.intersection_with(equation2)
+    equation1 = Line(Vector([1.182,5.562]), 6.744 )
+    equation2 = Line(Vector([1.773,8.343]), 9.525)
+    print('is parallel_to:', equation1.parallel_to(equation2))
+    print('is same line:',equation1.is_same_line(equation2))
+    print('intersection_with', equation1.intersection_with(equation2))
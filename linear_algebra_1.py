@@ -1,7 +1,5 @@
 from math import sqrt, acos , pi
-from decimal import Decimal, getcontext
-
-getcontext().prec = 5
+from decimal import Decimal
 
 class Vector(object):
 
@@ -114,12 +112,8 @@ class Vector(object):
             if len(self.coordinates)==2 and len(v.coordinates) ==2:
                 u1 = [x for x in self.coordinates]
                 u2 = [x for x in v.coordinates]
-                print u1
-                print u2
                 u1.append(0)
                 u2.append(0)
-                print u1
-                print u2
                 return Vector(u1).cross_product(Vector(u2))
             elif len(self.coordinates) !=3 or len(v.coordinates) !=3:
                 raise Exception ('not dimension not equal or not enough value')
@@ -141,11 +135,11 @@ class Vector(object):
 """
 vector_1 = Vector([-8.987,-9.838,5.031])
 vector_2 = Vector([-4.268,-1.861,-8.866])
-print vector_1.area_of_parallelogram(vector_2)
+print(vector_1.area_of_parallelogram(vector_2))
 
 
 
 vector_1 = Vector([1.5,9.547,3.691])
 vector_2 = Vector([-6.007,0.124,5.772])
-print vector_1.area_of_parallelogram(vector_2) * Decimal(0.5)
+print(vector_1.area_of_parallelogram(vector_2) * Decimal(0.5))
 """
@@ -1,10 +1,17 @@
-from decimal import Decimal, getcontext
-from copy import deepcopy
+from decimal import Decimal
 
 from vector import Vector
 from plane import Plane
-
-getcontext().prec = 30
+from elimination import DenseElimination, EPSILON
+from lu import LUFactorization
+from blocked import BLOCKED_MIN_SIZE
+from planeindex import PlaneIndex
+from exact import BareissElimination
+from refine import refine_solution
+from lstsq import solve_least_squares
+import condition
+import instrument
+from backend import DECIMAL, FLOAT64, require_numpy, scalar
 
 
 class LinearSystem(object):
@@ -12,6 +19,12 @@ class LinearSystem(object):
     ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG = 'All planes in the system should live in the same dimension'
     NO_SOLUTIONS_MSG = 'No solutions'
     INF_SOLUTIONS_MSG = 'Infinitely many solutions'
+    UNKNOWN_MODE_MSG = 'Unknown solution mode'
+
+    EXACT_MODE = 'exact'
+    REFINE_MODE = 'refine'
+    LEAST_SQUARES_MODE = 'lstsq'
+    AUTO_MODE = 'auto'
 
     def __init__(self, planes):
         try:
@@ -21,16 +34,22 @@ class LinearSystem(object):
 
             self.planes = planes
             self.dimension = d
+            self.backend = planes[0].normal_vector.backend
+            self._factorization = None
 
         except AssertionError:
             raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
 
 
     def swap_rows(self, row1, row2):
+        if instrument.stats is not None:
+            instrument.stats.count('swap_rows')
         self[row2],self[row1] = self[row1],self[row2]
 
 
     def multiply_coefficient_and_row(self, coefficient, row):
+        if instrument.stats is not None:
+            instrument.stats.count('multiply_coefficient_and_row')
         n = self[row].normal_vector
         new_normal_vector = n.times_scalar(coefficient)
         new_constant_term = self[row].constant_term * coefficient
@@ -39,6 +58,8 @@ class LinearSystem(object):
 
 
     def add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to):
+        if instrument.stats is not None:
+            instrument.stats.count('add_multiple_times_row_to_row')
 
         vector_to_add = self[row_to_add].normal_vector.times_scalar(coefficient)
         k_to_add = self[row_to_add].constant_term * coefficient
@@ -52,27 +73,8 @@ class LinearSystem(object):
                                             constant_term = new_k)
 
     def compute_triangular_form(self):
-        system = deepcopy(self)
-        rows = len(system)
-        cols = system.dimension
-        for i,p in enumerate(system):
-            # if the first nonzero index is not i, swap
-            while i < cols:
-                if p.normal_vector.coordinates[i] == 0:
-                    for k in range(i+1, rows):
-                        if system[k].normal_vector.coordinates[i] != 0:
-                            system.swap_rows(i,k)
-                            break
-                break
-            # use the number i row to eliminate the coefficient of index before
-            # i index for each row below the number i row
-            for j in range(i+1, rows):
-                if system[i].normal_vector.coordinates[i] != 0:
-                    coefficient = -system[j].normal_vector.coordinates[i]/ \
-                                system[i].normal_vector.coordinates[i]
-                    system.add_multiple_times_row_to_row(coefficient,i,j)
-
-        return system
+        elimination = DenseElimination.from_system(self).compute_triangular_form()
+        return LinearSystem(elimination.to_planes())
 
 
     """
@@ -107,46 +109,152 @@ class LinearSystem(object):
 
 
     def compute_rref(self):
-        tf = self.compute_triangular_form()
-        rows = len(tf)
-        cols = tf.dimension
-        indices = tf.indices_of_first_nonzero_terms_in_each_row()
-
-        for i in range(rows)[::-1]:
-            if indices[i] < 0:
+        elimination = DenseElimination.from_system(self).compute_rref()
+        return LinearSystem(elimination.to_planes())
+
+
+    def compute_solution(self, mode=None):
+        if mode == self.EXACT_MODE:
+            return self.compute_exact_solution()
+        if mode == self.REFINE_MODE:
+            return self.compute_refined_solution().solution
+        if mode == self.LEAST_SQUARES_MODE:
+            result = self.compute_least_squares()
+            if result.rank < self.dimension:
+                # every point of the solution plus the null space fits equally well
+                return Parametrization(result.solution, result.null_space)
+            return result.solution
+        if mode == self.AUTO_MODE:
+            return self._solution_by_path(self.diagnose().path)
+        if mode is not None:
+            raise Exception(self.UNKNOWN_MODE_MSG)
+        if self.backend == FLOAT64 and len(self) == self.dimension >= BLOCKED_MIN_SIZE:
+            # large square float systems try the blocked LU first. Its pivots
+            # are tested against the same relative tolerance as elimination,
+            # so it does not solve a system elimination finds singular. The
+            # factors are fresh: the planes list and its float64 normals can
+            # be changed by the caller without clearing factorize()'s cache.
+            try:
+                return LUFactorization.from_system(self).solve([p.constant_term for p in self])
+            except Exception as e:
+                if str(e) != LUFactorization.SINGULAR_MATRIX_MSG:
+                    raise e
+        return self._solution_from(DenseElimination.from_system(self))
+
+
+    def _solution_from(self, elimination):
+        with instrument.phase('triangular_form'):
+            elimination.compute_triangular_form()
+        with instrument.phase('classification'):
+            no_solution = elimination.has_no_solution()
+            unique = not no_solution and elimination.rank == self.dimension
+        if no_solution:
+            return self.NO_SOLUTIONS_MSG
+
+        with instrument.phase('back_substitution'):
+            elimination.compute_rref()
+            if unique:
+                return elimination.solution()
+        with instrument.phase('parametrization'):
+            return LinearSystem(elimination.to_planes()).compute_parametriztion()
+
+
+    def compute_refined_solution(self, tolerance=None, max_iterations=10):
+        # float64 solve plus Decimal refinement, full Decimal elimination if that fails
+        result = refine_solution(self, tolerance, max_iterations)
+        if not result.converged:
+            result.solution = self._solution_from(DenseElimination.from_system(self, DECIMAL))
+        return result
+
+
+    def _solution_by_path(self, path):
+        if path == condition.FAST:
+            return self.compute_solution()
+        if path == condition.EXACT:
+            return self.compute_exact_solution()
+        if path == condition.REFINE:
+            return self.compute_refined_solution().solution
+        if path == condition.HIGH_PRECISION:
+            epsilon = condition.high_precision_tolerance(self)
+            return self._solution_from(DenseElimination.from_system(self, DECIMAL, epsilon))
+        if path == condition.LEAST_SQUARES:
+            result = self.compute_least_squares()
+            if not condition.is_consistent_fit(self, result):
+                return self.NO_SOLUTIONS_MSG
+            return result.solution
+        return self._solution_from(DenseElimination.from_system(self))
+
+
+    def diagnose(self):
+        # rank and condition estimate up front, see condition.diagnose
+        return condition.diagnose(self)
+
+
+    def estimate_condition(self):
+        return condition.estimate_condition(self)
+
+
+    def numerical_rank(self, tolerance=None):
+        return condition.numerical_rank(condition.coefficient_matrix(self), tolerance)[0]
+
+
+    def compute_least_squares(self, chunk_size=10000):
+        # best fit for overdetermined or inconsistent systems, see lstsq.py
+        return solve_least_squares(self.planes, self.dimension, chunk_size, self.backend)
+
+
+    def compute_exact_solution(self):
+        # integer / Fraction arithmetic, no rounding and no tolerances
+        elimination = BareissElimination.from_system(self).compute_triangular_form()
+        if elimination.has_no_solution():
+            return self.NO_SOLUTIONS_MSG
+        basepoint = elimination.back_substitute({})
+        free_columns = elimination.free_columns()
+        if not free_columns:
+            return basepoint
+        direction_vectors = [elimination.back_substitute({f: 1}, homogeneous=True)
+                             for f in free_columns]
+        return Parametrization(basepoint, direction_vectors, free_columns)
+
+
+    def compute_exact_rank(self):
+        return BareissElimination.from_system(self).rank
+
+    def without_redundant_equations(self, tolerance=1e-5):
+        # drops repeated equations and 0 = 0 rows, keeping the first copy. The
+        # index only finds candidates at the tolerance, a row is dropped once
+        # it matches one of them at EPSILON relative to the largest entry
+        rows = [list(p.normal_vector.coordinates) + [p.constant_term] for p in self.planes]
+        scale = max([1] + [abs(x) for row in rows for x in row])
+        epsilon = scalar(EPSILON, self.backend) * scale
+        index = PlaneIndex(tolerance=tolerance)
+        kept_rows = []
+        for p, row in zip(self.planes, rows):
+            if all([abs(x) < epsilon for x in row]):
                 continue
-            coefficient_1 = tf[i].normal_vector.coordinates[indices[i]]
-
-            if coefficient_1 !=0:
-                new_normal_vector = tf[i].normal_vector.times_scalar(Decimal(1/coefficient_1))
-                new_constant_term = tf[i].constant_term / coefficient_1
-                tf[i] = Plane(normal_vector=new_normal_vector, constant_term=new_constant_term)
-
-            for j in range(i)[::-1]:
-                coefficient_2 = -tf[j].normal_vector.coordinates[indices[i]]
-                tf.add_multiple_times_row_to_row(coefficient_2,i,j)
-        return tf
-
-
-    def compute_solution(self):
-        rref = self.compute_rref()
-        try:
-            rref.raise_no_solution_error()
-            rref.check_infinit_solution()
-        except Exception as e:
-            if str(e) == self.NO_SOLUTIONS_MSG:
-                return str(e)
-            if str(e) == self.INF_SOLUTIONS_MSG:
-                return rref.compute_parametriztion()
-
-        solutions_coordinate = [rref[i].constant_term for i in range(rref.dimension)]
-        return Vector(solutions_coordinate)
+            if any([self._is_multiple(row, kept_rows[i], epsilon) for i in index.same_as(p)]):
+                continue
+            index.add(p)
+            kept_rows.append(row)
+        return LinearSystem(index.elements or self.planes[:1])
+
+    @staticmethod
+    def _is_multiple(row, other, epsilon):
+        j = max(range(len(other)), key=lambda i: abs(other[i]))
+        c = row[j] / other[j]
+        return all([abs(x - c*y) < epsilon for x, y in zip(row, other)])
+
+    def factorize(self):
+        # cached until any row of the system is replaced
+        if self._factorization is None:
+            self._factorization = LUFactorization.from_system(self)
+        return self._factorization
 
     def raise_no_solution_error(self):
         pivot_indices = self.indices_of_first_nonzero_terms_in_each_row()
         for i,p in enumerate(pivot_indices):
-            b = MyDecimal(self[i].constant_term)
-            if p==-1 and (not b.is_near_zero()):
+            b = self[i].constant_term
+            if p==-1 and abs(b) >= 1e-10:
                 raise Exception(self.NO_SOLUTIONS_MSG)
 
     def check_infinit_solution(self):
@@ -158,58 +266,48 @@ class LinearSystem(object):
 
 
     def compute_parametriztion(self):
-
-        rows = len(self)
-        cols = self.dimension
-
-        #convert plane object to list of list
-        matrix = []
-        k_list = []
-        for i,p in enumerate(self):
-            each_row = []
-            k_list = []
-            for k in p.normal_vector.coordinates:
-                each_row.append(k)
-            each_row.append(p.constant_term)
-            matrix.append(each_row)
-
-        if rows > cols:
-            for i in range(rows - cols):
-                matrix.pop()
-
-        #add "0" row if rows < cols
-        add_row = [Decimal("0") for i in range(cols+1)]
-        if len(matrix) < cols:
-            for j,h in enumerate(matrix):
-                a = MyDecimal(h[j]-1)
-
-                if not a.is_near_zero():
-                    matrix.insert(j,add_row)
-
-        #add -1
-        for l,m in enumerate(matrix):
-            m[l] += -1
-
-        # construct basepoint vector
-        basepoint_matrix = []
-        for i in matrix:
-            basepoint_matrix.append(i[-1])
-        basepoint = Vector(basepoint_matrix)
-
-        # construct direction vectors
-        direction_vectors_matrix = []
-        for i in range(1,cols):
-            direction_vectors_matrix_row = []
-            for j in range(len(matrix)):
-                direction_vectors_matrix_row.append(-matrix[j][i])
-            row = Vector(direction_vectors_matrix_row)
-            direction_vectors_matrix.append(row)
-
-        p = Parametrization(basepoint, direction_vectors_matrix)
-
-        return p
-
-
+        """Parametrization of a system in reduced row echelon form.
+
+        Each nonzero row solves for its first nonzero column, the columns
+        no row solves for are the free variables.
+        """
+        zero = scalar(0, self.backend)
+        one = scalar(1, self.backend)
+        epsilon = scalar(EPSILON, self.backend)
+
+        pivots = []
+        for p in self:
+            coordinates = p.normal_vector.coordinates
+            for j in range(self.dimension):
+                if abs(coordinates[j]) >= epsilon:
+                    pivots.append((j, coordinates, p.constant_term / coordinates[j]))
+                    break
+        pivot_columns = set([c for c, coordinates, k in pivots])
+        free_variables = [j for j in range(self.dimension) if j not in pivot_columns]
+
+        basepoint = [zero] * self.dimension
+        for c, coordinates, k in pivots:
+            basepoint[c] = k
+        direction_vectors = []
+        for f in free_variables:
+            direction = [zero] * self.dimension
+            direction[f] = one
+            for c, coordinates, k in pivots:
+                direction[c] = -coordinates[f] / coordinates[c]
+            direction_vectors.append(Vector(direction, self.backend))
+
+        return Parametrization(Vector(basepoint, self.backend), direction_vectors, free_variables)
+
+
+
+    def to_array(self):
+        # augmented matrix [A | k] as one contiguous float64 block
+        np = require_numpy()
+        m = np.empty((len(self), self.dimension + 1), dtype=np.float64)
+        for i,p in enumerate(self.planes):
+            m[i, :-1] = p.normal_vector.coordinates
+            m[i, -1] = p.constant_term
+        return m
 
     def indices_of_first_nonzero_terms_in_each_row(self):
         num_equations = len(self)
@@ -239,6 +337,7 @@ class LinearSystem(object):
         try:
             assert x.dimension == self.dimension
             self.planes[i] = x
+            self._factorization = None
 
         except AssertionError:
             raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
@@ -258,33 +357,94 @@ class MyDecimal(Decimal):
         return abs(self) < eps
 
 class Parametrization(object):
+    """basepoint + t_1 d_1 + ... + t_k d_k for every real t.
+
+    free_variables, when known, are the unknowns that t_1 ... t_k stand for.
+    The float64 views basepoint_array and direction_matrix (k x n) are built
+    on first use and back evaluate, distance and contains.
+    """
 
     BASEPT_AND_DIR_VECTORS_MUST_BE_IN_SAME_DIM_MSG = ('The basepoint and direction vectors should all live in the same')
-    def __init__(self, basepoint, direction_vectors):
+    WRONG_PARAMETER_COUNT_MSG = 'Each parameter tuple needs one value per direction vector'
+
+    def __init__(self, basepoint, direction_vectors, free_variables=None):
 
         self.basepoint = basepoint
         self.direction_vectors = direction_vectors
+        self.free_variables = free_variables
         self.dimension = basepoint.dimension
+        self._arrays = None
+        self._basis = None
 
         try:
             for v in direction_vectors:
                 assert v.dimension == self.dimension
         except AssertionError:
-            raise Exception(BASEPT_AND_DIR_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+            raise Exception(self.BASEPT_AND_DIR_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+
+    @property
+    def basepoint_array(self):
+        return self._to_arrays()[0]
+
+    @property
+    def direction_matrix(self):
+        return self._to_arrays()[1]
+
+    def _to_arrays(self):
+        if self._arrays is None:
+            np = require_numpy()
+            basepoint = np.array([float(x) for x in self.basepoint.coordinates])
+            directions = np.array([[float(x) for x in v.coordinates] for v in self.direction_vectors])
+            self._arrays = (basepoint, directions.reshape(len(self.direction_vectors), self.dimension))
+        return self._arrays
+
+    def _orthonormal_basis(self):
+        # n x r orthonormal basis of the direction span, zero and repeated
+        # directions drop out
+        if self._basis is None:
+            np = require_numpy()
+            directions = self.direction_matrix
+            if len(directions) == 0:
+                self._basis = np.zeros((self.dimension, 0))
+            else:
+                u, s, vt = np.linalg.svd(directions.T, full_matrices=False)
+                tolerance = max(directions.shape) * np.finfo(np.float64).eps * s[0]
+                self._basis = u[:, s > tolerance]
+        return self._basis
+
+    def evaluate(self, t):
+        """Points for an array of parameter tuples, (m, k) in and (m, n) out.
+
+        A single tuple of k values gives a single point.
+        """
+        np = require_numpy()
+        t = np.asarray(t, dtype=np.float64)
+        directions = self.direction_matrix
+        if t.shape[-1:] != (len(directions),):
+            raise Exception(self.WRONG_PARAMETER_COUNT_MSG)
+        return self.basepoint_array + t.dot(directions)
+
+    def distance(self, points):
+        """Euclidean distance from each point, (m, n) or (n,), to the solution set."""
+        np = require_numpy()
+        offsets = np.asarray(points, dtype=np.float64) - self.basepoint_array
+        basis = self._orthonormal_basis()
+        residual = offsets - offsets.dot(basis).dot(basis.T)
+        return np.sqrt(np.einsum('...i,...i->...', residual, residual))
+
+    def contains(self, points, tolerance=1e-9):
+        # relative to the size of each point, so large coordinates are not penalised
+        np = require_numpy()
+        points = np.asarray(points, dtype=np.float64)
+        scale = np.maximum(1., np.sqrt(np.einsum('...i,...i->...', points, points)))
+        return self.distance(points) <= tolerance * scale
 
     def __str__(self):
         dimension = self.dimension
-        d = self.direction_vectors
-
-        # if all coordinates in a direction vetor is 0, delete this vector
-        for i,p in enumerate(d):
-            count= 0
-            for j in p.coordinates:
-                k = MyDecimal(j)
-                if k.is_near_zero():
-                    count +=1
-            if count == p.dimension:
-                del(d[i])
+
+        # direction vectors with all coordinates 0 add nothing to the output
+        d = [p for p in self.direction_vectors
+             if any(abs(j) >= 1e-10 for j in p.coordinates)]
 
         #initiate output string
         output = ''
@@ -313,8 +473,8 @@ p2 = Plane(normal_vector=Vector(['0','0','1']), constant_term='0.558')
 s = LinearSystem([p1,p2])
 t = s.compute_parametriztion()
 
-print t
-print "*****************************************************"
+print(t)
+print("*****************************************************")
 
 
 
@@ -324,8 +484,8 @@ p3 = Plane(normal_vector=Vector(['0','0','0']), constant_term='0')
 s = LinearSystem([p1,p2,p3])
 t = s.compute_parametriztion()
 
-print t
-print "*****************************************************"
+print(t)
+print("*****************************************************")
 
 
 
@@ -336,40 +496,41 @@ p4 = Plane(normal_vector=Vector(['0','0','0']), constant_term='0')
 
 s = LinearSystem([p1,p2,p3,p4])
 t = s.compute_parametriztion()
-print t
-print "*****************************************************"
+print(t)
+print("*****************************************************")
 
 """
 
 
 
 
-p1 = Plane(normal_vector=Vector(['0.786','0.786','0.588']), constant_term='-0.714')
-p2 = Plane(normal_vector=Vector(['-0.138','-0.138','0.244']), constant_term='0.319')
-s = LinearSystem([p1,p2])
-t = s.compute_solution()
+if __name__ == '__main__':
+    p1 = Plane(normal_vector=Vector(['0.786','0.786','0.588']), constant_term='-0.714')
+    p2 = Plane(normal_vector=Vector(['-0.138','-0.138','0.244']), constant_term='0.319')
+    s = LinearSystem([p1,p2])
+    t = s.compute_solution()
 
 
-print t
+    print(t)
 
 
-p1 = Plane(normal_vector=Vector(['8.631','5.112','-1.816']), constant_term='-5.113')
-p2 = Plane(normal_vector=Vector(['4.315','11.132','-5.27']), constant_term='-6.775')
-p3 = Plane(normal_vector=Vector(['-2.158','3.01','-1.727']), constant_term='-0.831')
-s = LinearSystem([p1,p2,p3])
-t = s.compute_rref()
-r = t.compute_parametriztion()
-print t
-print r
+    p1 = Plane(normal_vector=Vector(['8.631','5.112','-1.816']), constant_term='-5.113')
+    p2 = Plane(normal_vector=Vector(['4.315','11.132','-5.27']), constant_term='-6.775')
+    p3 = Plane(normal_vector=Vector(['-2.158','3.01','-1.727']), constant_term='-0.831')
+    s = LinearSystem([p1,p2,p3])
+    t = s.compute_rref()
+    r = t.compute_parametriztion()
+    print(t)
+    print(r)
 
 
-p1 = Plane(normal_vector=Vector(['0.935','1.76','-9.365']), constant_term='-9.955')
-p2 = Plane(normal_vector=Vector(['0.187','0.352','-1.873']), constant_term='-1.991')
-p3 = Plane(normal_vector=Vector(['0.374','0.704','-3.746']), constant_term='-3.982')
-p4 = Plane(normal_vector=Vector(['-0.561','-1.056','5.619']), constant_term='5.973')
+    p1 = Plane(normal_vector=Vector(['0.935','1.76','-9.365']), constant_term='-9.955')
+    p2 = Plane(normal_vector=Vector(['0.187','0.352','-1.873']), constant_term='-1.991')
+    p3 = Plane(normal_vector=Vector(['0.374','0.704','-3.746']), constant_term='-3.982')
+    p4 = Plane(normal_vector=Vector(['-0.561','-1.056','5.619']), constant_term='5.973')
 
-s = LinearSystem([p1,p2,p3,p4])
-t = s.compute_rref()
-r = t.compute_parametriztion()
-print t
-print r
+    s = LinearSystem([p1,p2,p3,p4])
+    t = s.compute_rref()
+    r = t.compute_parametriztion()
+    print(t)
+    print(r)
@@ -0,0 +1,114 @@
+from itertools import islice
+
+from vector import Vector
+from plane import Plane
+from backend import get_backend, require_numpy
+
+
+class LeastSquaresResult(object):
+
+    def __init__(self, solution, residual_norm, rank, num_equations, null_space=()):
+        self.solution = solution
+        self.residual_norm = residual_norm
+        self.rank = rank
+        self.num_equations = num_equations
+        self.null_space = list(null_space)
+
+
+    def __str__(self):
+        return 'Least squares: {} equations, rank {}, residual norm {}'.format(
+            self.num_equations, self.rank, self.residual_norm)
+
+
+class StreamingLeastSquares(object):
+    """Least squares fit of equations that arrive a chunk at a time.
+
+    Only the triangular factor R of the augmented matrix [A | k] is kept,
+    (d+1) x (d+1) floats however many equations are added. Each chunk is
+    stacked under R and factored again with a float64 QR, so the equations
+    themselves can be dropped as soon as they are added. This avoids forming
+    A^T A, which would square the condition number.
+    """
+
+    WRONG_DIMENSION_MSG = 'Every equation must have one coefficient per unknown'
+    NO_EQUATIONS_MSG = 'No equations to fit'
+
+    def __init__(self, dimension, backend=None):
+        np = require_numpy()
+        if backend is None:
+            backend = get_backend()
+        self.dimension = dimension
+        self.backend = backend
+        self.r = np.zeros((dimension + 1, dimension + 1))
+        self.num_equations = 0
+
+
+    def add_equations(self, coefficients, constant_terms):
+        np = require_numpy()
+        a = np.asarray(coefficients, dtype=np.float64)
+        if a.ndim != 2 or a.shape[1] != self.dimension:
+            raise Exception(self.WRONG_DIMENSION_MSG)
+        k = np.asarray(constant_terms, dtype=np.float64).reshape(-1, 1)
+
+        stacked = np.vstack([self.r, np.hstack([a, k])])
+        r = np.linalg.qr(stacked, mode='r')
+        self.r[:] = 0
+        self.r[:r.shape[0]] = r[:self.dimension + 1]
+        self.num_equations += len(a)
+
+
+    def add_planes(self, planes):
+        self.add_equations([p.normal_vector.coordinates for p in planes],
+                           [p.constant_term for p in planes])
+
+
+    def result(self, tolerance=None):
+        """Minimum norm solution of min ||Ax - k||, its residual norm and the rank of A.
+
+        The rank counts the singular values of R above tolerance times the
+        largest one; the default tolerance is max(rows, columns) * machine
+        epsilon. When A is rank deficient null_space holds an orthonormal
+        basis of the directions along which the fit does not change.
+        """
+        np = require_numpy()
+        d = self.dimension
+        r, qtk = self.r[:d, :d], self.r[:d, d]
+        if tolerance is None:
+            tolerance = max(self.num_equations, d) * np.finfo(np.float64).eps
+        u, singular, vt = np.linalg.svd(r)
+        rank = int(np.sum(singular > tolerance * singular[0])) if singular[0] > 0 else 0
+
+        x = vt[:rank].T.dot(u[:, :rank].T.dot(qtk) / singular[:rank])
+        # |R[d, d]| is the part of k no combination of the columns can reach
+        residual_norm = float(np.hypot(self.r[d, d], np.linalg.norm(qtk - r.dot(x))))
+        null_space = [Vector(v, self.backend) for v in vt[rank:]]
+        return LeastSquaresResult(Vector(x, self.backend), residual_norm, rank,
+                                  self.num_equations, null_space)
+
+
+def equation_chunks(equations, chunk_size):
+    # Planes or (coefficients, constant term) pairs, chunk_size at a time
+    equations = iter(equations)
+    while True:
+        chunk = list(islice(equations, chunk_size))
+        if not chunk:
+            return
+        yield ([e.normal_vector.coordinates if isinstance(e, Plane) else e[0] for e in chunk],
+               [e.constant_term if isinstance(e, Plane) else e[1] for e in chunk])
+
+
+def solve_least_squares(equations, dimension=None, chunk_size=10000, backend=None, tolerance=None):
+    """Least squares fit of an iterable of equations, which is read once, chunk by chunk.
+
+    dimension is taken from the first equation when it is not given.
+    """
+    solver = None
+    if dimension is not None:
+        solver = StreamingLeastSquares(dimension, backend)
+    for coefficients, constant_terms in equation_chunks(equations, chunk_size):
+        if solver is None:
+            solver = StreamingLeastSquares(len(coefficients[0]), backend)
+        solver.add_equations(coefficients, constant_terms)
+    if solver is None:
+        raise Exception(StreamingLeastSquares.NO_EQUATIONS_MSG)
+    return solver.result(tolerance)
@@ -0,0 +1,149 @@
+from vector import Vector
+from backend import FLOAT64, require_numpy, scalar
+from elimination import EPSILON
+from blocked import BLOCKED_MIN_SIZE, blocked_lu
+
+
+class LUFactorization(object):
+    """PA = LU with partial pivoting, L and U packed into one square buffer.
+
+    Factorizing costs O(n^3) once, every right-hand side afterwards O(n^2).
+    """
+
+    NOT_SQUARE_MSG = 'LU factorization needs as many equations as variables'
+    SINGULAR_MATRIX_MSG = 'The coefficient matrix is singular'
+    WRONG_RHS_SIZE_MSG = 'The constant terms must have one entry per equation'
+    FLOAT64_ONLY_MSG = 'Transposed solves need a float64 factorization'
+
+    def __init__(self, lu, permutation, backend):
+        self.lu = lu
+        self.permutation = permutation
+        self.backend = backend
+        self.dimension = len(permutation)
+
+
+    @staticmethod
+    def from_system(system):
+        n = system.dimension
+        if len(system) != n:
+            raise Exception(LUFactorization.NOT_SQUARE_MSG)
+
+        if system.backend == FLOAT64:
+            a = system.to_array()[:, :-1]
+        else:
+            a = [list(p.normal_vector.coordinates) for p in system]
+        return LUFactorization.factorize(a, system.backend)
+
+
+    @staticmethod
+    def factorize(a, backend, threads=None, epsilon=None):
+        # a is a square list of rows, or an array for float64, and is copied.
+        # Large float64 matrices go through the blocked, threaded path. A
+        # pivot at or below epsilon means the matrix is singular, by default
+        # EPSILON times the largest entry (or 1), as in DenseElimination.
+        n = len(a)
+        if backend == FLOAT64:
+            np = require_numpy()
+            a = np.array(a, dtype=np.float64)
+            if epsilon is None:
+                epsilon = EPSILON * max(1., float(np.abs(a).max()) if a.size else 0.)
+            if n >= BLOCKED_MIN_SIZE:
+                return LUFactorization(a, blocked_lu(a, threads=threads, epsilon=epsilon), backend)
+        else:
+            a = [list(row) for row in a]
+            if epsilon is None:
+                epsilon = EPSILON * max([1.] + [float(abs(x)) for row in a for x in row])
+            epsilon = scalar(epsilon, backend)
+        permutation = list(range(n))
+
+        for c in range(n):
+            if backend == FLOAT64:
+                p = c + int(np.argmax(np.abs(a[c:, c])))
+            else:
+                p = max(range(c, n), key=lambda i: abs(a[i][c]))
+            if abs(a[p][c]) <= epsilon:
+                raise Exception(LUFactorization.SINGULAR_MATRIX_MSG)
+
+            if p != c:
+                permutation[c], permutation[p] = permutation[p], permutation[c]
+                if backend == FLOAT64:
+                    a[[c, p]] = a[[p, c]]
+                else:
+                    a[c], a[p] = a[p], a[c]
+
+            # store the multipliers where the eliminated entries were
+            pivot = a[c][c]
+            if backend == FLOAT64:
+                a[c+1:, c] /= pivot
+                a[c+1:, c+1:] -= np.outer(a[c+1:, c], a[c, c+1:])
+            else:
+                pivot_row = a[c]
+                for i in range(c+1, n):
+                    row = a[i]
+                    multiplier = row[c] / pivot
+                    row[c] = multiplier
+                    if multiplier:
+                        row[c+1:] = [x - multiplier*y for x,y in zip(row[c+1:], pivot_row[c+1:])]
+
+        return LUFactorization(a, permutation, backend)
+
+
+    def solve(self, b):
+        if isinstance(b, Vector):
+            b = b.coordinates
+        if len(b) != self.dimension:
+            raise Exception(self.WRONG_RHS_SIZE_MSG)
+
+        if self.backend == FLOAT64:
+            return Vector(self.solve_many([b])[0], FLOAT64)
+
+        n = self.dimension
+        a = self.lu
+        y = [scalar(b[p], self.backend) for p in self.permutation]
+        for i in range(1, n):
+            y[i] -= sum([x*z for x,z in zip(a[i][:i], y[:i])])
+        for i in range(n)[::-1]:
+            y[i] = (y[i] - sum([x*z for x,z in zip(a[i][i+1:], y[i+1:])])) / a[i][i]
+        return Vector(y, self.backend)
+
+
+    def solve_many(self, B):
+        # float64: B is k x n and the result a k x n array, one row per right-hand side
+        if self.backend != FLOAT64:
+            return [self.solve(b) for b in B]
+
+        np = require_numpy()
+        B = np.asarray(B, dtype=np.float64)
+        if B.ndim != 2 or B.shape[1] != self.dimension:
+            raise Exception(self.WRONG_RHS_SIZE_MSG)
+
+        n = self.dimension
+        a = self.lu
+        y = B.T[self.permutation].copy()
+        for i in range(1, n):
+            y[i] -= a[i, :i].dot(y[:i])
+        for i in range(n)[::-1]:
+            y[i] = (y[i] - a[i, i+1:].dot(y[i+1:])) / a[i, i]
+        return y.T.copy()
+
+
+    def solve_transposed_many(self, B):
+        # rows of the result solve A^T x = b: U^T w = b, L^T v = w, x = P^T v
+        if self.backend != FLOAT64:
+            raise Exception(self.FLOAT64_ONLY_MSG)
+
+        np = require_numpy()
+        B = np.asarray(B, dtype=np.float64)
+        if B.ndim != 2 or B.shape[1] != self.dimension:
+            raise Exception(self.WRONG_RHS_SIZE_MSG)
+
+        n = self.dimension
+        a = self.lu
+        y = B.T.copy()
+        for i in range(n):
+            y[i] = (y[i] - a[:i, i].dot(y[:i])) / a[i, i]
+        for i in range(n)[::-1]:
+            y[i] -= a[i+1:, i].dot(y[i+1:])
+        x = np.empty_like(y)
+        x[self.permutation] = y
+        return x.T.copy()
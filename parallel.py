@@ -0,0 +1,117 @@
+from decimal import getcontext
+from multiprocessing import Pool, cpu_count
+
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem, Parametrization
+from backend import FLOAT64, require_numpy
+
+
+# Systems and results cross the process boundary as flat tuples: raw float64
+# bytes for the float backend, coordinate strings for decimal and fraction,
+# instead of pickled Plane / Vector / Decimal object graphs.
+
+def pack_coordinates(coordinates, backend):
+    if backend == FLOAT64:
+        np = require_numpy()
+        return np.ascontiguousarray(coordinates, dtype=np.float64).tobytes()
+    return tuple([str(x) for x in coordinates])
+
+
+def unpack_coordinates(data, backend):
+    if backend == FLOAT64:
+        np = require_numpy()
+        return np.frombuffer(data, dtype=np.float64)
+    return data
+
+
+def pack_system(system):
+    coordinates = []
+    for p in system:
+        coordinates.extend(p.normal_vector.coordinates)
+        coordinates.append(p.constant_term)
+    return (system.backend, system.dimension, pack_coordinates(coordinates, system.backend))
+
+
+def unpack_system(packed):
+    backend, dimension, data = packed
+    coordinates = unpack_coordinates(data, backend)
+    width = dimension + 1
+    planes = [Plane(normal_vector=Vector(coordinates[i:i+dimension], backend),
+                    constant_term=coordinates[i+dimension])
+              for i in range(0, len(coordinates), width)]
+    return LinearSystem(planes)
+
+
+def pack_vector(v):
+    return (v.backend, pack_coordinates(v.coordinates, v.backend))
+
+
+def unpack_vector(packed):
+    backend, data = packed
+    return Vector(unpack_coordinates(data, backend), backend)
+
+
+def pack_result(result):
+    if isinstance(result, Vector):
+        return ('vector', pack_vector(result))
+    if isinstance(result, Parametrization):
+        return ('parametrization', pack_vector(result.basepoint),
+                [pack_vector(v) for v in result.direction_vectors], result.free_variables)
+    return ('message', result)
+
+
+def unpack_result(packed):
+    if packed[0] == 'vector':
+        return unpack_vector(packed[1])
+    if packed[0] == 'parametrization':
+        return Parametrization(unpack_vector(packed[1]), [unpack_vector(v) for v in packed[2]],
+                               packed[3])
+    return packed[1]
+
+
+def solve_packed(task):
+    # runs in the worker processes, so it must stay a module level function
+    packed_systems, mode, precision = task
+    getcontext().prec = precision
+    return [pack_result(unpack_system(s).compute_solution(mode)) for s in packed_systems]
+
+
+def solve_packed_each(task):
+    # like solve_packed, but a system that raises only fails its own result
+    packed_systems, mode, precision = task
+    getcontext().prec = precision
+    results = []
+    for s in packed_systems:
+        try:
+            results.append(pack_result(unpack_system(s).compute_solution(mode)))
+        except Exception as e:
+            results.append(('error', str(e)))
+    return results
+
+
+def solve_many(systems, workers=None, chunk_size=None, mode=None, pool=None):
+    """compute_solution for every system on a process pool, results in input order.
+
+    Pass an open multiprocessing pool to reuse it across calls.
+    """
+    if workers is None:
+        workers = cpu_count()
+    packed = [pack_system(s) for s in systems]
+    if chunk_size is None:
+        chunk_size = max(1, len(packed) // (workers * 4))
+    tasks = [(packed[i:i+chunk_size], mode, getcontext().prec)
+             for i in range(0, len(packed), chunk_size)]
+
+    if pool is not None:
+        chunks = pool.map(solve_packed, tasks)
+    elif workers == 1:
+        chunks = [solve_packed(t) for t in tasks]
+    else:
+        pool = Pool(workers)
+        try:
+            chunks = pool.map(solve_packed, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    return [unpack_result(r) for chunk in chunks for r in chunk]
@@ -1,27 +1,49 @@
-from decimal import Decimal, getcontext
+from decimal import Decimal
 
 from vector import Vector
-
-getcontext().prec = 30
+from backend import scalar
+import instrument
 
 
 class Plane(object):
 
     NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
 
-    def __init__(self, normal_vector=None, constant_term=None):
+    def __init__(self, normal_vector=None, constant_term=None, backend=None):
+        if instrument.stats is not None:
+            instrument.stats.count('planes_allocated')
         self.dimension = 3
 
-        if not normal_vector:
+        if normal_vector is None:
             all_zeros = ['0']*self.dimension
-            normal_vector = Vector(all_zeros)
-        self.normal_vector = normal_vector
+            normal_vector = Vector(all_zeros, backend)
+        self._normal_vector = normal_vector
+        self.dimension = normal_vector.dimension
+
+        if constant_term is None:
+            constant_term = '0'
+        self._constant_term = scalar(constant_term, normal_vector.backend)
+
+        # the basepoint is only computed when it is first read
+        self._basepoint = None
+        self._basepoint_is_set = False
+
+
+    @property
+    def normal_vector(self):
+        return self._normal_vector
+
+
+    @property
+    def constant_term(self):
+        return self._constant_term
 
-        if not constant_term:
-            constant_term = Decimal('0')
-        self.constant_term = Decimal(constant_term)
 
-        self.set_basepoint()
+    @property
+    def basepoint(self):
+        if not self._basepoint_is_set:
+            self.set_basepoint()
+        return self._basepoint
 
 
     def set_basepoint(self):
@@ -34,13 +56,14 @@ class Plane(object):
             initial_coefficient = n[initial_index]
 
             basepoint_coords[initial_index] = c/initial_coefficient
-            self.basepoint = Vector(basepoint_coords)
+            self._basepoint = Vector(basepoint_coords, self.normal_vector.backend)
 
         except Exception as e:
             if str(e) == Plane.NO_NONZERO_ELTS_FOUND_MSG:
-                self.basepoint = None
+                self._basepoint = None
             else:
                 raise e
+        self._basepoint_is_set = True
 
 
     def __str__(self):
@@ -92,7 +115,8 @@ class Plane(object):
     @staticmethod
     def first_nonzero_index(iterable):
         for k, item in enumerate(iterable):
-            if not MyDecimal(item).is_near_zero():
+            # abs works for every backend, MyDecimal only takes Decimal and float
+            if abs(item) >= 1e-10:
                 return k
         raise Exception(Plane.NO_NONZERO_ELTS_FOUND_MSG)
 
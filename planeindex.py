@@ -0,0 +1,72 @@
+from math import sqrt
+
+
+class PlaneIndex(object):
+    """Hash index of planes or lines by direction and offset.
+
+    Each normal vector is scaled to unit length, its sign fixed so the first
+    nonzero coordinate is positive, and quantized to the tolerance. Equal
+    keys mean parallel elements; within a direction the equally normalized
+    and quantized constant term means the same plane. Values that straddle
+    a quantization boundary can land in neighbouring buckets.
+    """
+
+    def __init__(self, elements=(), tolerance=1e-5):
+        self.tolerance = tolerance
+        self.elements = []
+        self.buckets = {}
+        for e in elements:
+            self.add(e)
+
+
+    def key(self, element):
+        coordinates = [float(x) for x in element.normal_vector.coordinates]
+        magnitude = sqrt(sum([x*x for x in coordinates]))
+        if magnitude < 1e-10:
+            return None, self._quantize(float(element.constant_term))
+
+        sign = 1.
+        for x in coordinates:
+            if abs(x) / magnitude >= self.tolerance:
+                sign = 1. if x > 0 else -1.
+                break
+        scale = sign / magnitude
+        direction = tuple([self._quantize(x * scale) for x in coordinates])
+        return direction, self._quantize(float(element.constant_term) * scale)
+
+
+    def _quantize(self, x):
+        return int(round(x / self.tolerance))
+
+
+    def add(self, element):
+        direction, offset = self.key(element)
+        i = len(self.elements)
+        self.elements.append(element)
+        self.buckets.setdefault(direction, {}).setdefault(offset, []).append(i)
+        return i
+
+
+    def __len__(self):
+        return len(self.elements)
+
+
+    def parallel_to(self, element):
+        direction, offset = self.key(element)
+        offsets = self.buckets.get(direction, {})
+        return sorted([i for indices in offsets.values() for i in indices])
+
+
+    def same_as(self, element):
+        direction, offset = self.key(element)
+        return list(self.buckets.get(direction, {}).get(offset, []))
+
+
+    def parallel_groups(self):
+        return [sorted([i for indices in offsets.values() for i in indices])
+                for direction, offsets in self.buckets.items() if direction is not None]
+
+
+    def duplicate_groups(self):
+        return [list(indices) for offsets in self.buckets.values()
+                for indices in offsets.values() if len(indices) > 1]
@@ -0,0 +1,75 @@
+from decimal import Decimal, getcontext
+
+from vector import Vector
+from backend import DECIMAL, FLOAT64, require_numpy, scalar
+from lu import LUFactorization
+
+
+# digits of the working precision the default stopping test leaves for
+# rounding: 1e-25 at 30 digits
+GUARD_DIGITS = 5
+
+
+class RefinementResult(object):
+
+    def __init__(self, solution, iterations, residual_norm, converged):
+        self.solution = solution
+        self.iterations = iterations
+        self.residual_norm = residual_norm
+        self.converged = converged
+
+
+    def __str__(self):
+        return 'Refinement: {} iterations, residual norm {}, converged: {}'.format(
+            self.iterations, self.residual_norm, self.converged)
+
+
+def refine_solution(system, tolerance=None, max_iterations=10):
+    """Solve with a float64 LU factorization, then refine with Decimal residuals.
+
+    Each step computes r = k - Ax in the current Decimal precision, solves
+    A d = r with the same float64 factors and adds d to x. It stops once the
+    normwise backward error ||r|| / (||A|| ||x|| + ||k||) is below the
+    tolerance (infinity norms), 10^(GUARD_DIGITS - precision) by default.
+    iterations counts the corrections applied, at most max_iterations. The
+    result is not converged, and holds no solution, for singular or
+    non-square systems or when the residual stops shrinking before the
+    tolerance is met.
+    """
+    np = require_numpy()
+    if tolerance is None:
+        tolerance = Decimal(10) ** (GUARD_DIGITS - getcontext().prec)
+    a = [[scalar(x, DECIMAL) for x in p.normal_vector.coordinates] for p in system]
+    k = [scalar(p.constant_term, DECIMAL) for p in system]
+
+    if len(a) != system.dimension:
+        return RefinementResult(None, 0, None, False)
+    try:
+        lu = LUFactorization.factorize(np.array(a, dtype=np.float64), FLOAT64)
+    except Exception as e:
+        if str(e) == LUFactorization.SINGULAR_MATRIX_MSG:
+            return RefinementResult(None, 0, None, False)
+        raise e
+
+    a_norm = max([sum([abs(x) for x in row]) for row in a])
+    k_norm = max([abs(x) for x in k])
+
+    x = [Decimal(float(d)) for d in lu.solve_many([[float(b) for b in k]])[0]]
+    corrections = 0
+    previous_norm = None
+    while True:
+        residual = [b - sum([y*z for y,z in zip(row, x)]) for row, b in zip(a, k)]
+        residual_norm = max([abs(r) for r in residual])
+        scale = a_norm * max([abs(y) for y in x]) + k_norm
+        if residual_norm <= Decimal(tolerance) * scale:
+            return RefinementResult(Vector(x, DECIMAL), corrections, residual_norm, True)
+        if corrections == max_iterations:
+            break
+        if previous_norm is not None and residual_norm > previous_norm / 2:
+            break
+        previous_norm = residual_norm
+
+        correction = lu.solve_many([[float(r) for r in residual]])[0]
+        x = [y + Decimal(float(d)) for y,d in zip(x, correction)]
+        corrections += 1
+    return RefinementResult(None, corrections, residual_norm, False)
@@ -0,0 +1,471 @@
+"""Local solver service, newline delimited JSON over localhost TCP or a Unix socket.
+
+    python3 -m service serve --port 8765 --workers 4 --max-latency 5
+    python3 -m service serve --unix /tmp/solver.sock --backend float64
+    python3 -m service loadtest --port 8765 --requests 2000 --concurrency 64
+    python3 -m service loadtest --requests 2000
+
+Each request line is one system in the JSONL layout of stream.py,
+    {"id": 7, "equations": [[1, 1, "-1.326"], [2, -1, "0.558"]]}
+and is answered with one line in the stream.py output layout plus its "id".
+Replies to pipelined requests come back as their systems are solved, not
+necessarily in order. {"id": 8, "metrics": true} is answered with the
+service metrics.
+
+Requests are queued and gathered into micro-batches: a batch is dispatched
+to the worker processes when it holds max_batch_size systems or when its
+first system has waited max_latency seconds. The queue holds at most
+max_pending systems and at most one batch per worker is in flight; past
+that a connection's requests are not read until there is room, so a busy
+service slows its clients down instead of growing without bound.
+
+Python 3 only, it needs asyncio.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, getcontext
+from multiprocessing import cpu_count, get_context
+
+from backend import BACKENDS, DEFAULT_PRECISION, get_backend, set_backend, set_precision
+from linsys import LinearSystem
+from parallel import pack_system, solve_packed_each, unpack_result
+from stream import read_systems, format_result, format_vector, format_number
+
+
+MODES = (LinearSystem.EXACT_MODE, LinearSystem.REFINE_MODE, LinearSystem.LEAST_SQUARES_MODE,
+         LinearSystem.AUTO_MODE)
+
+DEFAULT_PORT = 8765
+MAX_BATCH_SIZE = 64
+MAX_LATENCY = 0.005
+MAX_PENDING = 1024
+# latencies kept for the percentiles
+LATENCY_WINDOW = 10000
+
+INVALID_REQUEST_MSG = 'A request holds exactly one system: {"id": ..., "equations": [...]}'
+
+
+def percentiles(values, points=(50, 95, 99)):
+    values = sorted(values)
+    if not values:
+        return dict(('p{}'.format(p), None) for p in points)
+    return dict(('p{}'.format(p), values[min(len(values) - 1, len(values) * p // 100)])
+                for p in points)
+
+
+class ServiceMetrics(object):
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.received = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+    def record(self, queued_at, ok=True):
+        self.latencies.append(time.monotonic() - queued_at)
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+
+    def report(self, queue_depth):
+        elapsed = time.monotonic() - self.started
+        finished = self.completed + self.failed
+        latency = percentiles(self.latencies)
+        latency['max'] = max(self.latencies) if self.latencies else None
+        return {'uptime': elapsed,
+                'received': self.received,
+                'completed': self.completed,
+                'failed': self.failed,
+                'queue_depth': queue_depth,
+                'batches_in_flight': self.in_flight,
+                'batches': self.batches,
+                'mean_batch_size': float(finished) / self.batches if self.batches else None,
+                'throughput': finished / elapsed if elapsed > 0 else None,
+                'latency_ms': dict((k, v * 1000 if v is not None else None)
+                                   for k, v in latency.items())}
+
+
+class SolverService(object):
+    """Solves systems off the event loop, in micro-batches on a process pool.
+
+    Call start() from the running loop before enqueue() or solve(), and
+    stop() when done. An executor can be passed in to share one pool.
+    """
+
+    NOT_STARTED_MSG = 'The service has not been started'
+
+    def __init__(self, workers=None, max_batch_size=MAX_BATCH_SIZE, max_latency=MAX_LATENCY,
+                 max_pending=MAX_PENDING, mode=None, backend=None, executor=None):
+        self.workers = workers or cpu_count()
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_pending = max_pending
+        self.mode = mode
+        self.backend = backend if backend is not None else get_backend()
+        self.executor = executor
+        self.own_executor = executor is None
+        self.metrics = ServiceMetrics()
+        self.queue = None
+        self.batcher = None
+        self.dispatches = set()
+        self.connections = set()
+
+
+    async def start(self):
+        self.queue = asyncio.Queue(self.max_pending)
+        self.slots = asyncio.Semaphore(self.workers)
+        if self.executor is None:
+            # forked lazily, plain fork children would inherit the sockets of
+            # the connections open at the time and keep them from closing
+            self.executor = ProcessPoolExecutor(self.workers, get_context('forkserver'))
+        self.batcher = asyncio.ensure_future(self._batch_loop())
+
+
+    async def stop(self):
+        if self.batcher is not None:
+            self.batcher.cancel()
+            await asyncio.gather(self.batcher, return_exceptions=True)
+            self.batcher = None
+        if self.dispatches:
+            await asyncio.gather(*self.dispatches, return_exceptions=True)
+        if self.connections:
+            # handlers finish once their clients hang up
+            await asyncio.wait(self.connections, timeout=1)
+        if self.own_executor and self.executor is not None:
+            # shutdown() blocks until the workers exit, keep it off the loop
+            await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+            self.executor = None
+
+
+    async def enqueue(self, system):
+        """Queue a system and return a future for its compute_solution result.
+
+        Waits while max_pending systems are already queued.
+        """
+        if self.queue is None:
+            raise Exception(self.NOT_STARTED_MSG)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((pack_system(system), future, time.monotonic()))
+        self.metrics.received += 1
+        return future
+
+
+    async def solve(self, system):
+        return await (await self.enqueue(system))
+
+
+    async def _batch_loop(self):
+        while True:
+            batch = [await self.queue.get()]
+            # give concurrent requests the latency budget to join, unless
+            # enough are already waiting to fill the batch
+            if self.queue.qsize() < self.max_batch_size - 1 and self.max_latency > 0:
+                await asyncio.sleep(self.max_latency)
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            # at most one batch per worker in flight, the queue fills up behind it
+            await self.slots.acquire()
+            dispatch = asyncio.ensure_future(self._dispatch(batch))
+            self.dispatches.add(dispatch)
+            dispatch.add_done_callback(self.dispatches.discard)
+
+
+    async def _dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        self.metrics.in_flight += 1
+        try:
+            task = ([packed for packed, future, queued_at in batch], self.mode, getcontext().prec)
+            try:
+                results = await loop.run_in_executor(self.executor, solve_packed_each, task)
+            except Exception as e:
+                results = [('error', str(e) or type(e).__name__)] * len(batch)
+
+            for (packed, future, queued_at), result in zip(batch, results):
+                ok = result[0] != 'error'
+                if not future.done():
+                    if ok:
+                        future.set_result(unpack_result(result))
+                    else:
+                        future.set_exception(Exception(result[1]))
+                self.metrics.record(queued_at, ok)
+            self.metrics.batches += 1
+        finally:
+            self.metrics.in_flight -= 1
+            self.slots.release()
+
+
+    def report(self):
+        return self.metrics.report(self.queue.qsize() if self.queue is not None else 0)
+
+
+    async def handle_connection(self, reader, writer):
+        # requests are read one at a time, so a full queue stops the reading
+        # and the socket buffers push back on the client
+        lock = asyncio.Lock()
+        replies = set()
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+
+        async def send(reply):
+            writer.write((json.dumps(reply) + '\n').encode('utf-8'))
+            async with lock:
+                await writer.drain()
+
+        async def answer(request_id, future):
+            try:
+                reply = format_result(request_id, await future)
+            except Exception as e:
+                reply = {'status': 'error', 'message': str(e)}
+            reply['id'] = request_id
+            await send(reply)
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                request_id = None
+                try:
+                    record = json.loads(line.decode('utf-8'), parse_float=Decimal)
+                    request_id = record.get('id')
+                    if record.get('metrics'):
+                        await send({'id': request_id, 'metrics': self.report()})
+                        continue
+                    systems = list(read_systems([line.decode('utf-8')], 'jsonl', self.backend))
+                    if len(systems) != 1:
+                        raise Exception(INVALID_REQUEST_MSG)
+                    future = await self.enqueue(systems[0][1])
+                except (ConnectionError, asyncio.CancelledError):
+                    raise
+                except Exception as e:
+                    await send({'id': request_id, 'status': 'error', 'message': str(e)})
+                    continue
+                reply = asyncio.ensure_future(answer(request_id, future))
+                replies.add(reply)
+                reply.add_done_callback(replies.discard)
+            if replies:
+                await asyncio.gather(*replies, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(connection)
+            writer.close()
+
+
+async def start_server(service, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+    """Start the service and listen on host:port, or on the Unix socket at path."""
+    await service.start()
+    if path is not None:
+        return await asyncio.start_unix_server(service.handle_connection, path)
+    return await asyncio.start_server(service.handle_connection, host, port)
+
+
+def server_address(server):
+    address = server.sockets[0].getsockname()
+    return {'path': address} if isinstance(address, str) else {'host': address[0], 'port': address[1]}
+
+
+class SolverClient(object):
+    """Pipelining client: many requests can wait on one connection at once."""
+
+    CONNECTION_CLOSED_MSG = 'The service closed the connection'
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.next_id = 0
+        self.receiver = asyncio.ensure_future(self._receive())
+
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line.decode('utf-8'))
+                future = self.pending.pop(reply.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(Exception(self.CONNECTION_CLOSED_MSG))
+            self.pending.clear()
+
+
+    async def request(self, record):
+        """Send a request record and return the reply to it, as a dict."""
+        self.next_id += 1
+        record = dict(record, id=self.next_id)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        self.writer.write((json.dumps(record) + '\n').encode('utf-8'))
+        await self.writer.drain()
+        return await future
+
+
+    async def solve(self, system):
+        equations = [format_vector(p.normal_vector) + [format_number(p.constant_term)]
+                     for p in system]
+        return await self.request({'equations': equations})
+
+
+    async def metrics(self):
+        return (await self.request({'metrics': True}))['metrics']
+
+
+    async def close(self):
+        self.writer.close()
+        await asyncio.gather(self.receiver, return_exceptions=True)
+
+
+async def load_test(num_requests=1000, concurrency=64, connections=4, size=10, backend=None,
+                    seed=0, **address):
+    """Send generated systems from local clients and measure latency and throughput.
+
+    At most concurrency requests are outstanding at once, spread over the
+    connections. Every reply is checked against the outcome the system was
+    generated with. Returns a report dict, with the service metrics.
+    """
+    from generate import generate_system, UNIQUE, NO_SOLUTIONS, INFINITE
+    outcomes = (UNIQUE, UNIQUE, NO_SOLUTIONS, INFINITE)
+    generated = [generate_system(size, outcomes[i % len(outcomes)], seed=seed + i, backend=backend)
+                 for i in range(min(num_requests, 100))]
+
+    clients = [await SolverClient.connect(**address) for c in range(connections)]
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = [0, 0]
+
+    async def one(i):
+        g = generated[i % len(generated)]
+        async with slots:
+            started = time.monotonic()
+            reply = await clients[i % len(clients)].solve(g.system)
+            latencies.append(time.monotonic() - started)
+        if reply.get('status') == 'error':
+            errors[0] += 1
+        elif reply.get('status') != g.outcome:
+            errors[1] += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*[one(i) for i in range(num_requests)])
+    elapsed = time.monotonic() - started
+    metrics = await clients[0].metrics()
+    for client in clients:
+        await client.close()
+
+    latency = percentiles(latencies)
+    latency['max'] = max(latencies) if latencies else None
+    return {'requests': num_requests,
+            'concurrency': concurrency,
+            'connections': connections,
+            'size': size,
+            'seconds': elapsed,
+            'throughput': num_requests / elapsed if elapsed > 0 else None,
+            'latency_ms': dict((k, v * 1000 if v is not None else None) for k, v in latency.items()),
+            'errors': errors[0],
+            'wrong_outcomes': errors[1],
+            'service': metrics}
+
+
+def service_from_args(args):
+    return SolverService(workers=args.workers, max_batch_size=args.max_batch_size,
+                         max_latency=args.max_latency / 1000., max_pending=args.max_pending,
+                         mode=args.mode)
+
+
+async def serve(args):
+    service = service_from_args(args)
+    server = await start_server(service, args.host, args.port or DEFAULT_PORT, args.unix)
+    print('Serving on {}'.format(server_address(server)), file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+async def run_load_test(args):
+    options = {'num_requests': args.requests, 'concurrency': args.concurrency,
+               'connections': args.connections, 'size': args.size}
+    if args.port is not None or args.unix is not None:
+        return await load_test(host=args.host, port=args.port, path=args.unix, **options)
+
+    # no address given: run the service in this process on a free port
+    service = service_from_args(args)
+    server = await start_server(service, args.host, 0)
+    try:
+        return await load_test(**dict(options, **server_address(server)))
+    finally:
+        server.close()
+        await server.wait_closed()
+        await service.stop()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python3 -m service',
+                                     description='Serve the solver locally, or load test it')
+    parser.add_argument('command', choices=['serve', 'loadtest'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None,
+                        help='TCP port, {} by default'.format(DEFAULT_PORT))
+    parser.add_argument('--unix', default=None, help='Unix socket path, instead of TCP')
+    parser.add_argument('--backend', choices=BACKENDS, default=None)
+    parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION,
+                        help='significant digits for the decimal backend')
+    parser.add_argument('--mode', choices=MODES, default=None)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes')
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--max-latency', type=float, default=MAX_LATENCY * 1000,
+                        help='milliseconds a request may wait for its batch to fill')
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING,
+                        help='queued systems before requests stop being read')
+    group = parser.add_argument_group('loadtest')
+    group.add_argument('--requests', type=int, default=1000)
+    group.add_argument('--concurrency', type=int, default=64, help='requests outstanding at once')
+    group.add_argument('--connections', type=int, default=4)
+    group.add_argument('--size', type=int, default=10, help='unknowns per generated system')
+    args = parser.parse_args(argv)
+
+    set_precision(args.precision)
+    if args.backend is not None:
+        set_backend(args.backend)
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    print(json.dumps(asyncio.run(run_load_test(args)), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,81 @@
+"""Solve linear systems from files.
+
+    python -m solver systems.jsonl -o solutions.jsonl --backend float64 --jobs 4
+    python -m solver equations.csv --precision 50
+    python -m solver system.bin -o solution.bin
+
+CSV and JSONL inputs use the record layouts described in stream.py and write
+one JSONL result per system, to stdout unless --output is given. A .bin input
+is a single system in the binfile.py format and its solution is written in
+the same format.
+"""
+from __future__ import print_function
+
+import argparse
+import sys
+
+from backend import BACKENDS, DEFAULT_PRECISION, FLOAT64, set_backend, set_precision
+from vector import Vector
+from linsys import LinearSystem, Parametrization
+
+
+MODES = (LinearSystem.EXACT_MODE, LinearSystem.REFINE_MODE, LinearSystem.LEAST_SQUARES_MODE,
+         LinearSystem.AUTO_MODE)
+BINARY_OUTPUT_REQUIRED_MSG = 'A binary system needs an --output path for its solution'
+
+
+def _as_float64(result):
+    if isinstance(result, Vector):
+        return Vector(result.coordinates, FLOAT64)
+    if isinstance(result, Parametrization):
+        return Parametrization(_as_float64(result.basepoint),
+                               [_as_float64(v) for v in result.direction_vectors],
+                               result.free_variables)
+    return result
+
+
+def solve_binary(input_path, output_path, backend=None, mode=None):
+    # binary solutions are float64 whatever backend solved the system
+    import binfile
+    system = binfile.open_system(input_path, backend)
+    binfile.write_solution(output_path, _as_float64(system.compute_solution(mode)))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m solver', description='Solve linear systems from files')
+    parser.add_argument('input', help='a .csv, .jsonl or .bin file')
+    parser.add_argument('-o', '--output', help='where to write the results, stdout by default')
+    parser.add_argument('--format', choices=['csv', 'jsonl'],
+                        help='input format, guessed from the file extension by default')
+    parser.add_argument('--backend', choices=BACKENDS, default=None)
+    parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION,
+                        help='significant digits for the decimal backend')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='worker processes')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='systems held in memory at a time')
+    parser.add_argument('--mode', choices=MODES, default=None)
+    args = parser.parse_args(argv)
+
+    set_precision(args.precision)
+    if args.backend is not None:
+        set_backend(args.backend)
+
+    if args.input.endswith('.bin'):
+        if args.output is None:
+            parser.error(BINARY_OUTPUT_REQUIRED_MSG)
+        solve_binary(args.input, args.output, args.backend, args.mode)
+        return 0
+
+    from stream import solve_file, solve_stream
+    options = {'batch_size': args.batch_size, 'workers': args.jobs, 'mode': args.mode}
+    if args.output is not None:
+        solve_file(args.input, args.output, args.format, **options)
+        return 0
+    file_format = args.format or ('csv' if args.input.endswith('.csv') else 'jsonl')
+    with open(args.input) as input_file:
+        solve_stream(input_file, sys.stdout, file_format, **options)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
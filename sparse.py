@@ -0,0 +1,188 @@
+import heapq
+
+from vector import Vector
+from backend import get_backend, scalar
+from elimination import EPSILON
+from linsys import LinearSystem, Parametrization
+
+
+class SparseLinearSystem(object):
+    """Linear system with coefficients kept in CSR form (indptr, indices, data).
+
+    compute_solution eliminates with Markowitz style pivoting: the pivot column
+    is the active column with the fewest nonzeros, the pivot row the shortest
+    row whose entry passes a threshold test, which keeps fill-in low. Time and
+    memory follow the number of nonzeros instead of n^2.
+    """
+
+    ALL_INDICES_MUST_BE_IN_RANGE_MSG = 'Every column index must be smaller than the dimension'
+    PIVOT_THRESHOLD = 0.1
+
+    def __init__(self, dimension, backend=None):
+        if backend is None:
+            backend = get_backend()
+        self.dimension = dimension
+        self.backend = backend
+        self.indptr = [0]
+        self.indices = []
+        self.data = []
+        self.constant_terms = []
+
+
+    @staticmethod
+    def from_linear_system(system):
+        s = SparseLinearSystem(system.dimension, system.backend)
+        for p in system:
+            s.add_equation([(j, x) for j,x in enumerate(p.normal_vector.coordinates) if x != 0],
+                           p.constant_term)
+        return s
+
+
+    @staticmethod
+    def from_coo(rows, cols, values, constant_terms, dimension, backend=None):
+        s = SparseLinearSystem(dimension, backend)
+        equations = [[] for k in constant_terms]
+        for i,j,x in zip(rows, cols, values):
+            equations[i].append((j, x))
+        for terms, k in zip(equations, constant_terms):
+            s.add_equation(terms, k)
+        return s
+
+
+    def add_equation(self, terms, constant_term):
+        # terms is a {column: coefficient} dict or a sequence of (column, coefficient)
+        if isinstance(terms, dict):
+            terms = terms.items()
+        row = {}
+        for j,x in terms:
+            if not 0 <= j < self.dimension:
+                raise Exception(self.ALL_INDICES_MUST_BE_IN_RANGE_MSG)
+            row[j] = row.get(j, 0) + scalar(x, self.backend)
+        for j in sorted(row):
+            if row[j] != 0:
+                self.indices.append(j)
+                self.data.append(row[j])
+        self.indptr.append(len(self.indices))
+        self.constant_terms.append(scalar(constant_term, self.backend))
+
+
+    def __len__(self):
+        return len(self.constant_terms)
+
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+
+    def row(self, i):
+        start, end = self.indptr[i], self.indptr[i+1]
+        return dict(zip(self.indices[start:end], self.data[start:end]))
+
+
+    def to_linear_system(self):
+        from plane import Plane
+        zero = scalar(0, self.backend)
+        planes = []
+        for i in range(len(self)):
+            coordinates = [zero] * self.dimension
+            for j,x in self.row(i).items():
+                coordinates[j] = x
+            planes.append(Plane(normal_vector=Vector(coordinates, self.backend),
+                                constant_term=self.constant_terms[i]))
+        return LinearSystem(planes)
+
+
+    def compute_solution(self):
+        # relative to the largest coefficient, as in DenseElimination, so both
+        # classify a scaled system the same way
+        scale = max([1.] + [float(abs(x)) for x in self.data])
+        epsilon = scalar(EPSILON * scale, self.backend)
+        rows = [self.row(i) for i in range(len(self))]
+        constants = list(self.constant_terms)
+
+        column_rows = {}
+        for i,r in enumerate(rows):
+            for j in r:
+                column_rows.setdefault(j, set()).add(i)
+        heap = [(len(v), j) for j,v in column_rows.items()]
+        heapq.heapify(heap)
+
+        pivots = []
+        pivot_columns = set()
+        while heap:
+            count, c = heapq.heappop(heap)
+            candidates = column_rows.get(c)
+            if c in pivot_columns or not candidates:
+                continue
+            if count != len(candidates):
+                # stale entry, the column changed since it was pushed
+                heapq.heappush(heap, (len(candidates), c))
+                continue
+
+            largest = max(abs(rows[i][c]) for i in candidates)
+            if largest < epsilon:
+                for i in candidates:
+                    del rows[i][c]
+                del column_rows[c]
+                continue
+            threshold = largest * scalar(self.PIVOT_THRESHOLD, self.backend)
+            p = min((i for i in candidates if abs(rows[i][c]) >= threshold),
+                    key=lambda i: len(rows[i]))
+
+            pivot_row = rows[p]
+            pivot = pivot_row[c]
+            for j in pivot_row:
+                column_rows[j].discard(p)
+            for i in list(candidates):
+                row = rows[i]
+                factor = row[c] / pivot
+                for j,x in pivot_row.items():
+                    value = row.get(j, 0) - factor * x
+                    if j == c or abs(value) < epsilon:
+                        if j in row:
+                            del row[j]
+                            column_rows[j].discard(i)
+                    else:
+                        if j not in row:
+                            column_rows[j].add(i)
+                        row[j] = value
+                constants[i] -= factor * constants[p]
+            for j in pivot_row:
+                if j != c and column_rows[j]:
+                    heapq.heappush(heap, (len(column_rows[j]), j))
+
+            del column_rows[c]
+            pivots.append((p, c))
+            pivot_columns.add(c)
+
+        pivot_rows = set(p for p,c in pivots)
+        for i,r in enumerate(rows):
+            if i not in pivot_rows and not r and abs(constants[i]) >= epsilon:
+                return LinearSystem.NO_SOLUTIONS_MSG
+
+        free_columns = [j for j in range(self.dimension) if j not in pivot_columns]
+        basepoint = self._back_substitute(rows, constants, pivots, {})
+        if not free_columns:
+            return basepoint
+
+        zero = scalar(0, self.backend)
+        one = scalar(1, self.backend)
+        zeros = [zero] * len(constants)
+        direction_vectors = [self._back_substitute(rows, zeros, pivots, {f: one}) for f in free_columns]
+        return Parametrization(basepoint, direction_vectors, free_columns)
+
+
+    def _back_substitute(self, rows, constants, pivots, free_values):
+        zero = scalar(0, self.backend)
+        x = [zero] * self.dimension
+        for j,v in free_values.items():
+            x[j] = v
+        for p,c in pivots[::-1]:
+            row = rows[p]
+            total = constants[p]
+            for j,a in row.items():
+                if j != c:
+                    total -= a * x[j]
+            x[c] = total / row[c]
+        return Vector(x, self.backend)
@@ -0,0 +1,132 @@
+import csv
+import json
+from decimal import Decimal
+from multiprocessing import Pool
+
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem, Parametrization
+from backend import FLOAT64, get_backend
+from parallel import solve_many
+
+
+# Input records:
+#   JSONL, one system per line:   {"id": ..., "equations": [[a_1, ..., a_n, k], ...]}
+#   JSONL, one equation per line: {"system": ..., "normal_vector": [...], "constant_term": k}
+#   CSV, one equation per row:    system, a_1, ..., a_n, k
+# Consecutive equations with the same system id form one system.
+#
+# Output is JSONL with one record per system, in input order.
+
+UNKNOWN_FORMAT_MSG = 'Unknown file format, expected csv or jsonl'
+
+
+def read_equations(f, file_format):
+    if file_format == 'csv':
+        for row in csv.reader(f):
+            if row:
+                yield row[0], row[1:-1], row[-1]
+        return
+
+    for line in f:
+        if not line.strip():
+            continue
+        record = json.loads(line, parse_float=Decimal)
+        if 'equations' in record:
+            for equation in record['equations']:
+                yield record.get('id'), equation[:-1], equation[-1]
+            # a trailing marker so back-to-back systems are never merged
+            yield None, None, None
+        else:
+            yield record['system'], record['normal_vector'], record['constant_term']
+
+
+def read_systems(f, file_format='jsonl', backend=None):
+    """Yield (system id, LinearSystem) one at a time from an open file."""
+    if file_format not in ('csv', 'jsonl'):
+        raise Exception(UNKNOWN_FORMAT_MSG)
+    if backend is None:
+        backend = get_backend()
+
+    current_id = None
+    planes = []
+    for system_id, coordinates, constant_term in read_equations(f, file_format):
+        if planes and (coordinates is None or system_id != current_id):
+            yield current_id, LinearSystem(planes)
+            planes = []
+        if coordinates is None:
+            continue
+        current_id = system_id
+        planes.append(Plane(normal_vector=Vector(coordinates, backend), constant_term=constant_term))
+    if planes:
+        yield current_id, LinearSystem(planes)
+
+
+def batches(iterable, batch_size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def format_number(x):
+    # floats stay JSON numbers, Decimal and Fraction keep their exact text
+    if isinstance(x, float):
+        return x
+    return str(x)
+
+
+def format_vector(v):
+    if v.backend == FLOAT64:
+        return v.coordinates.tolist()
+    return [format_number(x) for x in v.coordinates]
+
+
+def format_result(system_id, result):
+    if isinstance(result, Vector):
+        return {'system': system_id, 'status': 'unique', 'solution': format_vector(result)}
+    if isinstance(result, Parametrization):
+        return {'system': system_id, 'status': 'infinite',
+                'basepoint': format_vector(result.basepoint),
+                'direction_vectors': [format_vector(v) for v in result.direction_vectors],
+                'free_variables': result.free_variables}
+    return {'system': system_id, 'status': 'none', 'message': result}
+
+
+def solve_stream(input_file, output_file, file_format='jsonl', batch_size=100, workers=1,
+                 mode=None, backend=None):
+    """Solve every system in input_file and write one JSON line per system.
+
+    At most batch_size systems are held in memory at a time. With workers > 1
+    each batch is solved on one process pool shared by the whole run.
+    """
+    pool = Pool(workers) if workers > 1 else None
+    count = 0
+    try:
+        for batch in batches(read_systems(input_file, file_format, backend), batch_size):
+            ids = [system_id for system_id, s in batch]
+            systems = [s for system_id, s in batch]
+            if pool is None:
+                results = [s.compute_solution(mode) for s in systems]
+            else:
+                results = solve_many(systems, workers=workers, mode=mode, pool=pool)
+            for system_id, result in zip(ids, results):
+                output_file.write(json.dumps(format_result(system_id, result)) + '\n')
+            count += len(batch)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return count
+
+
+def solve_file(input_path, output_path, file_format=None, **options):
+    if file_format is None:
+        file_format = 'csv' if input_path.endswith('.csv') else 'jsonl'
+    with open(input_path) as input_file:
+        with open(output_path, 'w') as output_file:
+            return solve_stream(input_file, output_file, file_format, **options)
@@ -0,0 +1,61 @@
+"""Random small integer systems for cross-checking against mode='exact'."""
+import random
+
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem, Parametrization
+from backend import use_backend
+
+
+UNIQUE = 'unique'
+NO_SOLUTIONS = 'none'
+INFINITE = 'infinite'
+
+
+def random_rows(rng, max_equations=5, max_unknowns=4):
+    # one row in two systems is a combination of the first two, made
+    # inconsistent half of the time, so every outcome turns up
+    n = rng.randint(1, max_unknowns)
+    m = rng.randint(1, max_equations)
+    rows = [[rng.randint(-3, 3) for j in range(n + 1)] for i in range(m)]
+    if m > 1 and rng.random() < 0.5:
+        a, b = rng.randint(-2, 2), rng.randint(-2, 2)
+        rows[-1] = [a*x + b*y for x, y in zip(rows[0], rows[1])]
+        if rng.random() < 0.5:
+            rows[-1][-1] += 1
+    return rows
+
+
+def system(rows, backend):
+    with use_backend(backend):
+        return LinearSystem([Plane(normal_vector=Vector(row[:-1]), constant_term=row[-1])
+                             for row in rows])
+
+
+def random_systems(count, backend, seed=0, **sizes):
+    rng = random.Random(seed)
+    return [system(random_rows(rng, **sizes), backend) for i in range(count)]
+
+
+def outcome(result):
+    if isinstance(result, Vector):
+        return UNIQUE
+    if isinstance(result, Parametrization):
+        return INFINITE
+    assert result == LinearSystem.NO_SOLUTIONS_MSG
+    return NO_SOLUTIONS
+
+
+def close(v, w, tolerance=1e-9):
+    return all(abs(float(x) - float(y)) <= tolerance * max(1., abs(float(y)))
+               for x, y in zip(v.coordinates, w.coordinates))
+
+
+def same_solution_set(p, q, tolerance=1e-9):
+    # Parametrizations of the same affine set: as many directions, and every
+    # point q reaches from its basepoint along one direction lies on p
+    import numpy as np
+    k = len(q.direction_vectors)
+    return (len(p.direction_vectors) == k and
+            bool(p.contains(q.basepoint_array, tolerance)) and
+            bool(p.contains(q.evaluate(np.eye(k)), tolerance).all()))
@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+import pytest
+
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem
+from backend import DECIMAL, FLOAT64, get_backend, set_backend, use_backend
+
+np = pytest.importorskip('numpy')
+
+
+def system(rows, backend):
+    with use_backend(backend):
+        return LinearSystem([Plane(normal_vector=Vector(row[:-1]), constant_term=row[-1])
+                             for row in rows])
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(Exception):
+        set_backend('float32')
+    assert get_backend() == DECIMAL
+
+
+def test_use_backend_restores_the_previous_backend():
+    with use_backend(FLOAT64):
+        assert get_backend() == FLOAT64
+        v = Vector([1, 2, 3])
+    assert get_backend() == DECIMAL
+    assert v.backend == FLOAT64
+    assert v.coordinates.dtype == np.float64
+    assert Vector([1, 2, 3]).backend == DECIMAL
+
+
+def test_float64_vector_operations_match_decimal():
+    u, v = [8.462, 7.893, -8.187], [6.984, -5.975, 4.778]
+    fast, reference = Vector(u, FLOAT64), Vector(u, DECIMAL)
+    other_fast, other_reference = Vector(v, FLOAT64), Vector(v, DECIMAL)
+    assert fast.dot_product(other_fast) == pytest.approx(float(reference.dot_product(other_reference)))
+    assert fast.magnitude() == pytest.approx(float(reference.magnitude()))
+    assert np.allclose(fast.plus(other_fast).coordinates,
+                       [float(x) for x in reference.plus(other_reference).coordinates])
+    assert fast.angle_with(other_fast) == pytest.approx(reference.angle_with(other_reference))
+
+
+def test_planes_and_systems_follow_the_vector_backend():
+    s = system([[1, 2, 3, 4], [2, 0, 1, 5]], FLOAT64)
+    assert s.backend == FLOAT64
+    assert all(isinstance(p.constant_term, float) for p in s)
+    assert system([[1, 2, 3, 4]], DECIMAL)[0].constant_term == Decimal(4)
+
+
+@pytest.mark.parametrize('backend', [DECIMAL, FLOAT64])
+def test_unique_solution_in_both_backends(backend):
+    # x = (1, -2, 3)
+    rows = [[2, 1, -1, -3], [1, -3, 2, 13], [3, 2, 1, 2]]
+    solution = system(rows, backend).compute_solution()
+    assert isinstance(solution, Vector)
+    assert solution.backend == backend
+    assert np.allclose([float(x) for x in solution.coordinates], [1, -2, 3])
+
+
+@pytest.mark.parametrize('backend', [DECIMAL, FLOAT64])
+def test_inconsistent_system_in_both_backends(backend):
+    rows = [[1, 1, 1, 1], [2, 2, 2, 3], [1, -1, 0, 0]]
+    assert system(rows, backend).compute_solution() == LinearSystem.NO_SOLUTIONS_MSG
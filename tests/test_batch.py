@@ -0,0 +1,130 @@
+from math import pi
+
+import pytest
+
+from vector import Vector
+from backend import FLOAT64
+
+np = pytest.importorskip('numpy')
+
+from batch import VectorBatch
+
+
+ROWS = [[8.462, 7.893, -8.187], [6.984, -5.975, 4.778], [-0.221, 7.042, 1.5]]
+
+
+def vectors():
+    return [Vector(row, FLOAT64) for row in ROWS]
+
+
+def test_batch_matches_vector_by_vector():
+    batch = VectorBatch(ROWS)
+    reference = Vector([3.039, 1.879, -2.2], FLOAT64)
+    assert np.allclose(batch.magnitude(), [v.magnitude() for v in vectors()])
+    assert np.allclose(batch.dot_product(reference), [v.dot_product(reference) for v in vectors()])
+    assert np.allclose(batch.angle_with(reference), [v.angle_with(reference) for v in vectors()])
+    assert np.allclose(batch.normalized().coordinates,
+                       [v.normalized().coordinates for v in vectors()])
+
+
+def test_pairwise_operations_pair_rows():
+    batch = VectorBatch(ROWS)
+    other = VectorBatch(ROWS[::-1])
+    expected = [u.dot_product(v) for u, v in zip(vectors(), vectors()[::-1])]
+    assert np.allclose(batch.dot_product(other), expected)
+
+
+def test_parallel_and_orthogonal_checks():
+    batch = VectorBatch([[1, 2, 3], [-2, -4, -6], [3, 0, -1]])
+    assert batch.check_parallel(Vector([2, 4, 6], FLOAT64)).tolist() == [True, True, False]
+    assert batch.check_orthogonal(Vector([1, 0, 3], FLOAT64)).tolist() == [False, False, True]
+    assert np.allclose(batch.angle_with(Vector([1, 2, 3], FLOAT64), in_degree=True), [0, 180, 90])
+    assert np.allclose(batch.angle_with(Vector([-1, -2, -3], FLOAT64)), [pi, 0, pi / 2])
+
+
+def test_zero_vectors_and_mismatched_shapes_are_rejected():
+    batch = VectorBatch([[1, 2], [0, 0]])
+    with pytest.raises(Exception):
+        batch.normalized()
+    with pytest.raises(Exception):
+        batch.angle_with(Vector([1, 0], FLOAT64))
+    with pytest.raises(Exception):
+        batch.dot_product(VectorBatch([[1, 2, 3]]))
+    with pytest.raises(ValueError):
+        VectorBatch([])
+
+
+def test_round_trip_through_vectors():
+    batch = VectorBatch.from_vectors(vectors())
+    assert len(batch) == 3
+    assert [v == w for v, w in zip(batch.to_vectors(), vectors())] == [True] * 3
+    assert batch[1] == vectors()[1]
+
+
+def test_intersect_lines_status_codes():
+    from batch import intersect_lines, UNIQUE, PARALLEL, COINCIDENT
+
+    points, status = intersect_lines([[1, 1, 1], [1, 2, 3], [1, 2, 3], [4.046, 2.836, 1.21]],
+                                     [[1, -1, 0], [2, 4, 6], [2, 4, 7], [10.115, 7.09, 3.025]])
+    assert status.tolist() == [UNIQUE, COINCIDENT, PARALLEL, COINCIDENT]
+    assert np.allclose(points[0], [0.5, 0.5])
+    assert np.isnan(points[1:]).all()
+
+
+def test_intersect_lines_with_zero_normals():
+    from batch import intersect_lines, PARALLEL, COINCIDENT
+
+    points, status = intersect_lines([[0, 0, 1], [0, 0, 1], [0, 0, 0], [1, 2, 0]],
+                                     [[0, 0, 2], [0, 0, 1], [0, 0, 0], [0, 0, 0]])
+    assert status.tolist() == [PARALLEL, COINCIDENT, COINCIDENT, PARALLEL]
+    assert np.isnan(points).all()
+
+
+def test_intersect_lines_matches_a_dense_solve():
+    from batch import intersect_lines, intersect_all_pairs, UNIQUE
+
+    rng = np.random.RandomState(7)
+    lines = rng.uniform(-10, 10, (40, 3))
+    for i, j, points, status in intersect_all_pairs(lines, chunk_size=16):
+        assert (status == UNIQUE).all()
+        expected = [np.linalg.solve(lines[[a, b], :2], lines[[a, b], 2]) for a, b in zip(i, j)]
+        assert np.allclose(points, expected)
+
+
+def plane_batch():
+    from batch import PlaneBatch
+    from plane import Plane
+    planes = [Plane(normal_vector=Vector(['0', '0', '2']), constant_term='2'),
+              Plane(normal_vector=Vector(['1', '1', '0']), constant_term='0'),
+              Plane(normal_vector=Vector(['-3', '0', '0']), constant_term='3')]
+    return PlaneBatch.from_planes(planes), planes
+
+
+def test_plane_batch_distances_match_a_point_by_point_loop():
+    batch, planes = plane_batch()
+    points = np.random.RandomState(24).randn(50, 3) * 4
+    expected = [[(sum([float(a) * x for a, x in zip(p.normal_vector.coordinates, point)]) -
+                  float(p.constant_term)) / float(p.normal_vector.magnitude()) for p in planes]
+                for point in points]
+    assert np.allclose(batch.signed_distances(points), expected)
+    assert np.allclose(batch.signed_distances(points, chunk_size=7), expected)
+
+
+def test_plane_batch_sides_inside_and_nearest():
+    from batch import ABOVE, ON, BELOW
+    batch = plane_batch()[0]
+    points = [[0, 0, 1], [5, 5, 5], [-1, 0, 0]]
+    assert batch.sides(points).tolist() == [[ON, ON, BELOW], [ABOVE, ABOVE, BELOW], [BELOW, BELOW, ON]]
+    assert batch.inside(points).tolist() == [True, False, True]
+    indices, distances = batch.nearest(points)
+    assert indices.tolist()[1:] == [0, 2]
+    assert np.allclose(distances[1:], [4, 0])
+
+
+def test_plane_batch_rejects_zero_normals_and_wrong_shapes():
+    from batch import PlaneBatch
+    with pytest.raises(Exception):
+        PlaneBatch([[0, 0, 1]])
+    batch = plane_batch()[0]
+    with pytest.raises(ValueError):
+        batch.signed_distances([[1, 2]])
@@ -0,0 +1,94 @@
+from decimal import Decimal, localcontext
+
+import pytest
+
+from vector import Vector
+from linsys import LinearSystem, Parametrization
+from backend import DECIMAL, FLOAT64
+from crosscheck import system
+
+np = pytest.importorskip('numpy')
+
+import binfile
+
+ROWS = [[2, 1, -1, -3], [1, -3, 2, 13], [3, 2, 1, 2]]
+
+
+def test_float64_system_round_trip_maps_the_file(tmp_path):
+    path = str(tmp_path / 'system.bin')
+    s = system(ROWS, FLOAT64)
+    binfile.write_system(path, s)
+    opened = binfile.open_system(path)
+    assert opened.backend == FLOAT64
+    assert isinstance(opened[0].normal_vector.coordinates.base, np.memmap)
+    assert np.array_equal(opened.to_array(), s.to_array())
+    assert np.allclose(opened.compute_solution().coordinates, [1, -2, 3])
+
+
+def test_decimal_values_are_read_at_the_stored_precision(tmp_path):
+    path = str(tmp_path / 'system.bin')
+    with localcontext() as context:
+        context.prec = 12
+        binfile.write_system(path, system([['0.1', '1', '2']], FLOAT64))
+    assert binfile.read_header(path)['precision'] == 12
+    opened = binfile.open_system(path, DECIMAL)
+    assert opened.backend == DECIMAL
+    assert opened[0].normal_vector.coordinates[0] == Decimal('0.100000000000')
+    assert opened[0].constant_term == Decimal(2)
+
+
+def test_solution_round_trips(tmp_path):
+    path = str(tmp_path / 'solution.bin')
+    v = Vector([1.5, -2, 0.1], FLOAT64)
+    binfile.write_solution(path, v)
+    assert binfile.read_solution(path) == v
+
+    p = Parametrization(Vector([1, 0, 0], FLOAT64), [Vector([-1, 1, 0], FLOAT64)])
+    binfile.write_solution(path, p)
+    copy = binfile.read_solution(path)
+    assert copy.basepoint == p.basepoint
+    assert copy.direction_vectors == p.direction_vectors
+    assert copy.free_variables is None
+
+    binfile.write_solution(path, LinearSystem.NO_SOLUTIONS_MSG)
+    assert binfile.read_solution(path) == LinearSystem.NO_SOLUTIONS_MSG
+
+
+def test_parametrizations_keep_their_free_variables(tmp_path):
+    source, target = str(tmp_path / 'system.bin'), str(tmp_path / 'solution.bin')
+    binfile.write_system(source, system([[0, 1, 2, 0, 4], [0, 2, 4, 1, 9]], FLOAT64))
+    result = binfile.open_system(source).compute_solution()
+    exact = binfile.open_system(source, DECIMAL).compute_solution('exact')
+    assert result.free_variables == exact.free_variables == [0, 2]
+
+    binfile.write_solution(target, result)
+    copy = binfile.read_solution(target)
+    assert copy.free_variables == [0, 2]
+    assert copy.basepoint == result.basepoint
+    assert copy.contains(exact.evaluate([1, 1]))
+
+
+def test_decimal_solutions_are_rejected(tmp_path):
+    path = str(tmp_path / 'solution.bin')
+    with pytest.raises(Exception) as e:
+        binfile.write_solution(path, Vector(['0.1', '0.2'], DECIMAL))
+    assert str(e.value) == binfile.FLOAT64_ONLY_MSG
+
+
+def test_decimal_systems_are_rejected(tmp_path):
+    path = str(tmp_path / 'system.bin')
+    with pytest.raises(Exception) as e:
+        binfile.write_system(path, system([['0.1', '1', '2']], DECIMAL))
+    assert str(e.value) == binfile.FLOAT64_SYSTEMS_ONLY_MSG
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'x' * 100)
+    with pytest.raises(Exception) as e:
+        binfile.read_header(str(path))
+    assert str(e.value) == binfile.NOT_A_LINSYS_FILE_MSG
+    solution = str(tmp_path / 'solution.bin')
+    binfile.write_solution(solution, Vector([1.], FLOAT64))
+    with pytest.raises(Exception):
+        binfile.open_system(solution)
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from vector import Vector
+from plane import Plane
+from lu import LUFactorization
+from backend import DECIMAL, FLOAT64
+from crosscheck import system
+
+np = pytest.importorskip('numpy')
+
+from blocked import BLOCKED_MIN_SIZE, SINGULAR_MATRIX_MSG, blocked_lu
+
+
+def random_matrix(n, seed=0, scale=1.):
+    return np.random.RandomState(seed).uniform(-1, 1, (n, n)) * scale
+
+
+@pytest.mark.parametrize('threads', [1, 3])
+def test_factors_reproduce_the_matrix(threads):
+    a = random_matrix(70)
+    lu = a.copy()
+    permutation = blocked_lu(lu, block_size=16, threads=threads)
+    lower = np.tril(lu, -1) + np.eye(len(a))
+    assert np.allclose(lower.dot(np.triu(lu)), a[permutation])
+
+
+def test_large_systems_match_numpy_and_the_unblocked_lu():
+    n = BLOCKED_MIN_SIZE + 10
+    a, b = random_matrix(n, 1), np.arange(n, dtype=np.float64)
+    x = LUFactorization.factorize(a, FLOAT64).solve(b).coordinates
+    assert np.allclose(x, np.linalg.solve(a, b))
+    small = LUFactorization.from_system(system([[2, 1, 3], [1, 3, 4]], DECIMAL)).solve([3, 4])
+    assert [float(v) for v in small.coordinates] == [1, 1]
+
+
+def test_dependent_rows_are_singular_at_any_scale():
+    for scale in (1., 1e6):
+        a = random_matrix(BLOCKED_MIN_SIZE, 5, scale)
+        a[-1] = a[0] + a[1]
+        with pytest.raises(Exception) as e:
+            LUFactorization.factorize(a, FLOAT64)
+        assert str(e.value) == SINGULAR_MATRIX_MSG
+
+
+def test_compute_solution_sees_changes_the_factorization_cache_does_not():
+    n = BLOCKED_MIN_SIZE
+    a, k = random_matrix(n, 6), np.arange(n, dtype=np.float64)
+    s = system(np.hstack([a, k[:, None]]).tolist(), FLOAT64)
+    s.factorize()
+    # the caller's own list, replacing a row does not go through __setitem__
+    planes = s.planes
+    planes[0] = Plane(normal_vector=Vector(np.ones(n), FLOAT64), constant_term=1.)
+    a[0] = 1.
+    k[0] = 1.
+    x = s.compute_solution().coordinates
+    assert np.allclose(a.dot(x), k)
+
+
+def test_importing_linsys_leaves_multiprocessing_alone():
+    # the thread pool is only set up, and multiprocessing imported, on first use
+    code = 'import sys, linsys; print("multiprocessing" in sys.modules)'
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=root)
+    assert output.strip() == b'False'
@@ -0,0 +1,56 @@
+import pytest
+
+from linsys import LinearSystem
+from backend import DECIMAL, FLOAT64, FRACTION
+from crosscheck import UNIQUE, INFINITE, close, outcome, random_systems, same_solution_set, system
+
+np = pytest.importorskip('numpy')
+
+import condition
+
+
+@pytest.mark.parametrize('backend', [DECIMAL, FLOAT64, FRACTION])
+def test_auto_mode_agrees_with_exact(backend):
+    for s in random_systems(300, backend, seed=23, max_equations=7):
+        exact = s.compute_solution('exact')
+        result = s.compute_solution('auto')
+        assert outcome(result) == outcome(exact), s.diagnose()
+        if outcome(exact) == UNIQUE:
+            assert result.backend == backend
+            assert close(result, exact)
+        elif outcome(exact) == INFINITE:
+            assert same_solution_set(result, exact)
+
+
+def test_inconsistent_tall_systems_have_no_solutions():
+    rows = [[1, 0, 1], [0, 1, 1], [1, 1, 3]]
+    s = system(rows, FLOAT64)
+    assert s.diagnose().path == condition.LEAST_SQUARES
+    assert s.compute_solution('auto') == LinearSystem.NO_SOLUTIONS_MSG
+    rows[-1][-1] = 2
+    assert close(system(rows, FLOAT64).compute_solution('auto'), system(rows, DECIMAL).compute_solution('exact'))
+
+
+def test_decimal_tall_systems_are_not_fitted_in_float64():
+    s = system([['0.1', '0', '0.1'], ['0', '0.3', '0.1'], ['0.1', '0.3', '0.2']], DECIMAL)
+    assert s.diagnose().path == condition.ELIMINATE
+    solution = s.compute_solution('auto')
+    assert solution.backend == DECIMAL
+    assert close(solution, s.compute_solution('exact'), 1e-25)
+
+
+def test_fraction_systems_are_solved_exactly():
+    s = system([[1, 1, 1], [1, -1, 0]], FRACTION)
+    assert s.diagnose().path == condition.EXACT
+    assert s.compute_solution('auto') == s.compute_solution('exact')
+
+
+def test_condition_estimate_and_rank_match_numpy():
+    rng = np.random.RandomState(0)
+    for n in (3, 5, 20):
+        a = rng.randn(n, n).dot(np.diag(np.logspace(0, 6, n)))
+        exact = np.linalg.cond(a, 1)
+        assert exact / 3 <= condition.matrix_condition(a) <= exact * (1 + 1e-9)
+        a[-1] = a[0] - a[1]
+        assert condition.numerical_rank(a)[0] == np.linalg.matrix_rank(a) == n - 1
+        assert condition.matrix_condition(a) > 1e14
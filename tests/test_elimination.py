@@ -0,0 +1,61 @@
+import pytest
+
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem, Parametrization
+from elimination import DenseElimination
+from backend import DECIMAL, FLOAT64, use_backend
+
+np = pytest.importorskip('numpy')
+
+BACKENDS = [DECIMAL, FLOAT64]
+
+
+def system(rows, backend):
+    with use_backend(backend):
+        return LinearSystem([Plane(normal_vector=Vector(row[:-1]), constant_term=row[-1])
+                             for row in rows])
+
+
+def floats(v):
+    return [float(x) for x in v.coordinates]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_rref_of_a_unique_system(backend):
+    # x = (1, -2, 3)
+    s = system([[2, 1, -1, -3], [1, -3, 2, 13], [3, 2, 1, 2]], backend)
+    elimination = DenseElimination.from_system(s).compute_rref()
+    assert elimination.rank == 3
+    assert elimination.pivot_columns == [0, 1, 2]
+    assert elimination.has_unique_solution()
+    rref = s.compute_rref()
+    assert np.allclose([floats(p.normal_vector) for p in rref], np.eye(3))
+    assert np.allclose([float(p.constant_term) for p in rref], [1, -2, 3])
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_partial_pivoting_avoids_a_tiny_leading_pivot(backend):
+    s = system([[1e-20, 1, 1], [1, 1, 2]], backend)
+    assert np.allclose(floats(s.compute_solution()), [1, 1])
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_rank_deficient_and_inconsistent_systems(backend):
+    dependent = system([[1, 2, 3, 6], [2, 4, 6, 12], [1, 0, 1, 2]], backend)
+    elimination = DenseElimination.from_system(dependent).compute_triangular_form()
+    assert elimination.rank == 2
+    assert not elimination.has_no_solution()
+    assert isinstance(dependent.compute_solution(), Parametrization)
+
+    inconsistent = system([[1, 2, 3, 6], [2, 4, 6, 13], [1, 0, 1, 2]], backend)
+    assert DenseElimination.from_system(inconsistent).has_no_solution()
+    assert inconsistent.compute_solution() == LinearSystem.NO_SOLUTIONS_MSG
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_elimination_leaves_the_system_unchanged(backend):
+    rows = [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 1, 2]]
+    s = system(rows, backend)
+    s.compute_rref()
+    assert [floats(p.normal_vector) + [float(p.constant_term)] for p in s] == rows
@@ -0,0 +1,41 @@
+from fractions import Fraction
+
+import pytest
+
+from linsys import LinearSystem, Parametrization
+from backend import DECIMAL, FLOAT64, FRACTION
+from crosscheck import UNIQUE, INFINITE, close, outcome, random_systems, system, same_solution_set
+
+
+def test_exact_solution_is_a_fraction_vector():
+    s = system([[3, 1, 1], [1, 2, 0]], DECIMAL)
+    solution = s.compute_solution('exact')
+    assert solution.backend == FRACTION
+    assert list(solution.coordinates) == [Fraction(2, 5), Fraction(-1, 5)]
+
+
+def test_decimal_inputs_are_read_exactly():
+    s = system([['0.1', '0.2', '0.3'], ['0.3', '-0.1', '0.2']], DECIMAL)
+    assert list(s.compute_solution('exact').coordinates) == [1, 1]
+
+
+def test_exact_rank_and_free_variables():
+    s = system([[1, 2, 3, 6], [2, 4, 6, 12], [1, 0, 1, 2]], DECIMAL)
+    assert s.compute_exact_rank() == 2
+    result = s.compute_solution('exact')
+    assert isinstance(result, Parametrization)
+    assert len(result.direction_vectors) == 1
+    assert system([[1, 1, 1], [2, 2, 3]], DECIMAL).compute_solution('exact') == \
+        LinearSystem.NO_SOLUTIONS_MSG
+
+
+@pytest.mark.parametrize('backend', [DECIMAL, FLOAT64])
+def test_default_mode_agrees_with_exact(backend):
+    for s in random_systems(300, backend, seed=9):
+        exact = s.compute_solution('exact')
+        result = s.compute_solution()
+        assert outcome(result) == outcome(exact)
+        if outcome(exact) == UNIQUE:
+            assert close(result, exact)
+        elif outcome(exact) == INFINITE:
+            assert same_solution_set(result, exact)
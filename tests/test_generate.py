@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from backend import DECIMAL
+from generate import UNIQUE, NO_SOLUTIONS, INFINITE, generate_system, check_solution
+from crosscheck import outcome
+
+
+@pytest.mark.parametrize('kind', [UNIQUE, NO_SOLUTIONS, INFINITE])
+def test_generated_outcome_matches_the_exact_solve(kind):
+    for n in (1, 2, 5):
+        g = generate_system(n, kind, seed=n, backend=DECIMAL)
+        result = g.system.compute_solution('exact')
+        assert outcome(result) == kind
+        assert check_solution(g, result)
+
+
+@pytest.mark.parametrize('kind', [NO_SOLUTIONS, INFINITE])
+def test_nullity_n_gives_zero_rows(kind):
+    g = generate_system(3, kind, nullity=3, backend=DECIMAL)
+    assert g.rank == 0
+    assert g.nullity == 3
+    assert all(x == 0 for p in g.system for x in p.normal_vector.coordinates)
+    assert outcome(g.system.compute_solution('exact')) == kind
+
+
+def test_check_solution_rejects_the_wrong_outcome():
+    g = generate_system(3, UNIQUE, backend=DECIMAL)
+    assert not check_solution(g, generate_system(3, NO_SOLUTIONS).system.compute_solution('exact'))
+
+
+def test_baseline_keeps_ratios_of_correct_results_only(tmp_path, monkeypatch):
+    benchmark = pytest.importorskip('benchmark')
+    results = [{'case': 'a', 'backend': DECIMAL, 'size': 3, 'seconds': 1., 'ratio': 2., 'correct': True},
+               {'case': 'b', 'backend': DECIMAL, 'size': 3, 'seconds': 1., 'ratio': 2., 'correct': False}]
+    path = str(tmp_path / 'baseline.json')
+    benchmark.save_results(path, results)
+    with open(path) as f:
+        saved = json.load(f)['results']
+    assert saved == [{'case': 'a', 'backend': DECIMAL, 'size': 3, 'ratio': 2., 'correct': True}]
+
+    slower = dict(results[0], seconds=1., ratio=3.)
+    messages = benchmark.compare_to_baseline([slower, results[1]], path, rechecks=0)
+    assert len(messages) == 2
+    assert 'baseline 2.000' in messages[0]
+    assert 'wrong result' in messages[1]
+
+    # a slow case that is back to its baseline when run again is not reported
+    monkeypatch.setattr(benchmark, 'run_case', lambda name, backend, n: results[0])
+    assert benchmark.compare_to_baseline([slower], path) == []
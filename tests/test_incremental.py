@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from linsys import LinearSystem
+from incremental import IncrementalLinearSystem
+from backend import DECIMAL, FRACTION
+from crosscheck import UNIQUE, INFINITE, close, outcome, system, same_solution_set
+
+
+def assert_matches_exact(incremental):
+    exact = incremental.to_linear_system().compute_solution('exact')
+    result = incremental.compute_solution()
+    assert outcome(result) == outcome(exact)
+    if outcome(exact) == UNIQUE:
+        assert close(result, exact)
+    elif outcome(exact) == INFINITE:
+        assert same_solution_set(result, exact)
+
+
+@pytest.mark.parametrize('backend', [FRACTION, DECIMAL])
+def test_updates_agree_with_a_fresh_exact_solve(backend):
+    rng = random.Random(20)
+    for trial in range(30):
+        n = rng.randint(1, 4)
+        planes = list(system([row[:n] + row[-1:] for row in
+                              [[rng.randint(-3, 3) for j in range(5)] for i in range(8)]], backend))
+        incremental = IncrementalLinearSystem(n, backend)
+        for p in planes[:3]:
+            incremental.append(p)
+        assert_matches_exact(incremental)
+        for p in planes[3:]:
+            action = rng.choice(['append', 'remove', 'replace'])
+            if action == 'append' or len(incremental) < 2:
+                incremental.append(p)
+            elif action == 'remove':
+                incremental.remove(rng.randrange(len(incremental)))
+            else:
+                incremental.replace(rng.randrange(len(incremental)), p)
+            assert_matches_exact(incremental)
+
+
+def test_remove_returns_the_equation_and_checks_the_index():
+    s = system([[1, 1, 2], [1, -1, 0], [2, 2, 5]], FRACTION)
+    incremental = IncrementalLinearSystem.from_system(s)
+    assert incremental.compute_solution() == LinearSystem.NO_SOLUTIONS_MSG
+    assert incremental.remove(2) is s[2]
+    assert list(incremental.compute_solution().coordinates) == [1, 1]
+    with pytest.raises(Exception):
+        incremental.remove(5)
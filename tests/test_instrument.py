@@ -0,0 +1,38 @@
+import instrument
+from instrument import collect_stats
+from backend import DECIMAL
+from crosscheck import UNIQUE, INFINITE, close, outcome, random_systems, system, same_solution_set
+
+
+def test_off_by_default_and_restored_after_nesting():
+    assert instrument.stats is None
+    with collect_stats() as outer:
+        with collect_stats() as inner:
+            assert instrument.stats is inner
+        assert instrument.stats is outer
+    assert instrument.stats is None
+
+
+def test_counts_row_operations_and_phases():
+    s = system([[1, 1, 2], [1, -1, 0]], DECIMAL)
+    with collect_stats() as stats:
+        s.compute_triangular_form()
+    assert stats.counters['add_multiple_times_row_to_row'] >= 1
+    assert stats.counters['vectors_allocated'] > 0
+
+    with collect_stats() as stats:
+        s.compute_solution()
+    assert stats.timings['triangular_form'] > 0
+    assert stats.report()['timings']['parametrization'] == 0
+
+
+def test_collecting_does_not_change_the_results():
+    for s in random_systems(50, DECIMAL, seed=15):
+        exact = s.compute_solution('exact')
+        with collect_stats():
+            result = s.compute_solution()
+        assert outcome(result) == outcome(exact)
+        if outcome(exact) == UNIQUE:
+            assert close(result, exact)
+        elif outcome(exact) == INFINITE:
+            assert same_solution_set(result, exact)
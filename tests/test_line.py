@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+import pytest
+
+from backend import FLOAT64, FRACTION
+from vector import Vector
+from line import Line
+
+
+def test_intersection_of_crossing_lines():
+    point = Line(Vector(['1', '1']), '2').intersection_with(Line(Vector(['1', '-1']), '0'))
+    assert list(point.coordinates) == [1, 1]
+
+
+def test_nearly_parallel_lines_do_not_intersect():
+    # parallel up to the rounding of the inputs
+    a = Line(Vector([4.046, 2.836]), 1.21)
+    b = Line(Vector([10.115, 7.09]), 3.025)
+    assert a.parallel_to(b)
+    assert a.intersection_with(b) is False
+
+
+def test_coincident_lines_do_not_give_a_point():
+    a = Line(Vector(['1', '2']), '3')
+    b = Line(Vector(['2', '4']), '6')
+    assert a.intersection_with(b) is False
+    assert a.basepoint.coordinates[0] == Decimal(3)
+
+
+def test_intersection_keeps_the_backend_of_the_lines():
+    pytest.importorskip('numpy')
+    a = Line(Vector([1.0, 1.0], FLOAT64), 2.0)
+    b = Line(Vector([1.0, -1.0], FLOAT64), 0.0)
+    point = a.intersection_with(b)
+    assert point.backend == FLOAT64
+    assert list(point.coordinates) == [1.0, 1.0]
+
+
+def test_default_normal_uses_the_requested_backend():
+    assert Line(backend=FRACTION).normal_vector.backend == FRACTION
+    assert Line(backend=FRACTION).constant_term == 0
+
+
+def test_fraction_lines_print_and_intersect():
+    a = Line(Vector(['1', '2'], FRACTION), '3')
+    b = Line(Vector(['1', '-1'], FRACTION), '0')
+    assert str(a) == 'x_1 + 2x_2 = 3'
+    assert a.basepoint == Vector(['3', '0'])
+    assert a.intersection_with(b) == Vector(['1', '1'])
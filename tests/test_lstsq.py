@@ -0,0 +1,51 @@
+import pytest
+
+from linsys import Parametrization
+from backend import DECIMAL, FLOAT64
+from crosscheck import UNIQUE, close, outcome, random_systems, system
+
+np = pytest.importorskip('numpy')
+
+from lstsq import StreamingLeastSquares, solve_least_squares
+
+
+def test_consistent_systems_match_the_exact_solution():
+    for s in random_systems(100, FLOAT64, seed=19, max_equations=6):
+        exact = s.compute_solution('exact')
+        if outcome(exact) != UNIQUE:
+            continue
+        result = s.compute_least_squares()
+        assert result.rank == s.dimension
+        assert result.residual_norm < 1e-8
+        assert close(result.solution, exact, 1e-8)
+        assert close(s.compute_solution('lstsq'), exact, 1e-8)
+
+
+def test_chunks_give_the_same_fit_as_one_block():
+    rng = np.random.RandomState(0)
+    a, k = rng.randn(500, 4), rng.randn(500)
+    whole = solve_least_squares(list(zip(a, k)), chunk_size=500, backend=FLOAT64)
+    chunked = solve_least_squares(list(zip(a, k)), chunk_size=7, backend=FLOAT64)
+    assert np.allclose(whole.solution.coordinates, chunked.solution.coordinates)
+    assert np.allclose(whole.solution.coordinates, np.linalg.lstsq(a, k, rcond=None)[0])
+    assert abs(whole.residual_norm - np.linalg.norm(a.dot(whole.solution.coordinates) - k)) < 1e-9
+
+
+def test_rank_comes_from_the_singular_values():
+    # the diagonal of R is 1, 1e-20, 1e-20 but two singular values are near 1
+    solver = StreamingLeastSquares(3, FLOAT64)
+    solver.add_equations([[1, 0, 0], [0, 1e-20, 1], [0, 0, 1e-20]], [1, 2, 0])
+    result = solver.result()
+    assert result.rank == 2
+    assert len(result.null_space) == 1
+    assert np.allclose(result.solution.coordinates, [1, 0, 2])
+    assert result.residual_norm < 1e-12
+
+
+def test_lstsq_mode_reports_rank_deficiency():
+    s = system([[1, 2, 3], [2, 4, 6], [3, 6, 9]], FLOAT64)
+    result = s.compute_solution('lstsq')
+    assert isinstance(result, Parametrization)
+    assert len(result.direction_vectors) == 1
+    fit = system([[1, 2, 3], [0, 1, 2]], DECIMAL).compute_solution('lstsq')
+    assert np.allclose([float(x) for x in fit.coordinates], [-1, 2])
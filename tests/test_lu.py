@@ -0,0 +1,67 @@
+from fractions import Fraction
+
+import pytest
+
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem
+from lu import LUFactorization
+from backend import DECIMAL, FLOAT64, FRACTION, use_backend
+
+np = pytest.importorskip('numpy')
+
+BACKENDS = [DECIMAL, FLOAT64, FRACTION]
+A = [[0, 2, 1], [1, -3, 2], [3, 2, 1]]
+
+
+def system(a, k, backend):
+    with use_backend(backend):
+        return LinearSystem([Plane(normal_vector=Vector(row), constant_term=b) for row, b in zip(a, k)])
+
+
+def floats(v):
+    return [float(x) for x in v.coordinates]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_factorization_solves_like_elimination(backend):
+    for k in ([1, 2, 3], [-4, 0, 7], [0, 0, 1]):
+        s = system(A, k, backend)
+        assert np.allclose(floats(s.factorize().solve(k)), floats(s.compute_solution()))
+
+
+def test_solve_many_solves_every_right_hand_side():
+    s = system(A, [0, 0, 0], FLOAT64)
+    B = np.random.RandomState(0).uniform(-10, 10, (50, 3))
+    X = s.factorize().solve_many(B)
+    assert X.shape == (50, 3)
+    assert np.allclose(X.dot(np.array(A, dtype=float).T), B)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_factorization_is_cached_until_a_row_changes(backend):
+    s = system(A, [1, 2, 3], backend)
+    lu = s.factorize()
+    assert s.factorize() is lu
+    s[0] = s[0]
+    assert s.factorize() is not lu
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_singular_and_non_square_systems_are_rejected(backend):
+    with pytest.raises(Exception) as e:
+        system([[1, 2], [2, 4]], [1, 2], backend).factorize()
+    assert str(e.value) == LUFactorization.SINGULAR_MATRIX_MSG
+    with pytest.raises(Exception) as e:
+        system([[1, 2], [2, 4], [0, 1]], [1, 2, 3], backend).factorize()
+    assert str(e.value) == LUFactorization.NOT_SQUARE_MSG
+    with pytest.raises(Exception) as e:
+        system(A, [1, 2, 3], backend).factorize().solve([1, 2])
+    assert str(e.value) == LUFactorization.WRONG_RHS_SIZE_MSG
+
+
+def test_fraction_factorization_solves_exactly():
+    s = system(A, [1, 2, 3], FRACTION)
+    x = s.factorize().solve([1, 2, 3])
+    assert x == s.compute_exact_solution()
+    assert [type(c) for c in x.coordinates] == [Fraction] * 3
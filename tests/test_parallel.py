@@ -0,0 +1,37 @@
+import pytest
+
+from vector import Vector
+from linsys import Parametrization
+from parallel import pack_result, pack_system, solve_many, unpack_result, unpack_system
+from backend import DECIMAL, FLOAT64
+from crosscheck import random_systems
+
+np = pytest.importorskip('numpy')
+
+
+def comparable(result):
+    if isinstance(result, Parametrization):
+        return (result.basepoint, result.direction_vectors, result.free_variables)
+    return result
+
+
+@pytest.mark.parametrize('backend', [DECIMAL, FLOAT64])
+def test_systems_and_results_survive_packing(backend):
+    s = random_systems(1, backend, seed=11)[0]
+    copy = unpack_system(pack_system(s))
+    assert copy.backend == backend
+    assert [p.normal_vector for p in copy] == [p.normal_vector for p in s]
+    assert [p.constant_term for p in copy] == [p.constant_term for p in s]
+    v = Vector(['1.5', '-2', '3.25'], backend)
+    assert unpack_result(pack_result(v)) == v
+    assert unpack_result(pack_result('No solutions')) == 'No solutions'
+    p = Parametrization(v, [Vector(['0', '1', '0'], backend)], [1])
+    assert comparable(unpack_result(pack_result(p))) == comparable(p)
+
+
+@pytest.mark.parametrize('backend', [DECIMAL, FLOAT64])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_solve_many_matches_compute_solution_in_order(backend, workers):
+    systems = random_systems(60, backend, seed=11)
+    expected = [comparable(s.compute_solution()) for s in systems]
+    assert [comparable(r) for r in solve_many(systems, workers=workers, chunk_size=7)] == expected
@@ -0,0 +1,42 @@
+import pytest
+
+from vector import Vector
+from linsys import Parametrization
+from backend import DECIMAL, FLOAT64
+from crosscheck import system
+
+np = pytest.importorskip('numpy')
+
+
+def plane_in_3d():
+    # x + y + z = 1 through (1, 0, 0)
+    return Parametrization(Vector([1, 0, 0], DECIMAL),
+                           [Vector([-1, 1, 0], DECIMAL), Vector([-1, 0, 1], DECIMAL)], [1, 2])
+
+
+def test_array_views():
+    p = plane_in_3d()
+    assert np.array_equal(p.basepoint_array, [1, 0, 0])
+    assert np.array_equal(p.direction_matrix, [[-1, 1, 0], [-1, 0, 1]])
+
+
+def test_evaluate_one_and_many():
+    p = plane_in_3d()
+    assert np.array_equal(p.evaluate([2, 3]), [-4, 2, 3])
+    assert p.evaluate(np.zeros((5, 2))).shape == (5, 3)
+    with pytest.raises(Exception):
+        p.evaluate([1, 2, 3])
+
+
+def test_distance_and_contains():
+    p = plane_in_3d()
+    points = np.array([[1, 0, 0], [1, 1, 1], [0.2, 0.3, 0.5]])
+    assert np.allclose(p.distance(points), [0, 2 / 3 ** 0.5, 0])
+    assert list(p.contains(points)) == [True, False, True]
+
+
+def test_solver_output_matches_the_exact_solution_set():
+    s = system([[1, 1, 1, 1], [2, 2, 2, 2]], FLOAT64)
+    result, exact = s.compute_solution(), s.compute_solution('exact')
+    assert result.free_variables == exact.free_variables == [1, 2]
+    assert result.contains(exact.evaluate(np.random.RandomState(0).randn(10, 2))).all()
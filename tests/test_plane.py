@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+import pytest
+
+from backend import FRACTION, use_backend
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem
+
+
+def test_basepoint_is_computed_on_first_read():
+    p = Plane(normal_vector=Vector(['0', '2', '4']), constant_term='6')
+    assert not p._basepoint_is_set
+    assert p.basepoint == Vector(['0', '3', '0'])
+    assert p._basepoint_is_set
+    assert p.basepoint is p.basepoint
+
+
+def test_zero_normal_has_no_basepoint():
+    assert Plane(normal_vector=Vector(['0', '0', '0']), constant_term='1').basepoint is None
+
+
+def test_normal_vector_and_constant_term_are_read_only():
+    p = Plane(normal_vector=Vector(['1', '2', '3']), constant_term='4')
+    with pytest.raises(AttributeError):
+        p.normal_vector = Vector(['1', '0', '0'])
+    with pytest.raises(AttributeError):
+        p.constant_term = Decimal(5)
+
+
+def test_parallel_and_same_plane():
+    p = Plane(normal_vector=Vector(['1', '2', '3']), constant_term='4')
+    same = Plane(normal_vector=Vector(['-2', '-4', '-6']), constant_term='-8')
+    shifted = Plane(normal_vector=Vector(['2', '4', '6']), constant_term='9')
+    assert p.parallel_to(same) and p.is_same_plane(same)
+    assert p.parallel_to(shifted) and not p.is_same_plane(shifted)
+
+
+def test_default_normal_uses_the_requested_backend():
+    p = Plane(backend=FRACTION)
+    assert p.normal_vector.backend == FRACTION
+    assert p.constant_term == 0
+
+
+def test_fraction_planes_print_and_compare():
+    with use_backend(FRACTION):
+        p = Plane(normal_vector=Vector(['0', '2', '4']), constant_term='6')
+        same = Plane(normal_vector=Vector(['0', '-1', '-2']), constant_term='-3')
+        assert str(p) == '2x_2 + 4x_3 = 6'
+        assert p.basepoint == Vector(['0', '3', '0'])
+        assert p.is_same_plane(same)
+        assert Plane().basepoint is None
+        assert str(LinearSystem([p, same])) == 'Linear System:\nEquation 1: 2x_2 + 4x_3 = 6\nEquation 2: -x_2 - 2x_3 = -3'
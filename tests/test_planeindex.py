@@ -0,0 +1,52 @@
+from vector import Vector
+from plane import Plane
+from linsys import LinearSystem
+from planeindex import PlaneIndex
+
+
+def plane(normal, k):
+    return Plane(normal_vector=Vector([str(x) for x in normal]), constant_term=str(k))
+
+
+PLANES = [
+    plane([1, 2, 3], 4),
+    plane([-2, -4, -6], -8),    # same as 0
+    plane([2, 4, 6], 9),        # parallel to 0
+    plane([0, 1, 0], 1),
+    plane([0, 0, 0], 0),
+]
+
+
+def test_parallel_and_same_lookups_agree_with_plane_methods():
+    index = PlaneIndex(PLANES)
+    for p in PLANES[:4]:
+        parallel = [i for i, q in enumerate(PLANES[:4]) if p.parallel_to(q)]
+        same = [i for i, q in enumerate(PLANES[:4]) if p.is_same_plane(q)]
+        assert index.parallel_to(p) == parallel
+        assert index.same_as(p) == same
+
+
+def test_groups():
+    index = PlaneIndex(PLANES)
+    assert len(index) == 5
+    assert sorted(index.parallel_groups()) == [[0, 1, 2], [3]]
+    assert index.duplicate_groups() == [[0, 1]]
+
+
+def test_without_redundant_equations_drops_repeats_and_empty_rows():
+    s = LinearSystem(PLANES + [plane([0, 1, 0], 1)])
+    reduced = s.without_redundant_equations()
+    assert [s.planes.index(p) for p in reduced] == [0, 2, 3]
+
+
+def test_without_redundant_equations_keeps_rows_that_only_share_a_bucket():
+    close_offsets = LinearSystem([plane([1, 0, 0], 0), plane([1, 0, 0], '0.000004'),
+                                  plane([0, 1, 0], 1), plane([0, 0, 1], 1)])
+    assert len(close_offsets.without_redundant_equations()) == 4
+    assert close_offsets.without_redundant_equations().compute_solution() == LinearSystem.NO_SOLUTIONS_MSG
+
+    close_normals = LinearSystem([plane([1, 0, 0], 0), plane([1, '0.000001', 0], 0),
+                                  plane([0, 0, 1], 1)])
+    reduced = close_normals.without_redundant_equations()
+    assert len(reduced) == 3
+    assert reduced.compute_solution() == close_normals.compute_solution() == Vector(['0', '0', '1'])
@@ -0,0 +1,71 @@
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+import pytest
+
+from linsys import LinearSystem
+from refine import refine_solution
+from backend import DECIMAL, FRACTION
+from crosscheck import UNIQUE, INFINITE, close, outcome, random_systems, system, same_solution_set
+
+pytest.importorskip('numpy')
+
+# a system float64 cannot hold exactly
+ROWS = [['0.1', '0.7', '-0.3', '1.1'], ['0.3', '-0.2', '0.9', '0.4'], ['1.3', '0.1', '0.2', '-0.6']]
+
+
+def error(result, exact):
+    return max([abs(Fraction(x) - y) for x, y in zip(result.coordinates, exact.coordinates)])
+
+
+def test_no_corrections_when_the_float64_solve_is_exact():
+    result = refine_solution(system([[2, 0, 2], [0, 4, 4]], DECIMAL))
+    assert result.converged
+    assert result.iterations == 0
+    assert list(result.solution.coordinates) == [1, 1]
+
+
+def test_refinement_reaches_the_working_precision():
+    s = system(ROWS, DECIMAL)
+    exact = s.compute_solution('exact')
+    for digits in (28, 50):
+        with localcontext() as context:
+            context.prec = digits
+            result = refine_solution(s)
+        assert result.converged
+        assert 1 <= result.iterations <= 10
+        assert error(result.solution, exact) < Fraction(10) ** (7 - digits)
+
+
+def test_iterations_stop_at_max_iterations():
+    result = refine_solution(system(ROWS, DECIMAL), tolerance=Decimal('1e-60'), max_iterations=2)
+    assert not result.converged
+    assert result.iterations <= 2
+
+
+def test_singular_systems_fall_back_to_elimination():
+    s = system([[1, 1, 1], [2, 2, 3]], DECIMAL)
+    result = s.compute_refined_solution()
+    assert not result.converged
+    assert result.iterations == 0
+    assert result.solution == LinearSystem.NO_SOLUTIONS_MSG
+
+
+def test_refine_mode_agrees_with_exact():
+    for s in random_systems(200, DECIMAL, seed=10):
+        exact = s.compute_solution('exact')
+        result = s.compute_solution('refine')
+        assert outcome(result) == outcome(exact)
+        if outcome(exact) == UNIQUE:
+            assert close(result, exact, 1e-20)
+        elif outcome(exact) == INFINITE:
+            assert same_solution_set(result, exact)
+
+
+def test_fraction_systems_are_refined_in_decimal():
+    s = system(ROWS, FRACTION)
+    result = s.compute_refined_solution()
+    assert result.converged
+    assert error(result.solution, s.compute_solution('exact')) < Fraction(10) ** -20
+    singular = system([[1, 1, 1], [2, 2, 3]], FRACTION)
+    assert singular.compute_solution('refine') == LinearSystem.NO_SOLUTIONS_MSG
@@ -0,0 +1,89 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from backend import DECIMAL, FLOAT64, use_precision
+from crosscheck import UNIQUE, INFINITE, close, outcome, random_systems, same_solution_set, system
+
+pytest.importorskip('numpy')
+
+from service import SolverClient, SolverService, percentiles, start_server, server_address
+
+
+def run(coroutine_function):
+    # threads instead of the forkserver pool keep the tests fast
+    with ThreadPoolExecutor(2) as executor:
+        service = SolverService(workers=2, max_batch_size=8, max_latency=0.001, executor=executor)
+        return asyncio.run(coroutine_function(service))
+
+
+def test_batched_results_agree_with_exact():
+    systems = random_systems(40, DECIMAL, seed=25)
+
+    async def solve_all(service):
+        await service.start()
+        try:
+            return await asyncio.gather(*[service.solve(s) for s in systems])
+        finally:
+            await service.stop()
+
+    for s, result in zip(systems, run(solve_all)):
+        exact = s.compute_solution('exact')
+        assert outcome(result) == outcome(exact)
+        if outcome(exact) == UNIQUE:
+            assert close(result, exact)
+        elif outcome(exact) == INFINITE:
+            assert same_solution_set(result, exact)
+
+
+def test_socket_round_trip_errors_and_metrics():
+    async def session(service):
+        server = await start_server(service, port=0)
+        client = await SolverClient.connect(**server_address(server))
+        try:
+            solved = await client.solve(system([[1, 1, 2], [1, -1, 0]], DECIMAL))
+            broken = await client.request({'equations': 'not a system'})
+            metrics = await client.metrics()
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+            await service.stop()
+        return solved, broken, metrics
+
+    solved, broken, metrics = run(session)
+    assert solved['status'] == 'unique'
+    assert [float(x) for x in solved['solution']] == [1, 1]
+    assert broken['status'] == 'error'
+    assert metrics['completed'] == 1
+    assert metrics['batches'] == 1
+
+
+def test_enqueue_needs_a_started_service():
+    async def enqueue(service):
+        with pytest.raises(Exception):
+            await service.enqueue(system([[1, 1]], DECIMAL))
+    run(enqueue)
+    assert percentiles([]) == {'p50': None, 'p95': None, 'p99': None}
+    assert percentiles(list(range(100)))['p95'] == 95
+
+
+def test_process_pool_keeps_backend_and_precision():
+    # the default forkserver pool, systems and the precision are pickled
+    # across to the workers
+    async def solve_both(service):
+        await service.start()
+        try:
+            return await asyncio.gather(service.solve(system([[3, 1]], DECIMAL)),
+                                        service.solve(system([[2, 1, 3], [1, 3, 4]], FLOAT64)))
+        finally:
+            await service.stop()
+
+    with use_precision(40):
+        third, floats = asyncio.run(solve_both(SolverService(workers=1, max_latency=0)))
+    assert third.backend == DECIMAL
+    assert third.coordinates[0] == Decimal('0.' + '3' * 40)
+    assert floats.backend == FLOAT64
+    assert list(floats.coordinates) == [1., 1.]
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+import solver
+from backend import DECIMAL, FLOAT64, get_backend, get_precision, use_backend, use_precision
+from crosscheck import system
+
+np = pytest.importorskip('numpy')
+
+import binfile
+
+
+def run(argv):
+    with use_backend(get_backend()), use_precision(get_precision()):
+        return solver.main(argv)
+
+
+def test_jsonl_to_stdout(tmp_path, capsys):
+    path = tmp_path / 'systems.jsonl'
+    path.write_text('{"id": 1, "equations": [[1, 1, 2], [1, -1, 0]]}\n')
+    assert run([str(path), '--precision', '40']) == 0
+    record = json.loads(capsys.readouterr().out)
+    assert (record['system'], record['status']) == (1, 'unique')
+    assert [float(x) for x in record['solution']] == [1, 1]
+
+
+def test_decimal_binary_solve_writes_a_float64_solution(tmp_path):
+    source, target = str(tmp_path / 'system.bin'), str(tmp_path / 'solution.bin')
+    binfile.write_system(source, system([[2, 1, -1, -3], [1, -3, 2, 13], [3, 2, 1, 2]], FLOAT64))
+    assert run([source, '-o', target, '--backend', DECIMAL, '--mode', 'exact']) == 0
+    assert np.allclose(binfile.read_solution(target).coordinates, [1, -2, 3])
+
+
+def test_binary_input_needs_an_output(tmp_path):
+    with pytest.raises(SystemExit):
+        run([str(tmp_path / 'system.bin')])
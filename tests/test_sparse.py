@@ -0,0 +1,80 @@
+import pytest
+
+from vector import Vector
+from linsys import LinearSystem, Parametrization
+from sparse import SparseLinearSystem
+from backend import DECIMAL, FLOAT64
+
+np = pytest.importorskip('numpy')
+
+BACKENDS = [DECIMAL, FLOAT64]
+
+
+def tridiagonal(n, backend):
+    s = SparseLinearSystem(n, backend)
+    for i in range(n):
+        terms = {i: 4}
+        if i > 0:
+            terms[i-1] = -1
+        if i < n - 1:
+            terms[i+1] = -1
+        s.add_equation(terms, i + 1)
+    return s
+
+
+def floats(v):
+    return [float(x) for x in v.coordinates]
+
+
+def residuals(s, point):
+    return [sum([float(x) * float(point[j]) for j, x in s.row(i).items()]) - float(s.constant_terms[i])
+            for i in range(len(s))]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_sparse_solution_matches_dense_elimination(backend):
+    s = tridiagonal(30, backend)
+    assert s.nnz == 3 * 30 - 2
+    solution = s.compute_solution()
+    assert isinstance(solution, Vector)
+    assert np.allclose(floats(solution), floats(s.to_linear_system().compute_solution()))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_dependent_sparse_system_gives_a_parametrization(backend):
+    s = SparseLinearSystem.from_coo([0, 0, 1, 1, 2, 2], [0, 1, 1, 2, 0, 2], [1, 1, 1, 1, 1, -1],
+                                    [1, 2, -1], 3, backend)
+    result = s.compute_solution()
+    assert isinstance(result, Parametrization)
+    assert np.allclose(residuals(s, result.basepoint.coordinates), 0)
+    for d in result.direction_vectors:
+        point = [b + x for b, x in zip(floats(result.basepoint), floats(d))]
+        assert np.allclose(residuals(s, point), 0)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_inconsistent_sparse_system(backend):
+    s = SparseLinearSystem(2, backend)
+    s.add_equation([(0, 1), (1, 1)], 1)
+    s.add_equation({0: 2, 1: 2}, 3)
+    assert s.compute_solution() == LinearSystem.NO_SOLUTIONS_MSG
+
+
+def test_repeated_columns_add_up_and_indices_are_checked():
+    s = SparseLinearSystem(3, DECIMAL)
+    s.add_equation([(0, 1), (0, 2), (2, 0)], 5)
+    assert s.row(0) == {0: 3}
+    with pytest.raises(Exception):
+        s.add_equation({3: 1}, 0)
+
+
+def test_scaled_dependent_system_is_classified_like_dense_elimination():
+    rng = np.random.RandomState(7)
+    a = rng.uniform(-1, 1, (6, 6)) * 1e6
+    k = rng.uniform(-1, 1, 6) * 1e6
+    a[-1], k[-1] = a[0] + a[1], k[0] + k[1]
+    s = SparseLinearSystem.from_coo([i for i in range(6) for j in range(6)], list(range(6)) * 6,
+                                    a.ravel().tolist(), k.tolist(), 6, FLOAT64)
+    dense = s.to_linear_system().compute_solution()
+    assert isinstance(dense, Parametrization)
+    assert isinstance(s.compute_solution(), Parametrization)
@@ -0,0 +1,54 @@
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from stream import read_systems, solve_file, solve_stream
+from backend import DECIMAL, FLOAT64
+
+pytest.importorskip('numpy')
+
+JSONL = '\n'.join([
+    '{"id": "a", "equations": [[1, 1, 2], [1, -1, 0]]}',
+    '{"id": "a", "equations": [[1, 1, 1], [2, 2, 3]]}',
+    '{"system": 7, "normal_vector": [2.5], "constant_term": 5}',
+]) + '\n'
+CSV = 's1,1,1,2\ns1,1,-1,0\ns2,1,1,1\ns2,2,2,3\n'
+
+
+def solve(text, file_format, **options):
+    output = io.StringIO()
+    count = solve_stream(io.StringIO(text), output, file_format, **options)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert count == len(records)
+    return records
+
+
+def test_back_to_back_systems_with_the_same_id_stay_apart():
+    systems = list(read_systems(io.StringIO(JSONL), 'jsonl', DECIMAL))
+    assert [(system_id, len(s)) for system_id, s in systems] == [('a', 2), ('a', 2), (7, 1)]
+    assert systems[2][1][0].normal_vector.coordinates == (Decimal('2.5'),)
+
+
+@pytest.mark.parametrize('backend', [DECIMAL, FLOAT64])
+def test_jsonl_results_in_input_order(backend):
+    records = solve(JSONL, 'jsonl', batch_size=2, backend=backend)
+    assert [r['status'] for r in records] == ['unique', 'none', 'unique']
+    assert [float(x) for x in records[0]['solution']] == [1, 1]
+    assert [float(x) for x in records[2]['solution']] == [2]
+
+
+def test_csv_with_a_process_pool(tmp_path):
+    records = solve(CSV, 'csv', batch_size=1, workers=2)
+    assert [(r['system'], r['status']) for r in records] == [('s1', 'unique'), ('s2', 'none')]
+
+    path = tmp_path / 'in.csv'
+    path.write_text(CSV)
+    assert solve_file(str(path), str(tmp_path / 'out.jsonl')) == 2
+    assert len((tmp_path / 'out.jsonl').read_text().splitlines()) == 2
+
+
+def test_unknown_format():
+    with pytest.raises(Exception):
+        list(read_systems(io.StringIO(CSV), 'xml'))
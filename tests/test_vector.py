@@ -0,0 +1,67 @@
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from vector import Vector
+from backend import DECIMAL, FLOAT64, FRACTION
+
+
+def test_slots_leave_no_instance_dict():
+    v = Vector([1, 2, 3], DECIMAL)
+    assert not hasattr(v, '__dict__')
+    with pytest.raises(AttributeError):
+        v.extra = 1
+
+
+def test_trusted_constructor_keeps_the_coordinates():
+    coordinates = (Decimal(1), Decimal(2))
+    v = Vector._trusted(coordinates, DECIMAL)
+    assert v.coordinates is coordinates
+    assert v.dimension == 2
+    assert v == Vector([1, 2], DECIMAL)
+
+
+def test_operations_agree_across_backends():
+    pytest.importorskip('numpy')
+    a, b = [3, -1, 2], [1, 4, -2]
+    exact_dot = sum([Fraction(x) * y for x, y in zip(a, b)])
+    for backend in (DECIMAL, FLOAT64, FRACTION):
+        v, w = Vector(a, backend), Vector(b, backend)
+        assert v.dot_product(w) == exact_dot
+        assert [float(x) for x in v.plus(w).coordinates] == [4, 3, 0]
+        assert [float(x) for x in v.times_scalar(2).coordinates] == [6, -2, 4]
+        assert abs(float(v.magnitude()) - 14 ** 0.5) < 1e-12
+
+
+def test_memoized_values_follow_the_precision():
+    from backend import use_precision
+    v = Vector([1, 1], DECIMAL)
+    with use_precision(10):
+        short = v.magnitude()
+    with use_precision(30):
+        assert v.magnitude() != short
+        assert v.magnitude() is v.magnitude()
+
+
+def test_shared_float64_arrays_are_not_memoized():
+    np = pytest.importorskip('numpy')
+    rows = np.array([[3., 4.], [6., 8.]])
+    own = np.array([3., 4.])
+    shared = Vector(own, FLOAT64)
+    assert shared.magnitude() == 5
+    own[:] = [6., 8.]
+    assert shared.magnitude() == 10
+
+    view = Vector._trusted(rows[1], FLOAT64)
+    assert view.magnitude() == 10
+    rows[1] = [0., 1.]
+    assert view.magnitude() == 1
+    assert list(view.normalized().coordinates) == [0, 1]
+
+
+def test_private_copies_are_memoized():
+    np = pytest.importorskip('numpy')
+    v = Vector([3., 4.], FLOAT64)
+    assert v.normalized() is v.normalized()
+    assert Vector._trusted(np.array([3., 4.]), FLOAT64).magnitude() == 5
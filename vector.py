@@ -1,16 +1,58 @@
 from math import sqrt, acos , pi
+from contextlib import contextmanager
 from decimal import Decimal, getcontext
 
-getcontext().prec = 5
+from backend import FLOAT64, FRACTION, get_backend, require_numpy, scalar
+import instrument
+
+
+# squared norm, magnitude and unit vector are cached on each vector the first
+# time they are asked for. Turn this off for large batches of vectors that
+# are only used once, the cache costs a dict per vector.
+_memoize = True
+
+
+def set_memoization(enabled):
+    global _memoize
+    _memoize = bool(enabled)
+
+
+@contextmanager
+def memoization(enabled):
+    previous = _memoize
+    set_memoization(enabled)
+    try:
+        yield
+    finally:
+        set_memoization(previous)
+
 
 class Vector(object):
+    """An immutable vector, coordinates never change after construction."""
+
+    __slots__ = ('coordinates', 'dimension', 'backend', '_derived')
 
     CANNOT_NORMALIZE_ZERO_VECTOR_MSG = 'Cannot normalize the zero vector'
-    def __init__(self, coordinates):
+    NO_UNIQUE_PARALLEL_COMPONENT_MSG = 'No unique parallel component for the zero vector'
+    def __init__(self, coordinates, backend=None):
+        if backend is None:
+            backend = get_backend()
+        self.backend = backend
+        self._derived = None
+        if instrument.stats is not None:
+            instrument.stats.count('vectors_allocated')
         try:
-            if not coordinates:
+            if len(coordinates) == 0:
                 raise ValueError
-            self.coordinates = tuple([Decimal(x) for x in coordinates])
+            if backend == FLOAT64:
+                np = require_numpy()
+                self.coordinates = np.ascontiguousarray(coordinates, dtype=np.float64)
+                if self.coordinates is coordinates or self.coordinates.base is not None:
+                    self._derived = False
+            elif backend == FRACTION:
+                self.coordinates = tuple([scalar(x, FRACTION) for x in coordinates])
+            else:
+                self.coordinates = tuple([Decimal(x) for x in coordinates])
             self.dimension = len(coordinates)
 
         except ValueError:
@@ -20,38 +62,150 @@ class Vector(object):
             raise TypeError('The coordinates must be an iterable')
 
 
+    @classmethod
+    def _trusted(cls, coordinates, backend):
+        # for coordinates already in the backend's form: a tuple of Decimal or
+        # Fraction, or a contiguous float64 array. Nothing is checked or copied.
+        v = object.__new__(cls)
+        v.coordinates = coordinates
+        v.dimension = len(coordinates)
+        v.backend = backend
+        v._derived = False if backend == FLOAT64 and coordinates.base is not None else None
+        if instrument.stats is not None:
+            instrument.stats.count('vectors_allocated')
+        return v
+
+
     def __str__(self):
+        if self.backend == FLOAT64:
+            return 'Vector: {}'.format(tuple(self.coordinates.tolist()))
         return 'Vector: {}'.format(self.coordinates)
 
 
     def __eq__(self, v):
+        if not isinstance(v, Vector):
+            return NotImplemented
+        if self.backend == FLOAT64 or v.backend == FLOAT64:
+            return bool(require_numpy().array_equal(self.coordinates, v.coordinates))
         return self.coordinates == v.coordinates
 
+
+    def __ne__(self, v):
+        equal = self.__eq__(v)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+
+    def __hash__(self):
+        # equal numbers hash alike across int, float, Decimal and Fraction
+        if self.backend == FLOAT64:
+            return hash(tuple(self.coordinates.tolist()))
+        return hash(self.coordinates)
+
+
+    def __len__(self):
+        return self.dimension
+
+
+    def __getitem__(self, i):
+        return self.coordinates[i]
+
+
+    def __iter__(self):
+        return iter(self.coordinates)
+
+
+    def __add__(self, v):
+        return self.plus(v)
+
+
+    def __sub__(self, v):
+        return self.minus(v)
+
+
+    def __mul__(self, c):
+        if isinstance(c, Vector):
+            return NotImplemented
+        return self.times_scalar(c)
+
+    __rmul__ = __mul__
+
+
     def plus(self, v):
-        new_coordinates = [x+y for x,y in zip(self.coordinates, v.coordinates)]
-        return Vector(new_coordinates)
+        if self.backend == FLOAT64:
+            return Vector._trusted(self.coordinates + v.coordinates, FLOAT64)
+        if instrument.stats is not None:
+            instrument.stats.count('decimal_operations', self.dimension)
+        new_coordinates = tuple([x+y for x,y in zip(self.coordinates, v.coordinates)])
+        return Vector._trusted(new_coordinates, self.backend)
 
     def minus(self, v):
-        new_coordinates = [x-y for x,y in zip(self.coordinates, v.coordinates)]
-        return Vector(new_coordinates)
+        if self.backend == FLOAT64:
+            return Vector._trusted(self.coordinates - v.coordinates, FLOAT64)
+        if instrument.stats is not None:
+            instrument.stats.count('decimal_operations', self.dimension)
+        new_coordinates = tuple([x-y for x,y in zip(self.coordinates, v.coordinates)])
+        return Vector._trusted(new_coordinates, self.backend)
 
     def times_scalar(self, c):
-        new_coordinates = [Decimal(c)*x for x in self.coordinates]
-        return Vector(new_coordinates)
+        if self.backend == FLOAT64:
+            return Vector._trusted(float(c) * self.coordinates, FLOAT64)
+        if instrument.stats is not None:
+            instrument.stats.count('decimal_operations', self.dimension)
+        c = scalar(c, self.backend)
+        return Vector._trusted(tuple([c*x for x in self.coordinates]), self.backend)
+
+    def _memo(self, name, compute):
+        # _derived is False for float64 vectors whose array is shared with
+        # the caller or is a view, someone else can write to it
+        derived = self._derived
+        if not _memoize or derived is False:
+            return compute()
+        if derived is None:
+            derived = self._derived = {}
+        # Decimal results depend on the precision they were computed at
+        key = name if self.backend == FLOAT64 else (name, getcontext().prec)
+        try:
+            return derived[key]
+        except KeyError:
+            value = derived[key] = compute()
+            return value
+
+    def squared_norm(self):
+        return self._memo('squared_norm', lambda: self.dot_product(self))
 
     def magnitude(self):
-        coordinates_squared = [x**Decimal(2) for x in self.coordinates]
-        return sum(coordinates_squared)**Decimal(0.5)
+        return self._memo('magnitude', self._compute_magnitude)
+
+    def _compute_magnitude(self):
+        squared = self.squared_norm()
+        if self.backend == FLOAT64:
+            return sqrt(squared)
+        if self.backend == FRACTION:
+            return (Decimal(squared.numerator) / Decimal(squared.denominator)).sqrt()
+        return squared.sqrt()
 
     def normalized(self):
+        return self._memo('normalized', self._compute_normalized)
+
+    def _compute_normalized(self):
         try:
             magnitude = self.magnitude()
+            if self.backend == FLOAT64:
+                if magnitude == 0:
+                    raise ZeroDivisionError
+                return self.times_scalar(1.0 / magnitude)
             return self.times_scalar(Decimal('1.0')/Decimal(magnitude))
 
         except ZeroDivisionError:
-            raise Exception('Can not normalize the zero vector')
+            raise Exception(self.CANNOT_NORMALIZE_ZERO_VECTOR_MSG)
 
     def dot_product(self,v):
+        if self.backend == FLOAT64:
+            return float(require_numpy().dot(self.coordinates, v.coordinates))
+        if instrument.stats is not None:
+            instrument.stats.count('decimal_operations', 2 * self.dimension)
         return sum([x*y for x,y in zip(self.coordinates,v.coordinates)])
 
     def angle_with(self,v,in_degree = False):
@@ -72,7 +226,11 @@ class Vector(object):
                 raise e
 
     def check_parallel(self,v,tolerance=1e-5):
-        return abs(abs(self.dot_product(v)) - self.magnitude() * \
+        dot = self.dot_product(v)
+        if self.backend == FRACTION:
+            # Fraction magnitudes are Decimal square roots
+            dot = Decimal(dot.numerator) / Decimal(dot.denominator)
+        return abs(abs(dot) - self.magnitude() * \
             v.magnitude()) < tolerance
 
     def check_orthogonal(self,v,tolerance=1e-10):
@@ -81,7 +239,8 @@ class Vector(object):
     def parallel_component(self, v):
         try:
 
-            return (v.normalized()).times_scalar(self.dot_product(v.normalized()))
+            u = v.normalized()
+            return u.times_scalar(self.dot_product(u))
         except Exception as e:
             if str(e) == self.CANNOT_NORMALIZE_ZERO_VECTOR_MSG:
                 raise Exception(self.NO_UNIQUE_PARALLEL_COMPONENT_MSG)
@@ -105,19 +264,17 @@ class Vector(object):
             x1,y1,z1 = self.coordinates
             x2,y2,z2 = v.coordinates
             product = [y1*z2-y2*z1,-(x1*z2-x2*z1),x1*y2-x2*y1]
-            return Vector(product)
+            if self.backend == FLOAT64:
+                return Vector(product, FLOAT64)
+            return Vector._trusted(tuple(product), self.backend)
 
         except Exception as e:
             if len(self.coordinates)==2 and len(v.coordinates) ==2:
                 u1 = [x for x in self.coordinates]
                 u2 = [x for x in v.coordinates]
-                print u1
-                print u2
                 u1.append(0)
                 u2.append(0)
-                print u1
-                print u2
-                return Vector(u1).cross_product(Vector(u2))
+                return Vector(u1, self.backend).cross_product(Vector(u2, self.backend))
             elif len(self.coordinates) !=3 or len(v.coordinates) !=3:
                 raise Exception ('not dimension not equal or not enough value')
 
@@ -131,6 +288,7 @@ class Vector(object):
 
 
 
-vector_1 = Vector([8.462,7.893])
-vector_2 = Vector([6.984,-5.975])
-print vector_1.cross_product(vector_2)
+if __name__ == '__main__':
+    vector_1 = Vector([8.462,7.893])
+    vector_2 = Vector([6.984,-5.975])
+    print(vector_1.cross_product(vector_2))